@@ -425,6 +425,13 @@ class StorageSettings(BaseSettings):
         description="Enable encryption for stored files"
     )
 
+    image_processing_workers: int = Field(
+        default=0,
+        ge=0,
+        le=32,
+        description="Worker processes for image resizing (0 = based on CPU count)"
+    )
+
     storage_encryption_key: str = Field(
         default="",
         description="Encryption key for stored files"
@@ -777,6 +784,43 @@ class ApplicationSettings(BaseSettings):
         description="Health check endpoint path"
     )
 
+    # Dormant User Sweep
+    dormant_user_sweep_enabled: bool = Field(
+        default=False,
+        description="Periodically mark users without recent logins as inactive"
+    )
+
+    dormant_user_sweep_interval_hours: int = Field(
+        default=24,
+        ge=1,
+        le=168,
+        description="Hours between dormant user sweeps (1-168)"
+    )
+
+    dormant_user_inactive_days: int = Field(
+        default=90,
+        ge=30,
+        le=730,
+        description="Days without login before a user is considered dormant (30-730)"
+    )
+
+    # Request instrumentation
+    server_timing_enabled: Optional[bool] = Field(
+        default=None,
+        description="Add a Server-Timing header with db/cache/storage/serialize timings to responses. "
+                    "Defaults to on in development only"
+    )
+
+    metrics_allowed_ips: List[str] = Field(
+        default=["127.0.0.1", "::1"],
+        description="Client addresses or networks (CIDR) allowed to scrape /metrics"
+    )
+
+    metrics_token: Optional[str] = Field(
+        default=None,
+        description="Bearer token that also grants access to /metrics, e.g. for a remote Prometheus"
+    )
+
     # Maintenance Mode
     maintenance_mode: bool = Field(
         default=False,
@@ -971,6 +1015,43 @@ class Settings(BaseSettings):
         """Backward compatibility for MINIO_SECURE."""
         return self.storage.minio_secure
 
+    @property
+    def IMAGE_PROCESSING_WORKERS(self) -> int:
+        """Backward compatibility for IMAGE_PROCESSING_WORKERS."""
+        return self.storage.image_processing_workers
+
+    @property
+    def DORMANT_USER_SWEEP_ENABLED(self) -> bool:
+        """Backward compatibility for DORMANT_USER_SWEEP_ENABLED."""
+        return self.application.dormant_user_sweep_enabled
+
+    @property
+    def DORMANT_USER_SWEEP_INTERVAL_HOURS(self) -> int:
+        """Backward compatibility for DORMANT_USER_SWEEP_INTERVAL_HOURS."""
+        return self.application.dormant_user_sweep_interval_hours
+
+    @property
+    def DORMANT_USER_INACTIVE_DAYS(self) -> int:
+        """Backward compatibility for DORMANT_USER_INACTIVE_DAYS."""
+        return self.application.dormant_user_inactive_days
+
+    @property
+    def SERVER_TIMING_ENABLED(self) -> bool:
+        """Backward compatibility for SERVER_TIMING_ENABLED."""
+        if self.application.server_timing_enabled is None:
+            return self.is_development()
+        return self.application.server_timing_enabled
+
+    @property
+    def METRICS_ALLOWED_IPS(self) -> List[str]:
+        """Backward compatibility for METRICS_ALLOWED_IPS."""
+        return self.application.metrics_allowed_ips
+
+    @property
+    def METRICS_TOKEN(self) -> Optional[str]:
+        """Backward compatibility for METRICS_TOKEN."""
+        return self.application.metrics_token
+
     @property
     def CORS_ORIGINS(self) -> Union[List[str], str]:
         """Backward compatibility for CORS_ORIGINS."""
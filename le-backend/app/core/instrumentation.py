@@ -0,0 +1,233 @@
+"""
+Request instrumentation
+
+Ties database, cache and storage time to the HTTP request that caused it:
+- SQLAlchemy cursor events time every statement
+- instrument_client() wraps the Redis and MinIO clients
+- InstrumentationMiddleware (app.middleware.instrumentation_middleware)
+  starts a RequestTimings per request, adds a Server-Timing header and
+  records the Prometheus metrics below, served from /metrics
+
+Timings are collected in a context variable, so work done outside a request
+(background jobs, scripts) only feeds the per-operation histograms.
+"""
+
+import collections
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.query_budget import statement_shape
+
+# Server-Timing metric names, in header order
+TIMING_CATEGORIES = ("db", "cache", "storage", "serialize")
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request duration",
+    ["method", "route", "status"]
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database statements executed per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+)
+HTTP_REQUEST_CATEGORY_DURATION = Histogram(
+    "http_request_category_duration_seconds",
+    "Time per request spent in the database, cache, storage and serialization",
+    ["method", "route", "category"]
+)
+DB_STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "Database statement duration",
+    ["operation"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+CLIENT_CALL_DURATION = Histogram(
+    "client_call_duration_seconds",
+    "Redis (cache) and MinIO (storage) call duration",
+    ["category", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+NAMED_QUERY_DURATION = Histogram(
+    "named_query_duration_seconds",
+    "Duration of queries timed by name in the services",
+    ["query_name"]
+)
+SLOW_QUERIES = Counter(
+    "named_query_slow_total",
+    "Named queries slower than one second",
+    ["query_name"]
+)
+
+
+@dataclass
+class RequestTimings:
+    """Time and call counts per category for one request"""
+    durations: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(TIMING_CATEGORIES, 0.0))
+    counts: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(TIMING_CATEGORIES, 0))
+    # Executions per statement shape, only collected when N+1 warnings are on
+    statements: Optional[collections.Counter] = None
+
+    def add(self, category: str, seconds: float) -> None:
+        self.durations[category] = self.durations.get(category, 0.0) + seconds
+        self.counts[category] = self.counts.get(category, 0) + 1
+
+    @property
+    def db_queries(self) -> int:
+        return self.counts["db"]
+
+    def server_timing(self, total: float) -> str:
+        """Server-Timing header value; durations in milliseconds"""
+        parts = [
+            f'{category};dur={self.durations[category] * 1000:.1f};desc="{self.counts[category]} calls"'
+            for category in TIMING_CATEGORIES
+            if self.counts[category]
+        ]
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings(track_statements: bool = False) -> Tuple[RequestTimings, Token]:
+    """Begin collecting timings for the current request; pass the token to end_request_timings"""
+    timings = RequestTimings(statements=collections.Counter() if track_statements else None)
+    return timings, _current_timings.set(timings)
+
+
+def end_request_timings(token: Token) -> None:
+    _current_timings.reset(token)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current_timings.get()
+
+
+def record(category: str, seconds: float) -> None:
+    """Add time to the current request, if any"""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(category, seconds)
+
+
+@contextmanager
+def timed(category: str, operation: str = "call"):
+    """Time a block as cache or storage work"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        record(category, elapsed)
+        CLIENT_CALL_DURATION.labels(category, operation).observe(elapsed)
+
+
+def observe_named_query(query_name: str, seconds: float) -> None:
+    """Export a service-level named query timing (QueryOptimizationService and friends)"""
+    NAMED_QUERY_DURATION.labels(query_name).observe(seconds)
+    if seconds > 1.0:
+        SLOW_QUERIES.labels(query_name).inc()
+
+
+class InstrumentedJSONResponse(JSONResponse):
+    """JSONResponse that reports rendering time as the serialize category"""
+
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        try:
+            return super().render(content)
+        finally:
+            record("serialize", time.perf_counter() - started)
+
+
+class InstrumentedClient:
+    """
+    Proxy that times every method call of a client
+
+    Used for the synchronous Redis and MinIO clients; attributes that are
+    not callables are passed through untouched.
+    """
+
+    def __init__(self, client: Any, category: str):
+        self._client = client
+        self._category = category
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._client, name)
+        if not callable(attribute) or name.startswith("_"):
+            return attribute
+
+        category = self._category
+        if inspect.iscoroutinefunction(attribute):
+            @functools.wraps(attribute)
+            async def timed_async_call(*args, **kwargs):
+                with timed(category, name):
+                    return await attribute(*args, **kwargs)
+            return timed_async_call
+
+        @functools.wraps(attribute)
+        def timed_call(*args, **kwargs):
+            with timed(category, name):
+                return attribute(*args, **kwargs)
+        return timed_call
+
+    def __repr__(self) -> str:
+        return f"<InstrumentedClient {self._category} {self._client!r}>"
+
+
+def instrument_client(client: Any, category: str) -> Any:
+    """Wrap a client so its calls count as cache or storage time; None stays None"""
+    if client is None or isinstance(client, InstrumentedClient):
+        return client
+    return InstrumentedClient(client, category)
+
+
+def _statement_operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "other"
+    return keyword if keyword in ("select", "insert", "update", "delete", "with", "copy") else "other"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_time"].pop()
+    elapsed = time.perf_counter() - started
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add("db", elapsed)
+        if timings.statements is not None:
+            timings.statements[statement_shape(statement)] += 1
+    DB_STATEMENT_DURATION.labels(_statement_operation(statement)).observe(elapsed)
+
+
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute does not fire for failed statements; drop their start time
+    conn = exception_context.connection
+    if conn is not None and exception_context.cursor is not None:
+        started = conn.info.get("query_start_time")
+        if started:
+            started.pop()
+
+
+def install_sqlalchemy_instrumentation(engine) -> None:
+    """Time every statement executed through the engine (sync or async)"""
+    sync_engine: Engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
@@ -0,0 +1,163 @@
+"""
+Connection pool telemetry
+
+Measures the SQLAlchemy pool from the inside instead of querying the database:
+- Checkout wait: time a caller waits for a connection, including opening a
+  new one when the pool grows into its overflow. SQLAlchemy has no event
+  before a checkout, so InstrumentedAsyncAdaptedQueuePool times _do_get
+- Hold time: checkout to checkin, from pool events
+- Connections opened: connect event
+
+Durations go to Prometheus histograms and to fixed-size rolling windows that
+ConnectionPoolMonitor turns into percentiles and pool-size recommendations.
+DownsamplingBuffer keeps the monitor's history bounded.
+"""
+
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Tuple
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Most recent durations kept for percentiles
+TELEMETRY_WINDOW = 10_000
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time waiting for a pooled database connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+POOL_CONNECTION_HOLD = Histogram(
+    "db_pool_connection_hold_seconds",
+    "Time a pooled database connection is checked out",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+POOL_CONNECTIONS_OPENED = Counter(
+    "db_pool_connections_opened_total",
+    "New database connections opened by the pool"
+)
+
+
+class PoolTelemetry:
+    """Rolling windows of checkout wait and hold times for one engine's pool"""
+
+    def __init__(self, window: int = TELEMETRY_WINDOW):
+        # (monotonic time observed, seconds)
+        self.wait_times: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self.hold_times: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self.connections_opened = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        self.wait_times.append((time.monotonic(), seconds))
+        POOL_CHECKOUT_WAIT.observe(seconds)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connections_opened += 1
+        POOL_CONNECTIONS_OPENED.inc()
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info["checked_out_at"] = time.monotonic()
+        self.checked_out += 1
+        self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is None:
+            return
+        self.checked_out = max(self.checked_out - 1, 0)
+        now = time.monotonic()
+        self.hold_times.append((now, now - checked_out_at))
+        POOL_CONNECTION_HOLD.observe(now - checked_out_at)
+
+    def take_peak_checked_out(self) -> int:
+        """Highest concurrent checkouts since the previous call"""
+        peak, self.peak_checked_out = self.peak_checked_out, self.checked_out
+        return peak
+
+    def checkout_rate(self) -> float:
+        """Checkouts per second over the hold time window"""
+        if len(self.hold_times) < 2:
+            return 0.0
+        elapsed = self.hold_times[-1][0] - self.hold_times[0][0]
+        return (len(self.hold_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def install(self, engine) -> None:
+        """Listen to the engine's pool events; also applies to pools recreated by dispose()"""
+        sync_engine = getattr(engine, "sync_engine", engine)
+        if event.contains(sync_engine, "checkout", self._on_checkout):
+            return
+        event.listen(sync_engine, "connect", self._on_connect)
+        event.listen(sync_engine, "checkout", self._on_checkout)
+        event.listen(sync_engine, "checkin", self._on_checkin)
+
+
+pool_telemetry = PoolTelemetry()
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that reports how long each checkout waited"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_telemetry.observe_wait(time.perf_counter() - started)
+
+
+class DownsamplingBuffer:
+    """
+    Fixed-size history of samples that halves its resolution when full
+
+    Samples are dicts of numbers plus a "timestamp". When capacity is
+    reached, adjacent pairs are merged (numbers averaged, "peak_" fields
+    maximized, latest timestamp kept) and from then on every stored sample
+    covers twice as many raw samples. Memory stays bounded while the history
+    still reaches back to the first sample.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        self.capacity = capacity
+        self.stride = 1
+        self._samples: List[Dict[str, Any]] = []
+        self._pending: List[Dict[str, Any]] = []
+
+    def append(self, sample: Dict[str, Any]) -> None:
+        self._pending.append(sample)
+        if len(self._pending) < self.stride:
+            return
+        self._samples.append(_merge_samples(self._pending))
+        self._pending = []
+        if len(self._samples) >= self.capacity:
+            self._samples = [
+                _merge_samples(self._samples[i:i + 2]) for i in range(0, len(self._samples), 2)
+            ]
+            self.stride *= 2
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        yield from self._samples
+        if self._pending:
+            yield _merge_samples(self._pending)
+
+    def __len__(self) -> int:
+        return len(self._samples) + (1 if self._pending else 0)
+
+
+def _merge_samples(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if len(samples) == 1:
+        return dict(samples[0])
+    merged = {}
+    for key, value in samples[-1].items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            merged[key] = value
+        elif key.startswith("peak_"):
+            merged[key] = max(sample[key] for sample in samples)
+        else:
+            merged[key] = sum(sample[key] for sample in samples) / len(samples)
+    return merged
@@ -0,0 +1,125 @@
+"""
+Query budgets and N+1 detection
+
+Statements are reduced to a shape (parameters and IN-list lengths removed,
+casts kept) so a query issued once per row shows up as one shape executed
+many times.
+
+- QueryCounter listens to an engine and lets tests assert how many statements
+  a block of code ran, e.g. an HTTP call through the test client
+- QUERY_BUDGETS holds the maximum number of statements per route; the
+  instrumentation middleware warns in debug mode when a route exceeds its
+  budget or repeats a statement shape, see repeated_shapes
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# get_current_user: the user row plus up to 15 selectinload statements
+# (department, branch, position.users, portfolio and line_manager with their
+# department and branch, status_changed_by_user with department, branch and
+# position.users). Many-to-one loads are skipped when the key is empty.
+AUTH_QUERIES = 16
+
+# Maximum statements per request, keyed by (method, route template).
+# Budgets must hold regardless of page size.
+QUERY_BUDGETS: Dict[Tuple[str, str], int] = {
+    # count, page, 8 selectinloads (user, approver, rejector, reviewer,
+    # assignments, employee, employee department and branch), document previews
+    ("GET", "/api/v1/applications/"): AUTH_QUERIES + 11,
+    # page with joinedloads, total count
+    ("GET", "/api/v1/customers/"): AUTH_QUERIES + 2,
+    # count, page, 9 selectinloads (department, branch, position, portfolio and
+    # line_manager with their department and branch)
+    ("GET", "/api/v1/users/"): AUTH_QUERIES + 11,
+    # count, page, manager or users selectinload
+    ("GET", "/api/v1/departments/"): AUTH_QUERIES + 3,
+    ("GET", "/api/v1/branches/"): AUTH_QUERIES + 3,
+    ("GET", "/api/v1/positions/"): AUTH_QUERIES + 3,
+    ("GET", "/api/v1/auth/me"): AUTH_QUERIES,
+}
+
+# A shape executed this many times within one request is reported as N+1
+DEFAULT_REPEAT_THRESHOLD = 5
+
+_PARAMETER = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<![:\w]):\w+|\?")
+# Placeholder lists, keeping a cast shared by every item (asyncpg: $1::UUID, $2::UUID)
+_PARAMETER_LIST = re.compile(r"(\?(?:::[\w\[\]]+)?)(?:\s*,\s*\1)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so executions that differ only in parameters compare equal"""
+    shape = _PARAMETER.sub("?", statement)
+    shape = _PARAMETER_LIST.sub(r"\1", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def repeated_shapes(shapes: Counter, threshold: int = DEFAULT_REPEAT_THRESHOLD) -> List[Tuple[str, int]]:
+    """Statement shapes executed at least threshold times, most frequent first"""
+    return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+
+def query_budget(method: str, route: str) -> Optional[int]:
+    return QUERY_BUDGETS.get((method.upper(), route))
+
+
+class QueryCounter:
+    """
+    Count statements executed through an engine
+
+    Usage:
+        with QueryCounter(test_engine) as queries:
+            await client.get("/api/v1/applications/?size=50", headers=auth_headers)
+        queries.assert_within_budget("GET", "/api/v1/applications/")
+        queries.assert_no_repeats()
+    """
+
+    def __init__(self, engine):
+        self.engine: Engine = getattr(engine, "sync_engine", engine)
+        self.statements: List[str] = []
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        self.statements.clear()
+        event.listen(self.engine, "after_cursor_execute", self._after_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        event.remove(self.engine, "after_cursor_execute", self._after_cursor_execute)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def shapes(self) -> Counter:
+        return Counter(statement_shape(statement) for statement in self.statements)
+
+    def _report(self) -> str:
+        return "\n".join(f"  {count}x {shape}" for shape, count in self.shapes().most_common())
+
+    def assert_at_most(self, limit: int, label: str = "block") -> None:
+        if self.count > limit:
+            raise AssertionError(
+                f"{label} executed {self.count} statements, budget is {limit}:\n{self._report()}"
+            )
+
+    def assert_within_budget(self, method: str, route: str) -> None:
+        """Assert the count against QUERY_BUDGETS for the route"""
+        limit = query_budget(method, route)
+        if limit is None:
+            raise AssertionError(f"No query budget defined for {method.upper()} {route}")
+        self.assert_at_most(limit, f"{method.upper()} {route}")
+
+    def assert_no_repeats(self, threshold: int = DEFAULT_REPEAT_THRESHOLD) -> None:
+        """Assert no statement shape ran threshold or more times (N+1 pattern)"""
+        repeats = repeated_shapes(self.shapes(), threshold)
+        if repeats:
+            details = "\n".join(f"  {count}x {shape}" for shape, count in repeats)
+            raise AssertionError(f"Repeated statements (possible N+1):\n{details}")
@@ -7,6 +7,8 @@ import asyncio
 import logging
 import os
 from app.core.config import settings
+from app.core.instrumentation import instrument_client
+from app.core.pool_telemetry import InstrumentedAsyncAdaptedQueuePool, pool_telemetry
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +32,7 @@ engine = create_async_engine(
     echo=os.getenv("SQLALCHEMY_ECHO", "false").lower() == "true",
     connect_args=connect_args,
     # Connection pool settings for better reliability
+    poolclass=InstrumentedAsyncAdaptedQueuePool,  # Reports checkout wait times
     pool_size=10,
     max_overflow=20,
     pool_timeout=30,
@@ -40,6 +43,7 @@ engine = create_async_engine(
     # Only log warnings and errors, not info/debug
     echo_pool=settings.DEBUG,
 )
+pool_telemetry.install(engine)
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 class Base(DeclarativeBase):
@@ -98,6 +102,8 @@ def get_redis() -> Optional[redis.Redis]:
                     decode_responses=True
                 )
                 _redis_client.ping()
+            # Count Redis calls as cache time in the request timings
+            _redis_client = instrument_client(_redis_client, "cache")
         except Exception:
             # If Redis is not available, return None
             # The enum service will handle this gracefully
@@ -1,8 +1,11 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
+import hmac
+import ipaddress
 import uvicorn
 import os
 import warnings
@@ -19,6 +22,9 @@ from app.routers import performance, security, employees, admin
 from app.core.config import settings
 from app.core.error_handlers import register_error_handlers
 from app.middleware.database_middleware import DatabaseConnectionMiddleware
+from app.middleware.instrumentation_middleware import InstrumentationMiddleware
+from app.core.instrumentation import InstrumentedJSONResponse, install_sqlalchemy_instrumentation
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 # Configure logging for production
 import logging
@@ -95,13 +101,36 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             print(f"Warning: Could not check database health: {e}")
 
+    # Start the scheduled dormant user sweep
+    dormant_user_sweep = None
+    if settings.DORMANT_USER_SWEEP_ENABLED:
+        from app.services.activity_management_service import dormant_user_sweep_loop
+        dormant_user_sweep = asyncio.create_task(dormant_user_sweep_loop())
+
     yield
 
+    if dormant_user_sweep:
+        dormant_user_sweep.cancel()
+        try:
+            await dormant_user_sweep
+        except asyncio.CancelledError:
+            pass
+
+    # Stop image processing workers
+    from app.services.image_optimization_service import image_optimization_service
+    await asyncio.to_thread(image_optimization_service.shutdown)
+
+    # Stop archive download readers
+    from app.services import document_archive_service
+    document_archive_service.shutdown()
+
 app = FastAPI(
     title="LC Work Flow API",
     description="Backend API for LC Work Flow application",
     version="1.0.0",
     lifespan=lifespan,
+    # Time response rendering for the Server-Timing header
+    default_response_class=InstrumentedJSONResponse,
     # Configure OpenAPI schema generation to handle non-serializable defaults gracefully
     generate_unique_id_function=lambda route: f"{route.tags[0]}-{route.name}" if route.tags else route.name,
     # Add exception handlers for graceful error handling
@@ -128,6 +157,14 @@ app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
 # Add database connection middleware
 app.add_middleware(DatabaseConnectionMiddleware, max_reconnect_attempts=3)
 
+# Per-request db/cache/storage timings (Server-Timing header and /metrics)
+install_sqlalchemy_instrumentation(engine)
+app.add_middleware(
+    InstrumentationMiddleware,
+    server_timing=settings.SERVER_TIMING_ENABLED,
+    query_warnings=settings.DEBUG
+)
+
 # Configure CORS LAST so it's outermost and applies to all responses (including errors)
 app.add_middleware(
     CORSMiddleware,
@@ -160,7 +197,7 @@ app.include_router(selfies.router, prefix="/api/v1/selfies", tags=["selfies"])
 app.include_router(validation.router, prefix="/api/v1", tags=["validation"])
 app.include_router(employees.router, prefix="/api/v1", tags=["employees"])
 app.include_router(admin.router, prefix="/api/v1", tags=["admin"])
-# app.include_router(account_validation.router, prefix="/api/v1", tags=["account-validation"])
+app.include_router(account_validation.router, prefix="/api/v1", tags=["account-validation"])
 
 # Import and include WebSocket router
 from app.routers import websocket
@@ -181,6 +218,29 @@ async def root() -> dict:
 async def health_check() -> dict:
     return {"status": "healthy"}
 
+def require_metrics_access(request: Request) -> None:
+    """Allow /metrics for METRICS_TOKEN bearers and direct clients in METRICS_ALLOWED_IPS"""
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("authorization", "")
+    if token and hmac.compare_digest(authorization, f"Bearer {token}"):
+        return
+
+    # uvicorn trusts forwarded headers from any host, so the client address of
+    # a proxied request is caller-controlled; only direct connections qualify
+    proxied = "x-forwarded-for" in request.headers or "forwarded" in request.headers
+    if request.client and not proxied:
+        try:
+            client_ip = ipaddress.ip_address(request.client.host)
+            if any(client_ip in ipaddress.ip_network(allowed, strict=False) for allowed in settings.METRICS_ALLOWED_IPS):
+                return
+        except ValueError:
+            pass
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to read metrics")
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+async def metrics() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/api/v1/health")
 async def api_health_check() -> dict:
     from app.core.database_health import check_database_health
@@ -0,0 +1,90 @@
+"""Middleware that reports per-request timings as Server-Timing and Prometheus metrics."""
+
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.instrumentation import (
+    HTTP_REQUEST_CATEGORY_DURATION,
+    HTTP_REQUEST_DB_QUERIES,
+    HTTP_REQUEST_DURATION,
+    TIMING_CATEGORIES,
+    end_request_timings,
+    start_request_timings,
+)
+from app.core.query_budget import DEFAULT_REPEAT_THRESHOLD, query_budget, repeated_shapes
+
+logger = logging.getLogger(__name__)
+
+# Label for requests that did not match a route, keeps metric cardinality bounded
+UNMATCHED_ROUTE = "unmatched"
+
+
+class InstrumentationMiddleware:
+    """
+    Collect database, cache, storage and serialization time for each request.
+
+    With query_warnings on (debug mode), requests that exceed their route's
+    query budget or repeat a statement shape are logged as likely N+1s.
+
+    Written as plain ASGI middleware rather than BaseHTTPMiddleware so the
+    endpoint runs in the same context as the middleware and the timings
+    recorded by the engine and client hooks are visible here.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        server_timing: bool = True,
+        query_warnings: bool = False,
+        repeat_threshold: int = DEFAULT_REPEAT_THRESHOLD
+    ):
+        self.app = app
+        self.server_timing = server_timing
+        self.query_warnings = query_warnings
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings, token = start_request_timings(track_statements=self.query_warnings)
+        status_code = 500
+
+        async def send_with_timings(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", timings.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            end_request_timings(token)
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+
+            HTTP_REQUEST_DURATION.labels(method, route_label, str(status_code)).observe(time.perf_counter() - started)
+            HTTP_REQUEST_DB_QUERIES.labels(method, route_label).observe(timings.db_queries)
+            for category in TIMING_CATEGORIES:
+                if timings.counts[category]:
+                    HTTP_REQUEST_CATEGORY_DURATION.labels(method, route_label, category).observe(
+                        timings.durations[category]
+                    )
+            if self.query_warnings:
+                self._warn_on_queries(method, route_label, timings)
+
+    def _warn_on_queries(self, method: str, route: str, timings) -> None:
+        budget = query_budget(method, route)
+        if budget is not None and timings.db_queries > budget:
+            logger.warning(f"{method} {route} executed {timings.db_queries} queries, budget is {budget}")
+        for shape, count in repeated_shapes(timings.statements, self.repeat_threshold):
+            logger.warning(f"Possible N+1 in {method} {route}: {count}x {shape[:200]}")
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, DateTime, Text, Boolean, ForeignKey, Numeric, Date, JSON, BigInteger, Integer, Index
+from sqlalchemy import Column, String, DateTime, Text, Boolean, ForeignKey, Numeric, Date, JSON, BigInteger, Integer, Index, Computed
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.sql import func, text
 from app.database import Base
 import uuid
 
@@ -113,6 +113,15 @@ class CustomerApplication(Base):
     marital_status = Column(String(20))  # single, married, divorced, widowed, separated
     portfolio_officer_name = Column(String(255))
     portfolio_officer_migrated = Column(Boolean, default=False, index=True)
+    # Lower-cased names, ID, phone and officer without zero-width characters; trigram indexed for search
+    search_text = deferred(Column(Text, Computed(
+        "lower(regexp_replace("
+        "coalesce(full_name_khmer, '') || ' ' || coalesce(full_name_latin, '') || ' ' || "
+        "coalesce(id_number, '') || ' ' || coalesce(phone, '') || ' ' || "
+        "coalesce(portfolio_officer_name, ''), "
+        "'[\\u200B-\\u200D\\u2060\\uFEFF]', '', 'g'))",
+        persisted=True
+    )))
     
     # Address Information
     current_address = Column(Text)
@@ -243,6 +252,8 @@ class File(Base):
     uploaded_by = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
     application_id = Column(UUID(as_uuid=True), ForeignKey('customer_applications.id'))
     folder_id = Column(UUID(as_uuid=True), ForeignKey('folders.id'), nullable=True)
+    preview_variants = Column(JSON, nullable=True)  # {size_name: object_name} of generated WebP previews
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 hex digest, shared objects have the same hash
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -297,6 +308,19 @@ class Folder(Base):
     files = relationship("File", back_populates="folder")
     application = relationship("CustomerApplication", foreign_keys=[application_id])
 
+    # One parent folder per application and unique child names per parent;
+    # the folder service upserts against these with ON CONFLICT DO NOTHING
+    __table_args__ = (
+        Index(
+            'idx_unique_application_parent_folder', 'application_id', unique=True,
+            postgresql_where=text('parent_id IS NULL AND application_id IS NOT NULL')
+        ),
+        Index(
+            'idx_unique_child_folder_name', 'parent_id', 'name', 'application_id', unique=True,
+            postgresql_where=text('parent_id IS NOT NULL')
+        ),
+    )
+
 class Selfie(Base):
     __tablename__ = "selfies"
     
@@ -419,6 +443,17 @@ class Employee(Base):
     updater = relationship("User", foreign_keys=[updated_by])
     assignments = relationship("ApplicationEmployeeAssignment", back_populates="employee")
 
+class EmployeeCodeSequence(Base):
+    __tablename__ = "employee_code_sequences"
+    
+    # One counter per code family, keyed by the code without its trailing number
+    prefix = Column(String(20), primary_key=True)  # '' for purely numeric codes, e.g. 'EMP-2025-'
+    pattern = Column(String(30), nullable=False)  # sequential_numeric, prefix_year_seq, prefix_seq, custom
+    last_value = Column(BigInteger, nullable=False, default=0)
+    width = Column(Integer, nullable=False, default=4)  # Zero-padding of the numeric part
+    code_count = Column(Integer, nullable=False, default=0)  # Codes in this family, used to pick the default
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class ApplicationEmployeeAssignment(Base):
     __tablename__ = "application_employee_assignments"
     
@@ -31,11 +31,12 @@ if models_path.exists():
         BulkOperation = parent_models.BulkOperation
         Notification = parent_models.Notification
         Employee = parent_models.Employee
+        EmployeeCodeSequence = parent_models.EmployeeCodeSequence
         ApplicationEmployeeAssignment = parent_models.ApplicationEmployeeAssignment
 
 
 __all__ = [
     "AuditLog", "AuditEventType", "User", "Department", "Branch",
     "CustomerApplication", "File", "Setting", "Position", "Folder", "Selfie", "BulkOperation", "Notification",
-    "Employee", "ApplicationEmployeeAssignment",
+    "Employee", "EmployeeCodeSequence", "ApplicationEmployeeAssignment",
 ]
\ No newline at end of file
@@ -6,11 +6,15 @@ Provides endpoints for validating and standardizing account IDs from external sy
 particularly for 8-digit account IDs that need to be integrated with the UUID-based system.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Set
 from pydantic import BaseModel, Field
 from uuid import UUID
+import json
+import tempfile
 
 from ..database import get_db
 from ..services.account_id_service import AccountIDService, AccountIDValidationError
@@ -21,6 +25,12 @@ from ..core.logging import get_logger
 logger = get_logger(__name__)
 router = APIRouter(prefix="/account-validation", tags=["Account Validation"])
 
+# Number of account IDs validated per uniqueness query on the streaming endpoint
+STREAM_CHUNK_SIZE = 5000
+# Streamed results stay in memory up to this size, then spill to a temporary file
+STREAM_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+STREAM_READ_SIZE = 64 * 1024
+
 class AccountIDValidationRequest(BaseModel):
     """Request schema for account ID validation"""
     account_id: str = Field(..., description="Account ID to validate")
@@ -35,7 +45,7 @@ class AccountIDValidationResponse(BaseModel):
     is_valid: bool
     is_unique: Optional[bool] = None
     generated_uuid: Optional[str] = None
-    existing_application_id: Optional[int] = None
+    existing_application_id: Optional[str] = None
     validation_notes: list[str]
     processed_at: str
 
@@ -96,6 +106,27 @@ async def validate_account_id(
             detail="Internal server error during account ID validation"
         )
 
+def _update_bulk_summary(summary: Dict[str, int], result: Dict[str, Any]) -> None:
+    """Accumulate one bulk validation result into the running summary"""
+    summary['total'] += 1
+    if result['is_valid']:
+        summary['valid'] += 1
+        if result.get('is_unique', True):
+            summary['unique'] += 1
+        else:
+            summary['duplicate'] += 1
+    else:
+        summary['invalid'] += 1
+
+def _new_bulk_summary() -> Dict[str, int]:
+    return {
+        "total": 0,
+        "valid": 0,
+        "invalid": 0,
+        "unique": 0,
+        "duplicate": 0
+    }
+
 @router.post("/validate-bulk", response_model=BulkAccountIDResponse)
 async def validate_bulk_account_ids(
     request: BulkAccountIDRequest,
@@ -106,49 +137,23 @@ async def validate_bulk_account_ids(
     Validate multiple account IDs in bulk
     
     Useful for processing batches of account IDs from external systems.
+    Uniqueness for the whole batch is resolved with a single set-based query.
     """
     try:
         logger.info(f"User {current_user.username} validating {len(request.account_ids)} account IDs in bulk")
         
         account_service = AccountIDService(db)
-        results = []
-        summary = {
-            "total": len(request.account_ids),
-            "valid": 0,
-            "invalid": 0,
-            "unique": 0,
-            "duplicate": 0
-        }
+        summary = _new_bulk_summary()
+        
+        processed = await account_service.process_external_account_ids_bulk(
+            request.account_ids,
+            request.source_system or "external"
+        )
         
-        for account_id in request.account_ids:
-            try:
-                result = await account_service.process_external_account_id(
-                    account_id,
-                    None  # No application ID for bulk validation
-                )
-                
-                results.append(AccountIDValidationResponse(**result))
-                
-                if result['is_valid']:
-                    summary['valid'] += 1
-                    if result.get('is_unique', True):
-                        summary['unique'] += 1
-                    else:
-                        summary['duplicate'] += 1
-                else:
-                    summary['invalid'] += 1
-                    
-            except AccountIDValidationError as e:
-                # Add failed validation to results
-                results.append(AccountIDValidationResponse(
-                    original=account_id,
-                    standardized=None,
-                    format="unknown",
-                    is_valid=False,
-                    validation_notes=[f"Validation error: {e.message}"],
-                    processed_at=e.__dict__.get('processed_at', '')
-                ))
-                summary['invalid'] += 1
+        results = []
+        for result in processed:
+            results.append(AccountIDValidationResponse(**result))
+            _update_bulk_summary(summary, result)
         
         logger.info(f"Bulk validation completed: {summary}")
         
@@ -164,6 +169,88 @@ async def validate_bulk_account_ids(
             detail="Internal server error during bulk account ID validation"
         )
 
+def _parse_ndjson_account_id(line: bytes) -> Optional[str]:
+    """Extract an account ID from one NDJSON line (a JSON string or {"account_id": ...})"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        value = json.loads(line)
+    except ValueError:
+        # Tolerate plain-text lines from simple exports
+        return line.decode("utf-8", errors="replace")
+    if isinstance(value, dict):
+        value = value.get("account_id")
+    return None if value is None else str(value)
+
+@router.post("/validate-bulk/stream")
+async def validate_bulk_account_ids_stream(
+    request: Request,
+    source_system: str = "external",
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> StreamingResponse:
+    """
+    Validate a large batch of account IDs sent as NDJSON
+    
+    The body is read incrementally (one account ID per line) and validated
+    in chunks of ``STREAM_CHUNK_SIZE`` as it arrives, with one uniqueness
+    query per chunk, so the upload is never held in memory as a whole.
+    Results are spooled (to disk past ``STREAM_SPOOL_MAX_SIZE``) and streamed
+    back as NDJSON in input order, followed by a final ``{"summary": {...}}``
+    line. Intended for batches from the core banking system that are too
+    large for ``/validate-bulk``.
+    """
+    account_service = AccountIDService(db)
+    summary = _new_bulk_summary()
+    results = tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_MAX_SIZE, mode="w+b")
+    pending: List[str] = []
+    # Shared by all chunks so duplicates are reported across chunk boundaries
+    seen: Set[str] = set()
+    total = 0
+    
+    async def validate_pending() -> None:
+        processed = await account_service.process_external_account_ids_bulk(pending, source_system, seen)
+        for result in processed:
+            _update_bulk_summary(summary, result)
+            results.write((json.dumps(result, default=str) + "\n").encode("utf-8"))
+        pending.clear()
+    
+    try:
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                account_id = _parse_ndjson_account_id(line)
+                if account_id is not None:
+                    pending.append(account_id)
+                    total += 1
+                if len(pending) >= STREAM_CHUNK_SIZE:
+                    await validate_pending()
+        account_id = _parse_ndjson_account_id(buffer)
+        if account_id is not None:
+            pending.append(account_id)
+            total += 1
+        if pending:
+            await validate_pending()
+        results.write((json.dumps({"summary": summary}) + "\n").encode("utf-8"))
+        results.seek(0)
+    except Exception:
+        results.close()
+        raise
+    
+    logger.info(f"User {current_user.username} streamed validation of {total} account IDs: {summary}")
+    
+    async def stream_results():
+        try:
+            async for block in iterate_in_threadpool(iter(lambda: results.read(STREAM_READ_SIZE), b"")):
+                yield block
+        finally:
+            results.close()
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 @router.get("/formats")
 async def get_supported_formats(
     current_user: User = Depends(get_current_user)
@@ -2,21 +2,23 @@
 Admin Router
 Handles administrative operations including employee migration
 """
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import and_, func
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from uuid import UUID
-import asyncio
-import subprocess
-import sys
-from pathlib import Path
 
 from app.database import get_db
 from app.models import User, CustomerApplication, ApplicationEmployeeAssignment, Employee
 from app.routers.auth import get_current_user
 from app.core.logging import get_logger
+from app.services.background_job_service import job_service
+from app.services.portfolio_officer_migration_service import (
+    MIGRATION_NOTE_PREFIX,
+    PortfolioOfficerMigrator,
+    clear_checkpoint,
+)
 from pydantic import BaseModel
 
 logger = get_logger(__name__)
@@ -38,6 +40,7 @@ class MigrationResultResponse(BaseModel):
     success: bool
     message: str
     report: Dict[str, Any]
+    job_id: Optional[str] = None
 
 
 class UnmatchedNameResponse(BaseModel):
@@ -130,76 +133,36 @@ async def get_migration_status(
 
 @router.post("/migrate-employees", response_model=MigrationResultResponse)
 async def start_migration(
-    background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db),
+    run_in_background: bool = Query(False, description="Queue the migration as a background job"),
+    resume: bool = Query(True, description="Continue after the last completed chunk of an interrupted run"),
     current_user: User = Depends(get_current_user)
 ):
     """
     Start the employee migration process
     
-    This endpoint executes the migration script to convert portfolio_officer_name
-    values to structured employee assignments.
+    Converts portfolio_officer_name values to structured employee assignments
+    in-process. With run_in_background the migration is queued as a job whose
+    progress can be polled at /admin/migrate-employees/jobs/{job_id}.
     """
     try:
         logger.info(f"Migration started by admin {current_user.id}")
         
-        # Get the path to the migration script
-        script_path = Path(__file__).parent.parent.parent / "scripts" / "migrate_portfolio_officers.py"
-        
-        if not script_path.exists():
-            logger.error(f"Migration script not found at {script_path}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Migration script not found"
+        if run_in_background:
+            if not job_service.is_running:
+                await job_service.start_workers()
+            job_id = await job_service.submit_job(
+                "portfolio_officer_migration",
+                {"performed_by": str(current_user.id), "resume": resume}
+            )
+            return MigrationResultResponse(
+                success=True,
+                message="Migration queued",
+                report={},
+                job_id=job_id
             )
         
-        # Execute the migration script
-        result = subprocess.run(
-            [sys.executable, str(script_path)],
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout
-        )
-        
-        # Parse the output to extract report information
-        # The script logs the report, so we'll parse it from stdout
-        success = result.returncode == 0
-        
-        # Create a basic report from the output
-        report = {
-            "total": 0,
-            "matched": 0,
-            "created": 0,
-            "failed": 0,
-            "errors": []
-        }
-        
-        # Try to parse the output for report data
-        for line in result.stdout.split('\n'):
-            if "Total applications processed:" in line:
-                try:
-                    report["total"] = int(line.split(':')[1].strip())
-                except (ValueError, IndexError):
-                    pass
-            elif "Matched to existing employees:" in line:
-                try:
-                    report["matched"] = int(line.split(':')[1].strip())
-                except (ValueError, IndexError):
-                    pass
-            elif "New employees created:" in line:
-                try:
-                    report["created"] = int(line.split(':')[1].strip())
-                except (ValueError, IndexError):
-                    pass
-            elif "Failed migrations:" in line:
-                try:
-                    report["failed"] = int(line.split(':')[1].strip())
-                except (ValueError, IndexError):
-                    pass
-        
-        if not success:
-            logger.error(f"Migration failed: {result.stderr}")
-            report["errors"].append(result.stderr)
+        report = await PortfolioOfficerMigrator(performed_by=current_user.id).run(resume=resume)
+        success = report["failed"] == 0 and not report["errors"]
         
         logger.info(f"Migration completed with status: {success}")
         
@@ -209,11 +172,10 @@ async def start_migration(
             report=report
         )
         
-    except subprocess.TimeoutExpired:
-        logger.error("Migration script timed out")
+    except RuntimeError as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Migration process timed out"
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
         )
     except Exception as e:
         logger.error(f"Error starting migration: {e}")
@@ -223,6 +185,23 @@ async def start_migration(
         )
 
 
+@router.get("/migrate-employees/jobs/{job_id}")
+async def get_migration_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get progress and result of a queued migration
+    """
+    job = await job_service.get_job_status(job_id)
+    if not job or job["job_type"] != "portfolio_officer_migration":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Migration job not found"
+        )
+    return job
+
+
 @router.get("/unmatched-names", response_model=List[UnmatchedNameResponse])
 async def get_unmatched_names(
     db: AsyncSession = Depends(get_db),
@@ -351,7 +330,7 @@ async def revert_migration(
         # Count assignments to be reverted
         assignment_count_query = await db.execute(
             select(func.count(ApplicationEmployeeAssignment.id)).where(
-                ApplicationEmployeeAssignment.notes.like('%Migrated from portfolio_officer_name%')
+                ApplicationEmployeeAssignment.notes.like(f'%{MIGRATION_NOTE_PREFIX}%')
             )
         )
         assignment_count = assignment_count_query.scalar()
@@ -359,7 +338,7 @@ async def revert_migration(
         # Deactivate assignments created during migration
         assignments_query = await db.execute(
             select(ApplicationEmployeeAssignment).where(
-                ApplicationEmployeeAssignment.notes.like('%Migrated from portfolio_officer_name%')
+                ApplicationEmployeeAssignment.notes.like(f'%{MIGRATION_NOTE_PREFIX}%')
             )
         )
         assignments = assignments_query.scalars().all()
@@ -379,6 +358,7 @@ async def revert_migration(
             app.portfolio_officer_migrated = False
         
         await db.commit()
+        await clear_checkpoint()
         
         logger.warning(
             f"Migration reverted by admin {current_user.id}: "
@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_, or_, desc, func, case
+from sqlalchemy import and_, desc, func, case
 from sqlalchemy.orm import selectinload, joinedload
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 from datetime import datetime, date, timezone, timedelta
 
 from app.database import get_db
-from app.models import CustomerApplication, User, Department, Branch
+from app.models import CustomerApplication, User, Department, Branch, File
 from app.schemas import (
     CustomerApplicationCreate,
     CustomerApplicationUpdate,
@@ -24,10 +24,16 @@ from app.workflow import WorkflowValidator, WorkflowStatus
 from app.routers.auth import get_current_user
 
 from app.services.minio_service import minio_service
+from app.services.file_preview_service import get_variant_urls
+from app.services.application_search_service import apply_application_search, application_list_order
 
 DEFAULT_MINIO_URL_EXPIRES = 3600  # 1 hour
 
-def enrich_documents_with_minio_urls(documents: Optional[List[Dict[str, Any]]], expires: int = DEFAULT_MINIO_URL_EXPIRES) -> Optional[List[Dict[str, Any]]]:
+def enrich_documents_with_minio_urls(
+    documents: Optional[List[Dict[str, Any]]],
+    expires: int = DEFAULT_MINIO_URL_EXPIRES,
+    preview_variants: Optional[Dict[str, Dict[str, str]]] = None
+) -> Optional[List[Dict[str, Any]]]:
     import logging
     logger = logging.getLogger(__name__)
 
@@ -63,6 +69,18 @@ def enrich_documents_with_minio_urls(documents: Optional[List[Dict[str, Any]]],
             doc["url"] = None
             doc["expires_at"] = None
 
+        # Previews are generated per uploaded file and recorded on File.preview_variants
+        variants = (preview_variants or {}).get(object_name) if object_name else None
+        if variants:
+            try:
+                doc.update(get_variant_urls(variants, expires))
+                success_count += 1
+            except Exception as e:
+                logger.error(f"Failed to generate MinIO preview URLs for object {object_name}: {str(e)}")
+                doc["preview_url"] = None
+                error_count += 1
+            continue
+
         preview_object_name = doc.get("preview_object_name") or doc.get("thumbnail_object_name") or doc.get("thumbnail")
         logger.info(f"Processing preview for document {i+1}: preview_object_name={preview_object_name}")
 
@@ -83,7 +101,26 @@ def enrich_documents_with_minio_urls(documents: Optional[List[Dict[str, Any]]],
     logger.info(f"Document enrichment completed: {success_count} successes, {error_count} errors")
     return documents
 
-def enrich_application_response(app_data: Any, expires: int = DEFAULT_MINIO_URL_EXPIRES):
+def _application_documents(app_data: Any) -> Optional[List[Dict[str, Any]]]:
+    if isinstance(app_data, dict):
+        return app_data.get("documents")
+    return getattr(app_data, "documents", None)
+
+
+async def load_document_preview_variants(db: AsyncSession, documents: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+    """Preview variants of the uploaded files behind the documents, keyed by object_name"""
+    object_names = {doc.get("object_name") for doc in documents if isinstance(doc, dict) and doc.get("object_name")}
+    if not object_names:
+        return {}
+
+    result = await db.execute(
+        select(File.file_path, File.preview_variants)
+        .where(File.file_path.in_(object_names), File.preview_variants.isnot(None))
+    )
+    return {file_path: variants for file_path, variants in result.all() if variants}
+
+
+async def enrich_application_response(app_data: Any, db: Optional[AsyncSession] = None, expires: int = DEFAULT_MINIO_URL_EXPIRES):
     import logging
     logger = logging.getLogger(__name__)
 
@@ -91,21 +128,26 @@ def enrich_application_response(app_data: Any, expires: int = DEFAULT_MINIO_URL_
 
     try:
         # app_data can be a dict, pydantic model, or list thereof
+        items = app_data if isinstance(app_data, list) else [app_data]
         if isinstance(app_data, list):
             logger.info(f"Enriching list of {len(app_data)} applications")
-            for item in app_data:
-                enrich_application_response(item, expires)
-            return app_data
-
-        if hasattr(app_data, "documents"):
-            docs = getattr(app_data, "documents", None)
-            logger.info(f"Enriching documents for application object, docs count: {len(docs) if docs else 0}")
-            enriched = enrich_documents_with_minio_urls(docs, expires)
-            setattr(app_data, "documents", enriched)
-        elif isinstance(app_data, dict) and "documents" in app_data:
-            docs = app_data.get("documents")
-            logger.info(f"Enriching documents for application dict, docs count: {len(docs) if docs else 0}")
-            app_data["documents"] = enrich_documents_with_minio_urls(docs, expires)
+
+        # One lookup of preview variants for every document in the response
+        preview_variants: Dict[str, Dict[str, str]] = {}
+        if db is not None:
+            documents = [doc for item in items for doc in (_application_documents(item) or [])]
+            preview_variants = await load_document_preview_variants(db, documents)
+
+        for item in items:
+            if hasattr(item, "documents"):
+                docs = getattr(item, "documents", None)
+                logger.info(f"Enriching documents for application object, docs count: {len(docs) if docs else 0}")
+                enriched = enrich_documents_with_minio_urls(docs, expires, preview_variants)
+                setattr(item, "documents", enriched)
+            elif isinstance(item, dict) and "documents" in item:
+                docs = item.get("documents")
+                logger.info(f"Enriching documents for application dict, docs count: {len(docs) if docs else 0}")
+                item["documents"] = enrich_documents_with_minio_urls(docs, expires, preview_variants)
 
         logger.info("Successfully enriched application response with MinIO URLs")
         return app_data
@@ -279,7 +321,7 @@ async def create_application(
         resp = CustomerApplicationResponse.from_orm(db_application)
 
         logger.info(f"Enriching application {db_application.id} response with MinIO URLs")
-        enrich_application_response(resp)
+        await enrich_application_response(resp, db)
 
         logger.info(f"Successfully created application {db_application.id} for user {current_user.id}")
         return resp
@@ -405,17 +447,7 @@ async def list_applications(
     if priority_level:
         query = query.where(CustomerApplication.priority_level == priority_level)
     
-    if search:
-        search_term = f"%{search}%"
-        query = query.where(
-            or_(
-                CustomerApplication.full_name_khmer.ilike(search_term),
-                CustomerApplication.full_name_latin.ilike(search_term),
-                CustomerApplication.id_number.ilike(search_term),
-                CustomerApplication.phone.ilike(search_term),
-                CustomerApplication.portfolio_officer_name.ilike(search_term)
-            )
-        )
+    query, search_rank = apply_application_search(query, search)
     
     # Count total - optimized to avoid subquery
     count_query = query.with_only_columns(func.count(CustomerApplication.id))
@@ -424,20 +456,21 @@ async def list_applications(
     
     # Apply pagination and ordering
     offset = (page - 1) * size
-    query = query.order_by(
-        desc(CustomerApplication.priority_level == 'urgent'),
-        desc(CustomerApplication.priority_level == 'high'),
-        desc(CustomerApplication.created_at)
-    ).offset(offset).limit(size)
+    if search_rank is not None:
+        # Best matches first when searching
+        query = query.order_by(desc(search_rank), desc(CustomerApplication.created_at))
+    else:
+        query = query.order_by(*application_list_order())
+    query = query.offset(offset).limit(size)
     
     result = await db.execute(query)
     applications = result.scalars().all()
     
+    items = [CustomerApplicationResponse.from_orm(app) for app in applications]
+    await enrich_application_response(items, db)
+
     return PaginatedResponse(
-        items=[
-            enrich_application_response(CustomerApplicationResponse.from_orm(app))
-            for app in applications
-        ],
+        items=items,
         total=total,
         page=page,
         size=size,
@@ -483,17 +516,7 @@ async def get_customer_cards(
     if loan_status:
         query = query.where(CustomerApplication.loan_status == loan_status)
     
-    if search:
-        search_term = f"%{search}%"
-        query = query.where(
-            or_(
-                CustomerApplication.full_name_khmer.ilike(search_term),
-                CustomerApplication.full_name_latin.ilike(search_term),
-                CustomerApplication.id_number.ilike(search_term),
-                CustomerApplication.phone.ilike(search_term),
-                CustomerApplication.portfolio_officer_name.ilike(search_term)
-            )
-        )
+    query, search_rank = apply_application_search(query, search)
     
     # Count total - optimized to avoid subquery
     count_query = query.with_only_columns(func.count(CustomerApplication.id))
@@ -502,11 +525,12 @@ async def get_customer_cards(
     
     # Apply pagination and ordering
     offset = (page - 1) * size
-    query = query.order_by(
-        desc(CustomerApplication.priority_level == 'urgent'),
-        desc(CustomerApplication.priority_level == 'high'),
-        desc(CustomerApplication.created_at)
-    ).offset(offset).limit(size)
+    if search_rank is not None:
+        # Best matches first when searching
+        query = query.order_by(desc(search_rank), desc(CustomerApplication.created_at))
+    else:
+        query = query.order_by(*application_list_order())
+    query = query.offset(offset).limit(size)
     
     result = await db.execute(query)
     applications = result.scalars().all()
@@ -606,7 +630,7 @@ async def get_application(
     #             )
     
     resp = CustomerApplicationResponse.from_orm(application)
-    enrich_application_response(resp)
+    await enrich_application_response(resp, db)
     return resp
 
 @router.put("/{application_id}", response_model=CustomerApplicationResponse)
@@ -780,7 +804,7 @@ async def update_application(
         await db.commit()
         await db.refresh(application, ['employee_assignments'])
         resp = CustomerApplicationResponse.from_orm(application)
-        enrich_application_response(resp)
+        await enrich_application_response(resp, db)
         return resp
         
     except HTTPException:
@@ -933,7 +957,7 @@ async def submit_application(
         resp = CustomerApplicationResponse.from_orm(application)
 
         logger.info(f"Enriching application {application_id} response with MinIO URLs")
-        enrich_application_response(resp)
+        await enrich_application_response(resp, db)
 
         logger.info(f"Successfully completed submission for application {application_id}")
         return resp
@@ -999,7 +1023,7 @@ async def approve_application(
     await db.refresh(application)
     
     resp = CustomerApplicationResponse.from_orm(application)
-    enrich_application_response(resp)
+    await enrich_application_response(resp, db)
     return resp
 
 @router.patch("/{application_id}/reject", response_model=CustomerApplicationResponse)
@@ -1088,7 +1112,7 @@ async def get_application_relationships(
     branch_manager = branch.manager if branch else None
     
     app_resp = CustomerApplicationResponse.from_orm(application)
-    enrich_application_response(app_resp)
+    await enrich_application_response(app_resp, db)
     return {
         "application": app_resp,
         "officer": {
@@ -1392,6 +1416,48 @@ async def export_applications_csv(
     )
  
 
+@router.get("/{application_id}/documents.zip")
+async def download_application_documents_zip(
+    application_id: UUID,
+    folder_id: Optional[UUID] = Query(None, description="Only include this folder and its subfolders"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Download all documents of an application as a ZIP archive streamed from storage"""
+    from fastapi.responses import StreamingResponse
+    from app.services.document_archive_service import collect_archive_entries, stream_zip
+    
+    app_result = await db.execute(
+        select(CustomerApplication.id).where(CustomerApplication.id == application_id)
+    )
+    if app_result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Application not found"
+        )
+    
+    # if current_user.role not in ["admin", "manager"] and application.user_id != current_user.id:
+    #     raise HTTPException(
+    #         status_code=status.HTTP_403_FORBIDDEN,
+    #         detail="Not authorized to download these documents"
+    #     )
+    
+    try:
+        entries = await collect_archive_entries(db, application_id, folder_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    
+    # The stream only touches storage, so the request session can close normally
+    return StreamingResponse(
+        stream_zip(entries),
+        media_type='application/zip',
+        headers={'Content-Disposition': f'attachment; filename=application_{application_id}_documents.zip'}
+    )
+
+
 def _get_status_color(status: str, loan_status: Optional[str] = None) -> str:
     """Compute status color based on application and loan status"""
     if status == "rejected":
@@ -1567,7 +1633,7 @@ async def transition_workflow(
         
         # Return extended response
         response_data = CustomerApplicationResponse.from_orm(updated_application)
-        enrich_application_response(response_data)
+        await enrich_application_response(response_data, db)
         return ApplicationWorkflowResponse(
             **response_data.model_dump(),
             workflow_info=workflow_info,
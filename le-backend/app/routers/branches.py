@@ -10,6 +10,7 @@ from app.database import get_db
 from app.models import Branch, Department, User
 from app.schemas import BranchCreate, BranchUpdate, BranchResponse, PaginatedResponse
 from app.routers.auth import get_current_user
+from app.services.user_analytics_service import invalidate_organizational_metrics
 
 router = APIRouter()
 
@@ -47,6 +48,7 @@ async def create_branch(
 
         await db.flush()
         await db.commit()
+        await invalidate_organizational_metrics()
         await db.refresh(db_branch)
         return BranchResponse.from_orm(db_branch)
     except Exception as e:
@@ -234,6 +236,7 @@ async def update_branch(
         setattr(branch, field, value)
     
     await db.commit()
+    await invalidate_organizational_metrics()
     await db.refresh(branch)
     return BranchResponse.from_orm(branch)
 
@@ -256,6 +259,7 @@ async def delete_branch(
     
     await db.delete(branch)
     await db.commit()
+    await invalidate_organizational_metrics()
     
     return {"message": "Branch deleted successfully"}
 
@@ -286,6 +290,7 @@ async def toggle_branch_status(
     
     branch.is_active = not branch.is_active
     await db.commit()
+    await invalidate_organizational_metrics()
     await db.refresh(branch)
     
     status_text = "activated" if branch.is_active else "deactivated"
@@ -2,14 +2,14 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import func, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, joinedload
 from typing import List, Optional
 from uuid import UUID
 
 from app.database import get_db
 from app.models import User, CustomerApplication, File
 from app.schemas import PaginatedResponse, UserResponse, CustomerApplicationResponse
-from app.routers.auth import get_current_user
+from app.routers.auth import get_current_user, create_safe_user_response
 
 router = APIRouter()
 
@@ -21,85 +21,91 @@ async def get_customers(
     db: AsyncSession = Depends(get_db)
 ) -> PaginatedResponse:
     """Get all customers with file counts"""
-    # For this implementation, "customers" are Users who have at least one CustomerApplication
-    # Build a role-filtered subquery of distinct applicant user_ids
-    base_app_q = select(CustomerApplication.user_id).distinct()
+    # For this implementation, "customers" are Users who have at least one CustomerApplication.
+    # Membership is an EXISTS probe backed by ix_customer_applications_user_id.
+    has_applications = (
+        select(CustomerApplication.id)
+        .where(CustomerApplication.user_id == User.id)
+        .exists()
+    )
 
     # Role-based filtering on the applications and/or users
     # if current_user.role == "officer":
     #     # Officers only see applications they created
-    #     base_app_q = base_app_q.where(CustomerApplication.user_id == current_user.id)
-    # elif current_user.role == "manager":
-    #     # Managers see applicants within their department/branch
-    #     # Need to constrain by the User owning the application
-    #     # We'll use a correlated EXISTS by filtering Users later; here we keep app user_ids distinct
-    #     pass
+    #     has_applications = (
+    #         select(CustomerApplication.id)
+    #         .where(CustomerApplication.user_id == User.id)
+    #         .where(CustomerApplication.user_id == current_user.id)
+    #         .exists()
+    #     )
     # Admins: no restriction
 
-    # Build the users query from the filtered distinct applicant IDs with eager loading
-    users_q = select(User).options(
-        selectinload(User.department),
-        selectinload(User.branch),
-        selectinload(User.position)
-    ).where(User.id.in_(base_app_q.subquery()))
+    # Page of customer ids; the window count returns the total with the same scan
+    page_q = (
+        select(
+            User.id.label("id"),
+            User.created_at.label("created_at"),
+            func.count().over().label("total")
+        )
+        .where(has_applications)
+    )
 
     # if current_user.role == "manager":
     #     if current_user.department_id:
-    #         users_q = users_q.where(User.department_id == current_user.department_id)
+    #         page_q = page_q.where(User.department_id == current_user.department_id)
     #     elif current_user.branch_id:
-    #         users_q = users_q.where(User.branch_id == current_user.branch_id)
+    #         page_q = page_q.where(User.branch_id == current_user.branch_id)
 
-    # Order and paginate
-    users_q = users_q.order_by(desc(User.created_at)).offset((page - 1) * size).limit(size)
+    page_q = (
+        page_q.order_by(desc(User.created_at))
+        .offset((page - 1) * size)
+        .limit(size)
+        .subquery()
+    )
 
-    # Count total customers using the same filtered set
-    count_q = select(func.count()).select_from(
-        select(User.id).where(User.id.in_(base_app_q.subquery())).subquery()
+    # File counts are only computed for the customers on this page
+    file_count = (
+        select(func.count(File.id))
+        .join(CustomerApplication, File.application_id == CustomerApplication.id)
+        .where(CustomerApplication.user_id == User.id)
+        .correlate(User)
+        .scalar_subquery()
     )
-    # if current_user.role == "manager":
-    #     if current_user.department_id:
-    #         count_q = select(func.count()).select_from(
-    #             select(User.id)
-    #             .where(User.id.in_(base_app_q.subquery()))
-    #             .where(User.department_id == current_user.department_id)
-    #             .subquery()
-    #         )
-    #     elif current_user.branch_id:
-    #         count_q = select(func.count()).select_from(
-    #             select(User.id)
-    #             .where(User.id.in_(base_app_q.subquery()))
-    #             .where(User.branch_id == current_user.branch_id)
-    #             .subquery()
-    #         )
 
-    # Execute queries
-    result = await db.execute(users_q)
-    customers = result.scalars().all()
-    
-    count_result = await db.execute(count_q)
-    total = count_result.scalar_one() or 0
-    
-    # Get file counts for each customer
-    customer_file_counts = {}
-    for customer in customers:
-        # Count files associated with this customer's applications
-        file_count_query = (
-            select(func.count(File.id))
-            .join(CustomerApplication, File.application_id == CustomerApplication.id)
-            .where(CustomerApplication.user_id == customer.id)
+    # Single statement: users, relationships used by serialization, file counts and total
+    customers_q = (
+        select(User, file_count.label("file_count"), page_q.c.total)
+        .join(page_q, page_q.c.id == User.id)
+        .options(
+            joinedload(User.department),
+            joinedload(User.branch),
+            joinedload(User.position),
+            joinedload(User.portfolio),
+            joinedload(User.line_manager),
+            joinedload(User.status_changed_by_user),
         )
-        file_count_result = await db.execute(file_count_query)
-        file_count = file_count_result.scalar_one() or 0
-        customer_file_counts[str(customer.id)] = file_count
-    
-    # Prepare response - use safe serialization to avoid async context issues
+        .order_by(desc(page_q.c.created_at))
+    )
+
+    result = await db.execute(customers_q)
+    rows = result.unique().all()
+
+    if rows:
+        total = rows[0].total
+    elif page > 1:
+        # Past the last page the window count is unavailable; fall back to a plain count
+        count_result = await db.execute(
+            select(func.count()).select_from(User).where(has_applications)
+        )
+        total = count_result.scalar_one() or 0
+    else:
+        total = 0
+
+    # All relationships are already loaded, so serialization never lazy-loads
     customer_responses = []
-    for customer in customers:
-        # Use safe serialization to handle circular references and async context issues
-        from app.routers.auth import create_safe_user_response
-        customer_response = create_safe_user_response(customer, max_depth=1)
-        customer_dict = customer_response.model_dump()
-        customer_dict["file_count"] = customer_file_counts.get(str(customer.id), 0)
+    for customer, customer_file_count, _ in rows:
+        customer_dict = create_safe_user_response(customer, max_depth=1).model_dump()
+        customer_dict["file_count"] = customer_file_count or 0
         customer_responses.append(customer_dict)
     
     return PaginatedResponse(
@@ -149,16 +155,19 @@ async def get_customer_applications(
     applications_result = await db.execute(applications_query)
     applications = applications_result.scalars().all()
     
-    # Get file counts for each application and serialize properly
+    # Get file counts for all applications with one grouped query
+    file_counts = {}
+    if applications:
+        file_count_result = await db.execute(
+            select(File.application_id, func.count(File.id))
+            .where(File.application_id.in_([application.id for application in applications]))
+            .group_by(File.application_id)
+        )
+        file_counts = dict(file_count_result.all())
+    
     application_responses = []
     for application in applications:
-        # Count files for this application
-        file_count_query = (
-            select(func.count(File.id))
-            .where(File.application_id == application.id)
-        )
-        file_count_result = await db.execute(file_count_query)
-        file_count = file_count_result.scalar_one() or 0
+        file_count = file_counts.get(application.id, 0)
         
         # Use safe serialization to avoid async context issues
         try:
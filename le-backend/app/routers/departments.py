@@ -10,6 +10,7 @@ from app.database import get_db
 from app.models import Department, User
 from app.schemas import DepartmentCreate, DepartmentUpdate, DepartmentResponse, PaginatedResponse
 from app.routers.auth import get_current_user
+from app.services.user_analytics_service import invalidate_organizational_metrics
 
 router = APIRouter()
 
@@ -45,6 +46,7 @@ async def create_department(
 
         await db.flush()
         await db.commit()
+        await invalidate_organizational_metrics()
         await db.refresh(db_department)
         return DepartmentResponse.from_orm(db_department)
     except Exception as e:
@@ -247,6 +249,7 @@ async def update_department(
         setattr(department, field, value)
     
     await db.commit()
+    await invalidate_organizational_metrics()
     await db.refresh(department)
     return DepartmentResponse.from_orm(department)
 
@@ -269,6 +272,7 @@ async def delete_department(
     
     await db.delete(department)
     await db.commit()
+    await invalidate_organizational_metrics()
     
     return {"message": "Department deleted successfully"}
 
@@ -299,6 +303,7 @@ async def toggle_department_status(
     
     department.is_active = not department.is_active
     await db.commit()
+    await invalidate_organizational_metrics()
     await db.refresh(department)
     
     status_text = "activated" if department.is_active else "deactivated"
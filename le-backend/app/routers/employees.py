@@ -50,6 +50,7 @@ async def filter_by_branch(query, current_user: User, model_class):
 @router.get("/next-code", response_model=NextCodeResponse)
 async def get_next_employee_code(
     pattern: Optional[str] = Query(None, description="Code pattern to follow"),
+    prefix: Optional[str] = Query(None, max_length=20, description="Code family to follow, e.g. 'EMP-2025-'"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -62,7 +63,7 @@ async def get_next_employee_code(
     Requires: Authentication (any authenticated user)
     """
     try:
-        result = await EmployeeService.get_next_available_code(db, pattern)
+        result = await EmployeeService.get_next_available_code(db, pattern, prefix)
         logger.debug(f"Next employee code requested by user {current_user.id}: {result['code']}")
         return result
     except Exception as e:
@@ -116,7 +117,8 @@ async def generate_employee_codes(
         codes = await EmployeeService.generate_code_batch(
             db=db,
             count=request.count,
-            pattern=request.pattern
+            pattern=request.pattern,
+            prefix=request.prefix
         )
         
         logger.info(f"Generated {len(codes)} employee codes for user {current_user.id}")
@@ -124,7 +126,7 @@ async def generate_employee_codes(
         return {
             "codes": codes,
             "count": len(codes),
-            "expires_at": None  # Could implement reservation system in future
+            "expires_at": None  # Reserved codes are never reissued, so they don't expire
         }
     except HTTPException:
         raise
@@ -136,6 +138,37 @@ async def generate_employee_codes(
         )
 
 
+@router.post("/code-sequences/rebuild")
+async def rebuild_employee_code_sequences(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Rebuild the employee code counters from existing codes.
+    
+    Repairs counters after codes were imported or edited outside the API.
+    Counters never move backwards, so reserved codes are not reissued.
+    
+    Requires: admin role
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can rebuild employee code sequences"
+        )
+    
+    try:
+        families = await EmployeeService.rebuild_code_sequences(db)
+        logger.info(f"Employee code sequences rebuilt by user {current_user.id}: {families} families")
+        return {"code_families": families}
+    except Exception as e:
+        logger.error(f"Error rebuilding employee code sequences: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to rebuild employee code sequences"
+        )
+
+
 # ==================== EMPLOYEE CRUD ENDPOINTS ====================
 
 @router.post("/", response_model=EmployeeResponse, status_code=status.HTTP_201_CREATED)
@@ -848,57 +881,22 @@ async def get_workload_summary(
     """
     
     try:
-        # Build query for employees
-        employee_query = select(Employee).options(
-            selectinload(Employee.department),
-            selectinload(Employee.branch)
-        ).where(Employee.is_active == True)
-        
-        # Apply filters
-        if department_id:
-            employee_query = employee_query.where(Employee.department_id == department_id)
-        
-        if branch_id:
-            employee_query = employee_query.where(Employee.branch_id == branch_id)
-        elif current_user.role != "admin" and current_user.branch_id:
+        scope_branch_id = branch_id
+        if not scope_branch_id and current_user.role != "admin" and current_user.branch_id:
             # Non-admin users only see employees from their branch
-            employee_query = employee_query.where(Employee.branch_id == current_user.branch_id)
+            scope_branch_id = current_user.branch_id
         
-        # Get employees
-        employee_result = await db.execute(employee_query)
-        employees = employee_result.scalars().all()
-        
-        # Get workload for each employee
-        workload_summary = []
-        for employee in employees:
-            workload = await EmployeeService.get_employee_workload(
-                db=db,
-                employee_id=employee.id,
-                status_filter=status_filter,
-                date_from=date_from,
-                date_to=date_to
-            )
-            
-            workload_summary.append({
-                "employee_id": employee.id,
-                "employee_code": employee.employee_code,
-                "full_name_khmer": employee.full_name_khmer,
-                "full_name_latin": employee.full_name_latin,
-                "position": employee.position,
-                "department": {
-                    "id": employee.department.id,
-                    "name": employee.department.name
-                } if employee.department else None,
-                "branch": {
-                    "id": employee.branch.id,
-                    "name": employee.branch.name
-                } if employee.branch else None,
-                "workload": workload
-            })
+        workload = await EmployeeService.get_workload_summary(
+            db=db,
+            department_id=department_id,
+            branch_id=scope_branch_id,
+            status_filter=status_filter,
+            date_from=date_from,
+            date_to=date_to
+        )
         
         return {
-            "summary": workload_summary,
-            "total_employees": len(employees),
+            **workload,
             "filters": {
                 "department_id": str(department_id) if department_id else None,
                 "branch_id": str(branch_id) if branch_id else None,
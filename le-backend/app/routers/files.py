@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, UploadFile, File, Form
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import desc, func
@@ -13,9 +13,20 @@ from app.models import File as FileModel, User, CustomerApplication, Folder
 from app.schemas import FileCreate, FileResponse, PaginatedResponse, FileFinalize
 from app.routers.auth import get_current_user
 from app.services.minio_service import minio_service
+from app.services.file_dedup_service import (
+    compute_content_hash,
+    delete_file_record,
+    find_reusable_file
+)
+from app.services.file_preview_service import (
+    generate_file_previews,
+    get_preview_urls,
+    is_previewable
+)
 from app.services.folder_service import (
     get_or_create_application_folder_structure,
     get_folder_for_document_type,
+    invalidate_application_folder_cache,
     FolderOrganizationConfig
 )
 from app.services.parameter_validation_service import UploadParameterValidator, ParameterLogger
@@ -32,18 +43,24 @@ def _populate_file_urls(file: FileModel, expires_in: int = 3600) -> FileResponse
     if minio_service.enabled:
         try:
             response.url = minio_service.get_file_url(file.file_path, expires=expires_in)
-            # TODO: Implement thumbnail generation and separate preview URL
-            response.preview_url = response.url  # For now, preview is same as full download
+            # Use generated WebP previews when available, otherwise the original
+            previews = get_preview_urls(file, expires_in)
+            response.preview_url = previews.get("preview_url", response.url)
+            response.thumbnail_url = previews.get("thumbnail_url")
+            response.srcset = previews.get("srcset")
             response.expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
         except Exception as e:
             logger.error(f"Failed to generate MinIO URL for file {file.id}: {e}")
             response.url = None
             response.preview_url = None
+            response.thumbnail_url = None
+            response.srcset = None
             response.expires_at = None
     return response
 
 @router.post("/upload", response_model=FileResponse)
 async def upload_file(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(),
     # Form data parameters (primary)
     application_id: Optional[str] = Form(None),
@@ -296,6 +313,10 @@ async def upload_file(
                 detail="File appears to be corrupted or is not a valid image file. Please select a different file."
             )
     
+    # Identical content already stored for this application is reused instead of written again
+    content_hash = await compute_content_hash(content)
+    existing_file = await find_reusable_file(db, content_hash, application_uuid, current_user.id)
+    
     # Build storage prefix for logical organization
     storage_prefix = None
     if application_uuid is not None:
@@ -318,17 +339,24 @@ async def upload_file(
     )
     
     try:
-        object_name = minio_service.upload_file(
-            file_content=content,
-            original_filename=sanitized_filename,
-            content_type=file.content_type or "application/octet-stream",
-            prefix=storage_prefix,
-            field_name=validated_params.field_name
-        )
-        logger.info(
-            f"File uploaded to MinIO successfully [correlation_id: {correlation_id}]: "
-            f"object_name={object_name}"
-        )
+        if existing_file:
+            object_name = existing_file.file_path
+            logger.info(
+                f"Reusing stored object for identical content [correlation_id: {correlation_id}]: "
+                f"object_name={object_name}, content_hash={content_hash}"
+            )
+        else:
+            object_name = minio_service.upload_file(
+                file_content=content,
+                original_filename=sanitized_filename,
+                content_type=file.content_type or "application/octet-stream",
+                prefix=storage_prefix,
+                field_name=validated_params.field_name
+            )
+            logger.info(
+                f"File uploaded to MinIO successfully [correlation_id: {correlation_id}]: "
+                f"object_name={object_name}"
+            )
     except Exception as e:
         logger.error(
             f"Failed to upload file to MinIO [correlation_id: {correlation_id}]: "
@@ -350,7 +378,9 @@ async def upload_file(
             mime_type=file.content_type or "application/octet-stream",
             uploaded_by=current_user.id,
             application_id=application_uuid,
-            folder_id=folder_uuid
+            folder_id=folder_uuid,
+            content_hash=content_hash,
+            preview_variants=existing_file.preview_variants if existing_file else None
         )
         
         # Debug logging to verify file record creation
@@ -371,6 +401,7 @@ async def upload_file(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to save file record: {str(e)}"
             )
+        await invalidate_application_folder_cache(application_uuid)
         
         logger.info(
             f"File record created successfully [correlation_id: {correlation_id}]: "
@@ -385,8 +416,10 @@ async def upload_file(
         )
         
         # If database operation fails, try to clean up the uploaded file
+        # (a reused object still belongs to the other file records)
         try:
-            minio_service.delete_file(object_name)
+            if not existing_file:
+                minio_service.delete_file(object_name)
             logger.info(f"Successfully cleaned up MinIO file after database error [correlation_id: {correlation_id}]: {object_name}")
         except Exception as cleanup_error:
             logger.error(f"Failed to cleanup MinIO file after database error [correlation_id: {correlation_id}]: {cleanup_error}")
@@ -396,6 +429,10 @@ async def upload_file(
             detail=f"Failed to save file record: {str(e)}"
         )
     
+    # Preview variants are generated after the response is sent
+    if is_previewable(db_file.mime_type) and not db_file.preview_variants:
+        background_tasks.add_task(generate_file_previews, db_file.id, object_name)
+    
     # Log final success and parameter verification
     logger.info(
         f"File upload completed successfully [correlation_id: {correlation_id}]: "
@@ -457,6 +494,7 @@ async def create_upload_url(
 @router.post("/finalize", response_model=FileResponse)
 async def finalize_uploaded_file(
     payload: FileFinalize,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ) -> FileResponse:
@@ -502,6 +540,9 @@ async def finalize_uploaded_file(
         await db.flush()
         await db.commit()
         await db.refresh(db_file)
+        await invalidate_application_folder_cache(db_file.application_id)
+        if is_previewable(db_file.mime_type):
+            background_tasks.add_task(generate_file_previews, db_file.id, db_file.file_path)
         return FileResponse.from_orm(db_file)
     except Exception as e:
         await db.rollback()
@@ -608,16 +649,10 @@ async def delete_file(
     #         detail="Not authorized to delete this file"
     #     )
     
-    # Delete from MinIO
-    try:
-        minio_service.delete_file(file.file_path)
-        logger.info(f"Successfully deleted file from MinIO: {file.file_path}")
-    except Exception as e:
-        # Log error but don't fail the request
-        logger.error(f"Error deleting file from MinIO: {e}, file_path: {file.file_path}")
-    
-    await db.delete(file)
-    await db.commit()
+    # Delete the record; the stored object goes with the last reference to it
+    application_id = file.application_id
+    await delete_file_record(db, file)
+    await invalidate_application_folder_cache(application_id)
     
     return {"message": "File deleted successfully"}
 
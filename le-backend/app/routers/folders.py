@@ -15,7 +15,8 @@ from app.services.folder_service import (
     get_folder_for_document_type,
     FolderOrganizationConfig,
     DocumentType,
-    EnhancedFolderService
+    EnhancedFolderService,
+    invalidate_application_folder_cache
 )
 from app.core.logging import get_logger
 
@@ -398,6 +399,7 @@ async def create_folder(
         db.add(new_folder)
         await db.commit()
         await db.refresh(new_folder)
+        await invalidate_application_folder_cache(new_folder.application_id)
         
         logger.info(f"Created new folder: {new_folder.name} for application {folder_data.application_id}")
         
@@ -452,6 +454,7 @@ async def update_folder(
         
         await db.commit()
         await db.refresh(folder)
+        await invalidate_application_folder_cache(folder.application_id)
         
         logger.info(f"Updated folder: {folder.name}")
         
@@ -510,6 +513,7 @@ async def delete_folder(
     try:
         await db.delete(folder)
         await db.commit()
+        await invalidate_application_folder_cache(folder.application_id)
         
         logger.info(f"Deleted folder: {folder.name}")
         
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from app import models, schemas
 from app.database import get_db
+from app.services.user_analytics_service import invalidate_organizational_metrics
 
 router = APIRouter()
 
@@ -20,6 +21,7 @@ async def create_position(
     db.add(db_position)
     try:
         await db.commit()
+        await invalidate_organizational_metrics()
     except IntegrityError as e:
         await db.rollback()
         # Unique constraint on name -> conflict
@@ -131,6 +133,7 @@ async def update_position(
 
     try:
         await db.commit()
+        await invalidate_organizational_metrics()
     except IntegrityError:
         await db.rollback()
         raise HTTPException(
@@ -151,6 +154,7 @@ async def delete_position(position_id: UUID, db: AsyncSession = Depends(get_db))
     await db.delete(db_position)
     try:
         await db.commit()
+        await invalidate_organizational_metrics()
     except IntegrityError:
         await db.rollback()
         # Likely FK constraint from users.position_id
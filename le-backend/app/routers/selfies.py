@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import desc, func, and_
@@ -18,12 +19,23 @@ from app.schemas import (
 )
 from app.routers.auth import get_current_user
 from app.services.minio_service import minio_service
+from app.services.selfie_processing_service import process_selfie, selfie_thumbnail_path
 from app.core.config import settings
 
 router = APIRouter()
 
+def _upload_size(upload: UploadFile) -> int:
+    """Size of a spooled upload without reading it"""
+    if upload.size is not None:
+        return upload.size
+    upload.file.seek(0, os.SEEK_END)
+    size = upload.file.tell()
+    upload.file.seek(0)
+    return size
+
 @router.post("/upload")
 async def upload_selfie(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     application_id: str = Form(...),
     selfie_type: str = Form(...),
@@ -56,9 +68,8 @@ async def upload_selfie(
     # Check if application exists and user has access
     try:
         app_id = UUID(application_id)
-        app_query = await db.execute(select(CustomerApplication).where(CustomerApplication.id == app_id))
-        application = app_query.scalar_one_or_none()
-        if not application:
+        app_query = await db.execute(select(CustomerApplication.id).where(CustomerApplication.id == app_id))
+        if app_query.scalar_one_or_none() is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Application not found"
@@ -76,12 +87,10 @@ async def upload_selfie(
     #         detail="Not authorized to upload selfies for this application"
     #     )
     
-    # Read file content
-    content = await file.read()
-    
     # Enforce max file size for images (typically larger than documents)
     max_image_size = getattr(settings, 'MAX_IMAGE_SIZE', 10 * 1024 * 1024)  # 10MB default
-    if len(content) > max_image_size:
+    file_size = _upload_size(file)
+    if file_size > max_image_size:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             detail=f"Image too large. Maximum size: {max_image_size // (1024*1024)}MB"
@@ -90,40 +99,38 @@ async def upload_selfie(
     # Create storage prefix for selfies
     storage_prefix = f"applications/{application_id}/selfies/{selfie_type}"
     
-    # Upload to MinIO
-    object_name = minio_service.upload_file(
-        file_content=content,
+    # Stream the spooled upload to MinIO without loading it into memory
+    object_name = await run_in_threadpool(
+        minio_service.upload_stream,
+        data=file.file,
+        length=file_size,
         original_filename=file.filename,
         content_type=file.content_type,
         prefix=storage_prefix,
         field_name=f"selfie_{selfie_type}"
     )
     
-    # Create file record
+    # Create file and selfie records; ids and timestamps are set here so both
+    # rows go out in a single flush without refreshing them afterwards
+    now = datetime.now(timezone.utc)
     db_file = FileModel(
+        id=uuid.uuid4(),
         filename=os.path.basename(object_name),
         original_filename=file.filename,
         file_path=object_name,
-        file_size=len(content),
+        file_size=file_size,
         mime_type=file.content_type,
         uploaded_by=current_user.id,
-        application_id=app_id
+        application_id=app_id,
+        created_at=now
     )
     
-    db.add(db_file)
-
-    
-    await db.flush()
-
-    
-    await db.refresh(db_file)
-    await db.refresh(db_file)
-    
-    # Create selfie record with metadata
     db_selfie = Selfie(
+        id=uuid.uuid4(),
         application_id=app_id,
         file_id=db_file.id,
         selfie_type=selfie_type,
+        captured_at=now,
         captured_by_user_id=current_user.id,
         customer_id_number=customer_id_number,
         customer_name=customer_name,
@@ -131,17 +138,21 @@ async def upload_selfie(
         location_longitude=location_longitude,
         location_address=location_address,
         notes=notes,
-        status='pending_validation'
+        status='pending_validation',
+        created_at=now
     )
     
-    db.add(db_selfie)
-
-    
-    await db.flush()
-
+    db.add_all([db_file, db_selfie])
+    try:
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        # Don't leave an orphaned object behind
+        await run_in_threadpool(minio_service.delete_file, object_name)
+        raise
     
-    await db.refresh(db_selfie)
-    await db.refresh(db_selfie)
+    # Thumbnail and quality scoring run after the response is sent
+    background_tasks.add_task(process_selfie, db_selfie.id, object_name)
     
     # Return response
     return {
@@ -375,6 +386,7 @@ async def delete_selfie(
         if file_obj:
             try:
                 minio_service.delete_file(file_obj.file_path)
+                minio_service.delete_file(selfie_thumbnail_path(file_obj.file_path))
             except Exception as e:
                 # Log the error but don't fail the request
                 print(f"Warning: Failed to delete file from MinIO: {e}")
@@ -2738,7 +2738,7 @@ async def upload_profile_photo(
             )
         
         # Optimize image - create multiple sizes in WebP format
-        optimized_images = image_optimization_service.optimize_profile_photo(
+        optimized_images = await image_optimization_service.optimize_profile_photo_async(
             file_content, 
             output_format='webp'
         )
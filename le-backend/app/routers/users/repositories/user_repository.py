@@ -11,17 +11,24 @@ from uuid import UUID
 from datetime import datetime, timezone, date, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_, or_, func, desc, text
-from sqlalchemy.orm import selectinload, noload
+from sqlalchemy import and_, or_, func, desc, text, update, literal, any_
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.orm import selectinload, joinedload, noload
 
 from app.models import User, Department, Branch, Position, BulkOperation, Employee
+from app.models.audit import AuditEventType
+from app.core.user_status import get_allowed_transitions
+from app.services.audit_service import AuditService
 from app.routers.users.utils.user_exceptions import (
     UserNotFoundError,
     UserAlreadyExistsError,
-    DatabaseOperationError
+    DatabaseOperationError,
+    PartialBulkUpdateError
 )
 from app.routers.users.services.user_error_handler import user_error_handler
 
+# Users updated per statement by bulk_update_status
+BULK_STATUS_CHUNK_SIZE = 1000
 
 class UserRepository:
     """Repository class for user data access operations."""
@@ -625,12 +632,12 @@ class UserRepository:
         try:
             threshold_date = datetime.now(timezone.utc) - timedelta(days=inactive_days)
 
+            # Only department and branch are read by callers; joined in the same query
             query = (
                 select(User)
                 .options(
-                    selectinload(User.department),
-                    selectinload(User.branch),
-                    selectinload(User.position)
+                    joinedload(User.department),
+                    joinedload(User.branch)
                 )
                 .where(
                     and_(
@@ -818,10 +825,17 @@ class UserRepository:
         new_status: str,
         reason: str,
         changed_by: UUID
-    ) -> Tuple[List[UUID], List[Dict[str, Any]]]:
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         """
         Bulk update user status.
 
+        Users are updated set-based, BULK_STATUS_CHUNK_SIZE per statement:
+        UPDATE ... WHERE id = ANY(:ids) AND is_deleted = false RETURNING the
+        id and previous status, with one batched audit insert per chunk. Ids
+        not returned (missing or deleted users) are reported as failed.
+        Each chunk is committed on its own, so a failure can leave earlier
+        chunks applied; that case raises PartialBulkUpdateError.
+
         Args:
             user_ids: List of user IDs to update
             new_status: New status to set
@@ -830,49 +844,100 @@ class UserRepository:
 
         Returns:
             Tuple of (successful_updates, failed_updates)
+
+        Raises:
+            PartialBulkUpdateError: If a chunk failed after others were committed;
+                carries the committed updates and the ids never processed
+            DatabaseOperationError: If the update failed before anything was committed
         """
+        successful_updates = []
+        unique_ids = list(dict.fromkeys(user_ids))
+        start = 0
         try:
-            successful_updates = []
-            failed_updates = []
-
-            # Get users to update
-            result = await self.db.execute(
-                select(User).where(User.id.in_(user_ids), User.is_deleted == False)
-            )
-            users = result.scalars().all()
-
-            if len(users) != len(user_ids):
-                found_ids = {user.id for user in users}
-                missing_ids = set(user_ids) - found_ids
-                for user_id in missing_ids:
-                    failed_updates.append({
-                        "user_id": str(user_id),
-                        "error": "User not found"
-                    })
-
             now = datetime.now(timezone.utc)
+            allowed_transitions = get_allowed_transitions(new_status)
+            audit_service = AuditService(self.db)
+
+            for start in range(0, len(unique_ids), BULK_STATUS_CHUNK_SIZE):
+                chunk = unique_ids[start:start + BULK_STATUS_CHUNK_SIZE]
+
+                # Lock the targets and keep their current status for the response
+                previous = (
+                    select(User.id, User.status)
+                    .where(
+                        User.id == any_(literal(chunk, ARRAY(PG_UUID(as_uuid=True)))),
+                        User.is_deleted == False
+                    )
+                    .with_for_update()
+                    .cte("previous_status")
+                )
+                result = await self.db.execute(
+                    update(User)
+                    .where(User.id == previous.c.id)
+                    .values(
+                        status=new_status,
+                        status_reason=reason,
+                        status_changed_at=now,
+                        status_changed_by=changed_by
+                    )
+                    .returning(User.id, previous.c.status.label("old_status"))
+                    .execution_options(synchronize_session=False)
+                )
+                updated = result.all()
+
+                await audit_service.log_events_batch(
+                    event_type=AuditEventType.UPDATE,
+                    action="user_status_change",
+                    entity_type="user",
+                    entries=[
+                        {
+                            "entity_id": row.id,
+                            "details": {
+                                "old_status": row.old_status,
+                                "new_status": new_status,
+                                "reason": reason,
+                                "bulk": True
+                            }
+                        }
+                        for row in updated
+                    ],
+                    user_id=str(changed_by)
+                )
+                await self.db.commit()
+
+                successful_updates.extend(
+                    {
+                        "user_id": row.id,
+                        "old_status": row.old_status,
+                        "new_status": new_status,
+                        "reason": reason,
+                        "changed_by": changed_by,
+                        "changed_at": now,
+                        "allowed_transitions": allowed_transitions
+                    }
+                    for row in updated
+                )
 
-            # Update each user
-            for user in users:
-                try:
-                    old_status = user.status
-                    user.status = new_status
-                    user.status_reason = reason
-                    user.status_changed_at = now
-                    user.status_changed_by = changed_by
-
-                    successful_updates.append(user.id)
-                except Exception as e:
-                    failed_updates.append({
-                        "user_id": str(user.id),
-                        "username": user.username,
-                        "error": str(e)
-                    })
+            updated_ids = {change["user_id"] for change in successful_updates}
+            failed_updates = [
+                {
+                    "user_id": str(user_id),
+                    "error": "User not found"
+                }
+                for user_id in unique_ids
+                if user_id not in updated_ids
+            ]
 
-            await self.db.commit()
             return successful_updates, failed_updates
         except Exception as e:
             await self.db.rollback()
+            if successful_updates:
+                raise PartialBulkUpdateError(
+                    operation="bulk_update_status",
+                    reason=f"Failed to bulk update user status: {str(e)}",
+                    successful_updates=successful_updates,
+                    unprocessed_ids=unique_ids[start:]
+                )
             raise DatabaseOperationError(
                 operation="bulk_update_status",
                 reason=f"Failed to bulk update user status: {str(e)}"
@@ -29,9 +29,13 @@ from app.routers.users.utils.user_exceptions import (
     UserRestoreError,
     BulkOperationError,
     DatabaseOperationError,
+    PartialBulkUpdateError,
     UserBranchAssignmentError
 )
 from app.core.user_status import UserStatus, can_transition_status, get_allowed_transitions
+from app.services.activity_management_service import ActivityManagementService
+from app.services.cache_service import cache_service
+from app.services.user_cache_service import UserCacheService
 
 
 class UserService:
@@ -85,6 +89,7 @@ class UserService:
 
                 # Commit the transaction to ensure user is persisted
                 await self.db.commit()
+                await UserCacheService(self.db).invalidate_user_cache(user.id)
 
                 return user
 
@@ -162,6 +167,7 @@ class UserService:
 
                 # Update user through repository
                 updated_user = await self.repository.update(user_id, update_data)
+                await UserCacheService(self.db).invalidate_user_cache(user_id)
 
                 return updated_user
 
@@ -192,9 +198,11 @@ class UserService:
         async with self.error_handler.handle_operation("delete_user", db_session=self.db):
             try:
                 if permanent:
-                    return await self.repository.permanent_delete(user_id)
+                    deleted = await self.repository.permanent_delete(user_id)
                 else:
-                    return await self.repository.soft_delete(user_id, deleted_by)
+                    deleted = await self.repository.soft_delete(user_id, deleted_by)
+                await UserCacheService(self.db).invalidate_user_cache(user_id)
+                return deleted
 
             except (UserNotFoundError, DatabaseOperationError):
                 raise
@@ -220,7 +228,9 @@ class UserService:
         """
         async with self.error_handler.handle_operation("restore_user", db_session=self.db):
             try:
-                return await self.repository.restore(user_id)
+                restored = await self.repository.restore(user_id)
+                await UserCacheService(self.db).invalidate_user_cache(user_id)
+                return restored
 
             except (UserNotFoundError, DatabaseOperationError):
                 raise
@@ -337,6 +347,7 @@ class UserService:
                 }
 
                 await self.repository.update(user_id, update_data)
+                await UserCacheService(self.db).invalidate_user_cache(user_id)
 
                 return {
                     "user_id": user_id,
@@ -375,6 +386,9 @@ class UserService:
         Returns:
             Dictionary with bulk operation results
 
+        If the update fails part way, the chunks already committed are kept and
+        the operation is recorded and returned as partial_failure.
+
         Raises:
             UserStatusTransitionError: If any status transition is invalid
             DatabaseOperationError: If database operation fails
@@ -397,12 +411,37 @@ class UserService:
                     status="processing"
                 )
                 self.db.add(bulk_operation)
-                await self.db.flush()
+                await self.db.commit()
 
-                # Perform bulk update through repository
-                successful_updates, failed_updates = await self.repository.bulk_update_status(
-                    user_ids, new_status, reason, changed_by
-                )
+                # Perform bulk update through repository; chunks are committed as they go
+                interrupted_by = None
+                try:
+                    successful_updates, failed_updates = await self.repository.bulk_update_status(
+                        user_ids, new_status, reason, changed_by
+                    )
+                except PartialBulkUpdateError as e:
+                    # Earlier chunks are committed; report them instead of failing the whole operation
+                    interrupted_by = str(e)
+                    successful_updates = e.successful_updates
+                    updated_ids = {change["user_id"] for change in successful_updates}
+                    unprocessed_ids = set(e.unprocessed_ids)
+                    failed_updates = [
+                        {
+                            "user_id": str(user_id),
+                            "error": "Not updated, bulk update interrupted" if user_id in unprocessed_ids else "User not found"
+                        }
+                        for user_id in dict.fromkeys(user_ids)
+                        if user_id not in updated_ids
+                    ]
+                except DatabaseOperationError as e:
+                    bulk_operation.status = "failed"
+                    bulk_operation.error_details = {"error": str(e)}
+                    bulk_operation.completed_at = datetime.now(timezone.utc)
+                    await self.db.commit()
+                    raise
+
+                if successful_updates:
+                    await cache_service.invalidate_user_cache()
 
                 # Update bulk operation record
                 now = datetime.now(timezone.utc)
@@ -413,6 +452,8 @@ class UserService:
 
                 if failed_updates:
                     bulk_operation.error_details = {"failed_users": failed_updates}
+                if interrupted_by:
+                    bulk_operation.error_details["error"] = interrupted_by
 
                 await self.db.commit()
 
@@ -551,32 +592,39 @@ class UserService:
         """
         async with self.error_handler.handle_operation("auto_update_dormant_users", db_session=self.db):
             try:
-                # Get dormant users
-                dormant_users = await self.repository.get_dormant_users(inactive_days)
+                if not can_transition_status(UserStatus.ACTIVE.value, new_status):
+                    allowed = get_allowed_transitions(UserStatus.ACTIVE.value)
+                    raise UserStatusTransitionError(UserStatus.ACTIVE.value, new_status, allowed)
 
-                if not dormant_users:
+                # Set-based chunked update; no dormant users are loaded here
+                result = await ActivityManagementService(self.db).auto_update_dormant_users(
+                    inactive_days=inactive_days,
+                    new_status=new_status,
+                    reason=reason,
+                    performed_by_id=performed_by,
+                    exclude_roles=[],
+                    dry_run=dry_run
+                )
+
+                if not result["eligible_users"]:
                     return {
                         "message": "No dormant users found",
                         "dormant_users_found": 0,
                         "dry_run": dry_run
                     }
 
-                # Perform updates if not dry run
                 if not dry_run:
-                    user_ids = [user.id for user in dormant_users]
-                    result = await self.bulk_update_status(user_ids, new_status, reason, performed_by)
-
                     return {
-                        "message": f"Updated {result['successful_updates']} of {result['total_users']} dormant users",
-                        "dormant_users_found": len(dormant_users),
+                        "message": f"Updated {result['successful_updates']} dormant users",
+                        "dormant_users_found": result["eligible_users"],
                         "result": result,
                         "dry_run": False
                     }
                 else:
                     return {
-                        "message": f"Would update {len(dormant_users)} dormant users",
-                        "dormant_users_found": len(dormant_users),
-                        "dormant_user_ids": [str(user.id) for user in dormant_users],
+                        "message": f"Would update {result['eligible_users']} dormant users",
+                        "dormant_users_found": result["eligible_users"],
+                        "dormant_user_ids": [str(user_id) for user_id in result["eligible_user_ids"]],
                         "dry_run": True
                     }
 
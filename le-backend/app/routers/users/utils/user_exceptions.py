@@ -369,6 +369,23 @@ class DatabaseOperationError(UserManagementException):
         )
 
 
+class PartialBulkUpdateError(DatabaseOperationError):
+    """Raised when a chunked bulk update fails after earlier chunks were committed."""
+
+    def __init__(
+        self,
+        operation: str,
+        reason: str,
+        successful_updates: List[Dict[str, Any]],
+        unprocessed_ids: List[UUID]
+    ):
+        super().__init__(operation=operation, reason=reason)
+        self.successful_updates = successful_updates
+        self.unprocessed_ids = unprocessed_ids
+        self.context["committed_count"] = len(successful_updates)
+        self.context["unprocessed_count"] = len(unprocessed_ids)
+
+
 class UserBranchAssignmentError(UserManagementException):
     """Raised when branch assignment validation fails."""
 
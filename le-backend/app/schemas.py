@@ -213,7 +213,7 @@ class UserStatusChangeResponse(BaseSchema):
 # Bulk operations schemas
 class BulkStatusUpdate(BaseSchema):
     """Schema for bulk status update operations"""
-    user_ids: List[UUID] = Field(..., min_length=1, max_length=100, description="List of user IDs to update")
+    user_ids: List[UUID] = Field(..., min_length=1, max_length=10000, description="List of user IDs to update")
     status: str = Field(..., description="New status for selected users")
     reason: str = Field(..., min_length=1, max_length=200, description="Reason for status change")
     
@@ -909,6 +909,8 @@ class FileResponse(FileBase):
     created_at: datetime
     url: Optional[str] = None
     preview_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    srcset: Optional[str] = None
     expires_at: Optional[datetime] = None
 
 class FileFinalize(BaseSchema):
@@ -1900,6 +1902,7 @@ class GenerateCodesRequest(BaseSchema):
     """Schema for requesting batch code generation"""
     count: int = Field(..., ge=1, le=100, description="Number of codes to generate (max 100)")
     pattern: Optional[str] = Field(None, description="Optional code pattern to follow")
+    prefix: Optional[str] = Field(None, max_length=20, description="Optional code family to follow, e.g. 'EMP-2025-'")
 
 
 class GeneratedCodesResponse(BaseSchema):
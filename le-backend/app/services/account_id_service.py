@@ -12,11 +12,12 @@ This service handles:
 import re
 import uuid
 import hashlib
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, List, Iterable, Set
 from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_
+from sqlalchemy import and_, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY
 
 from ..models import CustomerApplication
 from ..core.logging import get_logger
@@ -43,6 +44,9 @@ class AccountIDService:
         'single_digit': r'^[0-9]$'
     }
     
+    # Maximum number of IDs bound into a single ``= ANY(:ids)`` uniqueness query
+    BULK_UNIQUENESS_CHUNK_SIZE = 10000
+    
     def __init__(self, db: AsyncSession):
         self.db = db
     
@@ -81,7 +85,7 @@ class AccountIDService:
         if account_id == '000000':
             return False
 
-        logger.info(f"Successfully validated 6-digit account ID: {account_id}")
+        logger.debug(f"Successfully validated 6-digit account ID: {account_id}")
         return True
     
     def validate_eight_digit_account_id(self, account_id: str) -> bool:
@@ -116,7 +120,7 @@ class AccountIDService:
         if account_id == '00000000':
             return False
         
-        logger.info(f"Successfully validated 8-digit account ID: {account_id}")
+        logger.debug(f"Successfully validated 8-digit account ID: {account_id}")
         return True
     
     def standardize_account_id(self, account_id: str, source_system: str = "external") -> str:
@@ -139,7 +143,7 @@ class AccountIDService:
         # For 6-digit IDs, ensure leading zeros are preserved
         if re.match(self.PATTERNS['six_digit'], standardized):
             standardized = standardized.zfill(6)
-            logger.info(f"Standardized 6-digit account ID: {account_id} -> {standardized}")
+            logger.debug(f"Standardized 6-digit account ID: {account_id} -> {standardized}")
         
         return standardized
     
@@ -158,7 +162,7 @@ class AccountIDService:
         namespace_uuid = uuid.uuid5(uuid.NAMESPACE_DNS, namespace)
         generated_uuid = uuid.uuid5(namespace_uuid, account_id)
         
-        logger.info(f"Generated UUID {generated_uuid} for account ID: {account_id}")
+        logger.debug(f"Generated UUID {generated_uuid} for account ID: {account_id}")
         return str(generated_uuid)
     
     def detect_account_id_format(self, account_id: str) -> str:
@@ -182,7 +186,7 @@ class AccountIDService:
         
         return 'unknown'
     
-    async def check_account_id_uniqueness(self, account_id: str, exclude_id: Optional[int] = None) -> Tuple[bool, Optional[int]]:
+    async def check_account_id_uniqueness(self, account_id: str, exclude_id: Optional[Any] = None) -> Tuple[bool, Optional[str]]:
         """
         Check if account ID is unique in the system
         
@@ -191,22 +195,22 @@ class AccountIDService:
             exclude_id: Application ID to exclude from check
             
         Returns:
-            Tuple[bool, Optional[int]]: (is_unique, existing_application_id)
+            Tuple[bool, Optional[str]]: (is_unique, existing_application_id)
         """
         try:
-            query = select(CustomerApplication).where(
+            query = select(CustomerApplication.id).where(
                 CustomerApplication.account_id == account_id
             )
             
             if exclude_id:
                 query = query.where(CustomerApplication.id != exclude_id)
             
-            result = await self.db.execute(query)
-            existing_application = result.scalar_one_or_none()
+            result = await self.db.execute(query.limit(1))
+            existing_id = result.scalar_one_or_none()
             
-            if existing_application:
-                logger.warning(f"Account ID {account_id} already exists for application {existing_application.id}")
-                return False, existing_application.id
+            if existing_id:
+                logger.warning(f"Account ID {account_id} already exists for application {existing_id}")
+                return False, str(existing_id)
             
             return True, None
             
@@ -329,4 +333,88 @@ class AccountIDService:
                     f"Account ID already exists in application {existing_id}"
                 )
         
-        return validation_result
\ No newline at end of file
+        return validation_result
+    
+    async def find_existing_account_ids(self, account_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Look up which account IDs are already used, with one set-based query per chunk
+        
+        Args:
+            account_ids: Standardized account IDs to check
+            
+        Returns:
+            Dict[str, str]: Mapping of taken account ID -> existing application ID
+        """
+        unique_ids = list(dict.fromkeys(account_id for account_id in account_ids if account_id))
+        existing: Dict[str, str] = {}
+        
+        for start in range(0, len(unique_ids), self.BULK_UNIQUENESS_CHUNK_SIZE):
+            chunk = unique_ids[start:start + self.BULK_UNIQUENESS_CHUNK_SIZE]
+            query = select(CustomerApplication.account_id, CustomerApplication.id).where(
+                CustomerApplication.account_id == any_(
+                    bindparam("account_ids", value=chunk, type_=ARRAY(String))
+                )
+            )
+            result = await self.db.execute(query)
+            for account_id, application_id in result.all():
+                existing.setdefault(account_id, str(application_id))
+        
+        return existing
+    
+    async def process_external_account_ids_bulk(self, account_ids: List[str],
+                                                source_system: str = "external_platform",
+                                                seen: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Bulk variant of ``process_external_account_id``
+        
+        All IDs are validated and standardized in memory first, then uniqueness is
+        resolved for the whole batch at once instead of one query per ID.
+        
+        Args:
+            account_ids: Account IDs from external system
+            source_system: Source system identifier
+            seen: Standardized IDs already processed; pass the same set for every
+                chunk of one batch so duplicates across chunks are reported.
+                Updated in place
+            
+        Returns:
+            List of per-ID processing results, in input order
+        """
+        results = []
+        for account_id in account_ids:
+            try:
+                results.append(self.validate_and_standardize(account_id, source_system))
+            except AccountIDValidationError as e:
+                results.append({
+                    'original': account_id,
+                    'standardized': None,
+                    'format': 'unknown',
+                    'is_valid': False,
+                    'generated_uuid': None,
+                    'validation_notes': [f"Validation error: {e.message}"],
+                    'processed_at': datetime.now(timezone.utc).isoformat()
+                })
+        
+        existing = await self.find_existing_account_ids(
+            result['standardized'] for result in results if result['is_valid']
+        )
+        
+        seen_in_batch = seen if seen is not None else set()
+        for result in results:
+            if not result['is_valid']:
+                continue
+            
+            standardized = result['standardized']
+            existing_id = existing.get(standardized)
+            result['is_unique'] = existing_id is None
+            result['existing_application_id'] = existing_id
+            
+            if existing_id:
+                result['validation_notes'].append(
+                    f"Account ID already exists in application {existing_id}"
+                )
+            if standardized in seen_in_batch:
+                result['validation_notes'].append("Account ID appears more than once in this batch")
+            seen_in_batch.add(standardized)
+        
+        return results
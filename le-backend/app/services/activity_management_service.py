@@ -7,17 +7,31 @@ Handles dormant user detection, activity-based status changes, and notifications
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, text, update
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Any, Optional
+from uuid import UUID
+import asyncio
 import logging
+import math
 
 from app.models import User, BulkOperation
+from app.core.config import settings
 from app.core.user_status import UserStatus, can_transition_status
 from app.services.audit_service import AuditService
+from app.services.analytics_kernels import days_since, dormancy_risk, epoch_seconds
+from app.services.cache_service import cache_service
+from app.services.notification_service import NotificationService
+from app.services.notification_templates import NotificationTemplates
+from app.services.notification_types import NotificationType, NotificationPriority
 
 logger = logging.getLogger(__name__)
 
+# Users updated per transaction by the dormant user update
+DORMANT_UPDATE_CHUNK_SIZE = 500
+# Postgres advisory lock key held while the scheduled sweep runs
+DORMANT_USER_SWEEP_LOCK_KEY = 7_260_044
+
 class ActivityManagementService:
     """Service for automated user activity management"""
     
@@ -55,7 +69,20 @@ class ActivityManagementService:
         # 2. Haven't logged in for X days (or never logged in)
         # 3. Not in excluded roles/statuses
         query = (
-            select(User)
+            select(
+                User.id,
+                User.username,
+                User.email,
+                User.first_name,
+                User.last_name,
+                User.role,
+                User.status,
+                User.department_id,
+                User.branch_id,
+                User.last_login_at,
+                User.login_count,
+                User.created_at
+            )
             .where(
                 and_(
                     User.status == 'active',
@@ -71,19 +98,20 @@ class ActivityManagementService:
         )
         
         result = await self.db.execute(query)
-        dormant_users = result.scalars().all()
+        dormant_users = result.all()
+        
+        # Days inactive count from the last login, or from creation for users
+        # who never logged in; computed for all rows at once
+        inactive_since = epoch_seconds(
+            user.last_login_at or user.created_at for user in dormant_users
+        )
+        days_inactive_values = days_since(inactive_since, datetime.now(timezone.utc))
+        risk_levels = dormancy_risk(days_inactive_values).tolist()
         
         # Build detailed dormant user information
         dormant_info = []
-        for user in dormant_users:
-            days_inactive = None
-            if user.last_login_at:
-                days_inactive = (datetime.now(timezone.utc) - user.last_login_at).days
-            else:
-                # User has never logged in
-                creation_date = user.created_at
-                if creation_date:
-                    days_inactive = (datetime.now(timezone.utc) - creation_date).days
+        for user, days_inactive, risk_level in zip(dormant_users, days_inactive_values.tolist(), risk_levels):
+            days_inactive = None if math.isnan(days_inactive) else int(days_inactive)
             
             dormant_info.append({
                 'user_id': user.id,
@@ -98,181 +126,215 @@ class ActivityManagementService:
                 'login_count': user.login_count or 0,
                 'days_inactive': days_inactive,
                 'created_at': user.created_at,
-                'risk_level': self._calculate_dormancy_risk(user, days_inactive)
+                'risk_level': risk_level
             })
         
         logger.info(f"Detected {len(dormant_info)} dormant users (inactive for {inactive_days}+ days)")
         return dormant_info
     
-    def _calculate_dormancy_risk(self, user: User, days_inactive: Optional[int]) -> str:
-        """Calculate risk level based on inactivity period"""
-        if days_inactive is None:
-            return "high"  # Never logged in
-        
-        if days_inactive >= 180:  # 6+ months
-            return "critical"
-        elif days_inactive >= 120:  # 4+ months
-            return "high"
-        elif days_inactive >= 90:  # 3+ months
-            return "medium"
-        else:
-            return "low"
-    
     async def auto_update_dormant_users(
         self,
-        dormant_users: List[Dict[str, Any]],
+        inactive_days: int = 90,
         new_status: str = 'inactive',
         reason: str = "Automatically marked inactive due to prolonged inactivity",
-        performed_by_id: Optional[str] = None,
-        dry_run: bool = False
+        performed_by_id: Optional[UUID] = None,
+        exclude_roles: Optional[List[str]] = None,
+        dry_run: bool = False,
+        chunk_size: int = DORMANT_UPDATE_CHUNK_SIZE,
+        notify_users: bool = True
     ) -> Dict[str, Any]:
         """
         Automatically update status of dormant users
         
+        Dormant users are updated set-based: each chunk is one
+        UPDATE ... WHERE id IN (SELECT ... LIMIT n FOR UPDATE SKIP LOCKED)
+        RETURNING, committed on its own so row locks are held briefly, and
+        followed by one batch of in-app notifications. Concurrent runs skip
+        each other's rows instead of waiting on them.
+        
         Args:
-            dormant_users: List of dormant user data from detect_dormant_users
+            inactive_days: Days without login to consider dormant
             new_status: Status to assign to dormant users
             reason: Reason for the status change
-            performed_by_id: ID of user/system performing the update
-            dry_run: If True, only simulate the operation without making changes
+            performed_by_id: ID of user/system performing the update (defaults to an admin)
+            exclude_roles: Roles never updated (defaults to ['admin'])
+            dry_run: If True, only count the users that would be updated
+            chunk_size: Users updated per transaction
+            notify_users: Send each updated user a status change notification
         
         Returns:
             Summary of the operation
         """
-        if not dormant_users:
-            return {
-                'total_users': 0,
-                'eligible_users': 0,
-                'successful_updates': 0,
-                'failed_updates': 0,
-                'errors': [],
-                'dry_run': dry_run
-            }
+        if not can_transition_status(UserStatus.ACTIVE.value, new_status):
+            raise ValueError(f"Cannot transition from '{UserStatus.ACTIVE.value}' to '{new_status}'")
+        
+        if exclude_roles is None:
+            exclude_roles = ['admin']  # Don't mark admins as dormant by default
         
-        # Filter users who can transition to the new status
-        eligible_users = []
-        transition_errors = []
-        
-        for user_info in dormant_users:
-            current_status = user_info['status']
-            if can_transition_status(current_status, new_status):
-                eligible_users.append(user_info)
-            else:
-                transition_errors.append({
-                    'user_id': user_info['user_id'],
-                    'username': user_info['username'],
-                    'error': f"Cannot transition from '{current_status}' to '{new_status}'"
-                })
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=inactive_days)
+        dormant_filter = self._dormant_filter(cutoff_date, exclude_roles)
         
         if dry_run:
+            result = await self.db.execute(select(User.id).where(dormant_filter))
+            eligible_user_ids = result.scalars().all()
             return {
-                'total_users': len(dormant_users),
-                'eligible_users': len(eligible_users),
+                'total_users': len(eligible_user_ids),
+                'eligible_users': len(eligible_user_ids),
                 'successful_updates': 0,
-                'failed_updates': len(transition_errors),
-                'errors': transition_errors,
+                'failed_updates': 0,
+                'errors': [],
                 'dry_run': True,
-                'eligible_user_ids': [u['user_id'] for u in eligible_users]
+                'eligible_user_ids': eligible_user_ids
             }
         
+        performed_by_id = performed_by_id or await self._get_system_user_id()
+        
         # Create bulk operation record
         bulk_operation = BulkOperation(
             operation_type="automated_status_update",
             performed_by=performed_by_id,
             target_criteria={
                 "filter": "dormant_users",
-                "criteria": "automated_activity_management"
+                "criteria": "automated_activity_management",
+                "inactive_days": inactive_days,
+                "exclude_roles": exclude_roles
             },
             changes_applied={
                 "new_status": new_status,
                 "reason": reason,
                 "automation": True
             },
-            total_records=len(eligible_users),
+            total_records=0,
             status="processing"
         )
         self.db.add(bulk_operation)
         await self.db.commit()
-        await self.db.refresh(bulk_operation)
         
-        # Process updates
-        successful_updates = []
-        failed_updates = []
         now = datetime.now(timezone.utc)
+        candidates = (
+            select(User.id)
+            .where(dormant_filter)
+            .order_by(User.id)
+            .limit(chunk_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        update_chunk = (
+            update(User)
+            .where(User.id.in_(candidates))
+            .values(
+                status=new_status,
+                status_reason=reason,
+                status_changed_at=now,
+                status_changed_by=performed_by_id
+            )
+            .returning(User.id, User.first_name)
+            .execution_options(synchronize_session=False)
+        )
         
-        try:
-            for user_info in eligible_users:
-                try:
-                    # Get fresh user data
-                    result = await self.db.execute(
-                        select(User).where(User.id == user_info['user_id'])
-                    )
-                    user = result.scalar_one_or_none()
-                    
-                    if not user:
-                        failed_updates.append({
-                            'user_id': user_info['user_id'],
-                            'error': 'User not found'
-                        })
-                        continue
-                    
-                    # Update user status
-                    old_status = user.status
-                    user.status = new_status
-                    user.status_reason = reason
-                    user.status_changed_at = now
-                    user.status_changed_by = performed_by_id
-                    
-                    successful_updates.append({
-                        'user_id': user.id,
-                        'username': user.username,
-                        'old_status': old_status,
-                        'new_status': new_status,
-                        'days_inactive': user_info['days_inactive']
-                    })
-                    
-                except Exception as e:
-                    failed_updates.append({
-                        'user_id': user_info['user_id'],
-                        'error': str(e)
-                    })
-            
-            # Update bulk operation record
-            bulk_operation.successful_records = len(successful_updates)
-            bulk_operation.failed_records = len(failed_updates) + len(transition_errors)
-            bulk_operation.status = "completed" if len(failed_updates) == 0 else "partial_failure"
-            bulk_operation.completed_at = now
-            
-            if failed_updates or transition_errors:
-                bulk_operation.error_details = {
-                    "failed_updates": failed_updates,
-                    "transition_errors": transition_errors
-                }
-            
-            await self.db.commit()
-            
-            logger.info(f"Automated dormant user update completed: {len(successful_updates)} updated, {len(failed_updates)} failed")
+        updated_user_ids = []
+        notifications_sent = 0
+        error = None
+        chunks = 0
+        
+        while True:
+            try:
+                result = await self.db.execute(update_chunk)
+                updated = result.all()
+                await self.db.commit()
+            except Exception as e:
+                await self.db.rollback()
+                error = str(e)
+                logger.error(f"Dormant user update chunk failed after {len(updated_user_ids)} users: {error}")
+                break
             
-            return {
-                'operation_id': bulk_operation.id,
-                'total_users': len(dormant_users),
-                'eligible_users': len(eligible_users),
-                'successful_updates': len(successful_updates),
-                'failed_updates': len(failed_updates) + len(transition_errors),
-                'errors': failed_updates + transition_errors,
-                'successful_user_updates': successful_updates,
-                'dry_run': False
-            }
+            if not updated:
+                break
+            chunks += 1
+            updated_user_ids.extend(row.id for row in updated)
             
-        except Exception as e:
-            # Mark operation as failed
-            bulk_operation.status = "failed"
-            bulk_operation.error_details = {"error": str(e)}
-            bulk_operation.completed_at = now
-            await self.db.commit()
+            if notify_users:
+                notifications_sent += await self._notify_status_change(
+                    updated, UserStatus.ACTIVE.value, new_status, reason
+                )
             
-            logger.error(f"Automated dormant user update failed: {str(e)}")
-            raise
+            if len(updated) < chunk_size:
+                break
+        
+        # Update bulk operation record
+        bulk_operation.total_records = len(updated_user_ids)
+        bulk_operation.successful_records = len(updated_user_ids)
+        bulk_operation.failed_records = 0
+        bulk_operation.completed_at = datetime.now(timezone.utc)
+        if error is None:
+            bulk_operation.status = "completed"
+        else:
+            bulk_operation.status = "partial_failure" if updated_user_ids else "failed"
+            bulk_operation.error_details = {"error": error}
+        await self.db.commit()
+        
+        if updated_user_ids:
+            await cache_service.invalidate_user_cache()
+        
+        logger.info(
+            f"Automated dormant user update {bulk_operation.status}: {len(updated_user_ids)} updated "
+            f"in {chunks} chunks, {notifications_sent} notified"
+        )
+        
+        return {
+            'operation_id': bulk_operation.id,
+            'total_users': len(updated_user_ids),
+            'eligible_users': len(updated_user_ids),
+            'successful_updates': len(updated_user_ids),
+            'failed_updates': 0,
+            'errors': [error] if error else [],
+            'updated_user_ids': updated_user_ids,
+            'notifications_sent': notifications_sent,
+            'status': bulk_operation.status,
+            'dry_run': False
+        }
+    
+    @staticmethod
+    def _dormant_filter(cutoff_date: datetime, exclude_roles: List[str]):
+        """Active, not deleted, no login since cutoff_date (or never), role not excluded"""
+        conditions = [
+            User.status == 'active',
+            User.is_deleted == False,
+            or_(
+                User.last_login_at < cutoff_date,
+                User.last_login_at.is_(None)
+            )
+        ]
+        if exclude_roles:
+            conditions.append(~User.role.in_(exclude_roles))
+        return and_(*conditions)
+    
+    async def _get_system_user_id(self) -> UUID:
+        """Admin user recorded as performer when the update wasn't started by a user"""
+        result = await self.db.execute(
+            select(User.id).where(User.role == 'admin').order_by(User.created_at).limit(1)
+        )
+        user_id = result.scalar_one_or_none()
+        if user_id is None:
+            raise ValueError("No admin user found to record as performer of the dormant user update")
+        return user_id
+    
+    async def _notify_status_change(self, users: List[Any], old_status: str, new_status: str, reason: str) -> int:
+        """Send one batch of status change notifications; failures are logged, not raised"""
+        notifications = []
+        for user in users:
+            template = NotificationTemplates.get_status_change_template(user, old_status, new_status, reason)
+            notifications.append({
+                'user_id': user.id,
+                'title': template['title'],
+                'message': template['message'],
+                'data': template['data']
+            })
+        
+        results = await NotificationService(self.db).send_in_app_notifications_batch(
+            NotificationType.STATUS_CHANGE, notifications, priority=NotificationPriority.HIGH
+        )
+        return results['in_app_sent']
     
     async def get_activity_summary(self, days: int = 30) -> Dict[str, Any]:
         """
@@ -365,4 +427,56 @@ class ActivityManagementService:
             'active_recent_count': active_recent_count,
             'never_logged_count': never_logged_count,
             'generated_at': now.isoformat()
-        }
\ No newline at end of file
+        }
+
+async def run_dormant_user_sweep(inactive_days: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Mark dormant users inactive in a session of its own
+
+    Only one app instance sweeps at a time: the run is skipped (returns None)
+    while another instance holds the sweep's advisory lock. The lock lives on
+    a dedicated connection because the sweep's session commits per chunk and
+    may use a different pooled connection for each transaction.
+    """
+    from app.database import AsyncSessionLocal, engine
+
+    # Autocommit so the lock connection does not sit idle in a transaction
+    async with engine.execution_options(isolation_level="AUTOCOMMIT").connect() as lock_conn:
+        acquired = (await lock_conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": DORMANT_USER_SWEEP_LOCK_KEY}
+        )).scalar()
+        if not acquired:
+            logger.info("Dormant user sweep already running on another instance, skipping")
+            return None
+        try:
+            async with AsyncSessionLocal() as db:
+                return await ActivityManagementService(db).auto_update_dormant_users(
+                    inactive_days=inactive_days or settings.DORMANT_USER_INACTIVE_DAYS
+                )
+        finally:
+            await lock_conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": DORMANT_USER_SWEEP_LOCK_KEY}
+            )
+
+
+async def dormant_user_sweep_loop():
+    """
+    Run the dormant user sweep every DORMANT_USER_SWEEP_INTERVAL_HOURS
+    
+    Started from the application lifespan when DORMANT_USER_SWEEP_ENABLED is
+    set. Several app instances may run it; the advisory lock taken by
+    run_dormant_user_sweep lets only one of them sweep at a time. The first
+    sweep runs one interval after startup, so rolling restarts don't each
+    trigger a sweep.
+    """
+    interval = settings.DORMANT_USER_SWEEP_INTERVAL_HOURS * 3600
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            result = await run_dormant_user_sweep()
+            if result is not None:
+                logger.info(f"Dormant user sweep updated {result['successful_updates']} users")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Dormant user sweep failed: {e}")
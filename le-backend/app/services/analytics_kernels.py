@@ -0,0 +1,123 @@
+"""
+Analytics Kernels
+
+Vectorized NumPy versions of the per-row statistics loops used by the analytics
+services. They work on columnar arrays built from column-only queries instead
+of lists of ORM objects:
+- Timestamps are float64 epoch seconds, NaN for NULL
+- Low-cardinality strings (status, role, department name) are integer codes
+  plus a list of labels, see encode_categories
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400.0
+
+# Dormancy risk thresholds in whole days inactive, highest first
+DORMANCY_RISK_LEVELS: Tuple[Tuple[int, str], ...] = (
+    (180, "critical"),  # 6+ months
+    (120, "high"),      # 4+ months
+    (90, "medium"),     # 3+ months
+)
+NEVER_LOGGED_IN_RISK = "high"
+DEFAULT_RISK = "low"
+
+
+def epoch_seconds(values: Iterable[Optional[datetime]]) -> np.ndarray:
+    """Convert datetimes to float64 epoch seconds, NULLs become NaN"""
+    return np.fromiter(
+        (value.timestamp() if value is not None else np.nan for value in values),
+        dtype=np.float64
+    )
+
+
+def encode_categories(values: Iterable[Optional[str]]) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """
+    Encode string values as integer codes
+
+    Returns:
+        Codes (int32, one per value) and the label for each code
+    """
+    codes = []
+    labels: List[Optional[str]] = []
+    index: Dict[Optional[str], int] = {}
+    for value in values:
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(labels)
+            labels.append(value)
+        codes.append(code)
+    return np.asarray(codes, dtype=np.int32), labels
+
+
+def category_counts(
+    codes: np.ndarray,
+    labels: Sequence[Optional[str]],
+    mask: Optional[np.ndarray] = None,
+    skip_none: bool = False
+) -> Dict[Optional[str], int]:
+    """Count occurrences of each label, optionally only where mask is set"""
+    if mask is not None:
+        codes = codes[mask]
+    counts = np.bincount(codes, minlength=len(labels))
+    return {
+        label: int(count)
+        for label, count in zip(labels, counts)
+        if count and not (skip_none and label is None)
+    }
+
+
+def days_since(timestamps: np.ndarray, now: datetime) -> np.ndarray:
+    """Whole days elapsed since each timestamp (like timedelta.days), NaN stays NaN"""
+    return np.floor((now.timestamp() - timestamps) / SECONDS_PER_DAY)
+
+
+def bucket_counts(values: np.ndarray, edges: Sequence[float]) -> np.ndarray:
+    """
+    Count values per bucket delimited by ascending edges
+
+    Bucket i holds edges[i-1] <= value < edges[i]; the first bucket is open
+    below and the last open above, so len(edges) + 1 counts are returned.
+    NaN values are not counted.
+    """
+    values = values[~np.isnan(values)]
+    return np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+
+
+def histogram(values: np.ndarray, bins: Any = 10) -> Dict[str, List[float]]:
+    """Histogram of the non-NaN values"""
+    counts, edges = np.histogram(values[~np.isnan(values)], bins=bins)
+    return {'counts': counts.tolist(), 'edges': edges.tolist()}
+
+
+def percentiles(values: Sequence[float], percents: Sequence[float]) -> List[float]:
+    """
+    Nearest-rank percentiles: the sorted value at index int(p / 100 * n)
+
+    Uses a partial sort, so asking for a few percentiles of a large sample
+    does not sort all of it.
+    """
+    data = np.asarray(values, dtype=np.float64)
+    if data.size == 0:
+        raise ValueError("percentiles requires at least one value")
+    indexes = np.minimum((np.asarray(percents, dtype=np.float64) / 100 * data.size).astype(np.int64), data.size - 1)
+    partitioned = np.partition(data, np.unique(indexes))
+    return partitioned[indexes].tolist()
+
+
+def dormancy_risk(days_inactive: np.ndarray) -> np.ndarray:
+    """
+    Risk level per user from whole days inactive
+
+    NaN (never logged in and no creation date) maps to NEVER_LOGGED_IN_RISK.
+    """
+    conditions = [np.isnan(days_inactive)]
+    choices = [NEVER_LOGGED_IN_RISK]
+    with np.errstate(invalid='ignore'):
+        for threshold, level in DORMANCY_RISK_LEVELS:
+            conditions.append(days_inactive >= threshold)
+            choices.append(level)
+    return np.select(conditions, choices, default=DEFAULT_RISK)
@@ -0,0 +1,70 @@
+"""
+Application Search Service
+
+Free-text search over customer applications using CustomerApplication.search_text,
+a generated column combining names, ID number, phone and portfolio officer:
+- Substring (LIKE) and typo-tolerant word similarity (<%) matches are both
+  served by the pg_trgm GIN index on that column
+- Matches are ranked by word similarity to the search term
+
+Also holds the default list ordering, which the list indexes are built for.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Select, desc, func, literal, literal_column, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models import CustomerApplication
+
+# Same characters the search_text column strips
+_INVISIBLE_CHARS = re.compile(r"[\u200b-\u200d\u2060\ufeff]")
+
+
+def normalize_search_term(search: str) -> str:
+    """Normalize a search term the way search_text is normalized"""
+    return " ".join(_INVISIBLE_CHARS.sub("", search).lower().split())
+
+
+def application_list_order() -> List[ColumnElement]:
+    """
+    Default application list ordering: urgent, then high priority, newest first.
+
+    The priority values are rendered inline rather than as bound parameters so
+    the expression indexes on this ordering also match generic plans.
+    """
+    return [
+        desc(CustomerApplication.priority_level == literal_column("'urgent'")),
+        desc(CustomerApplication.priority_level == literal_column("'high'")),
+        desc(CustomerApplication.created_at)
+    ]
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def apply_application_search(
+    query: Select,
+    search: Optional[str]
+) -> Tuple[Select, Optional[ColumnElement]]:
+    """
+    Filter an application query by a search term.
+
+    Returns:
+        The filtered query and a relevance expression to order by, or the
+        unchanged query and None when the term is empty
+    """
+    term = normalize_search_term(search or "")
+    if not term:
+        return query, None
+
+    search_text = CustomerApplication.search_text
+    query = query.where(
+        or_(
+            search_text.like(f"%{_escape_like(term)}%", escape="\\"),
+            literal(term).op("<%")(search_text)
+        )
+    )
+    return query, func.word_similarity(term, search_text)
@@ -1,10 +1,11 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, literal, union_all
 from app.models import User, CustomerApplication, Department, Branch
 from app.core.logging import get_logger
 from app.services.audit_service import AuditService, ValidationEventType
+from app.services.cache_service import cache_service
 from app.core.exceptions import (
     DuplicateFieldError,
     ValidationError,
@@ -25,9 +26,9 @@ class DuplicateValidationError(DuplicateFieldError):
 class AsyncValidationService:
     """Async service for handling duplicate validation across all models"""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, audit_service: Optional[AuditService] = None):
         self.db = db
-        self.audit_service = AuditService(db)
+        self.audit_service = audit_service or AuditService(db)
     
     async def log_duplicate_attempt(self, model_name: str, field: str, value: Any, 
                                    user_id: Optional[int] = None, additional_info: Dict = None,
@@ -64,6 +65,92 @@ class AsyncValidationService:
             extra={"audit_data": log_data}
         )
     
+    # Unique user fields in the order they are reported to the caller
+    USER_UNIQUE_FIELDS = {
+        "username": "Username '{value}' is already taken",
+        "email": "Email '{value}' is already registered",
+        "employee_id": "Employee ID '{value}' is already assigned",
+    }
+
+    # How long a negative ("value is available") lookup is cached for the
+    # real-time check-* endpoints. Kept short because a stale entry only delays
+    # feedback - the write paths still run the full duplicate validation.
+    AVAILABILITY_CACHE_TTL = 30
+    AVAILABILITY_CACHE_NAMESPACE = "validation"
+
+    # Upper bound on similar applications reported for the name + DOB warning
+    SIMILAR_APPLICATIONS_LIMIT = 20
+
+    async def _find_existing_ids(self, model, checks: List[Tuple[str, Any, int]],
+                                 exclude_id: Optional[int] = None) -> Dict[str, List[int]]:
+        """Resolve several duplicate checks against one table in a single round trip.
+
+        Each check is a ``(label, condition, limit)`` tuple. The checks are combined
+        with ``UNION ALL`` and only primary keys are selected, so no ORM rows are
+        loaded. Returns a mapping of label to the conflicting ids that were found.
+        """
+        if not checks:
+            return {}
+
+        branches = []
+        for label, condition, limit in checks:
+            branch = select(
+                literal(label).label("field"),
+                model.id.label("existing_id")
+            ).where(condition)
+            if exclude_id:
+                branch = branch.where(model.id != exclude_id)
+            branches.append(branch.limit(limit))
+
+        query = branches[0] if len(branches) == 1 else union_all(*branches)
+        result = await self.db.execute(query)
+
+        existing: Dict[str, List[int]] = {}
+        for field, existing_id in result.all():
+            existing.setdefault(field, []).append(existing_id)
+        return existing
+
+    async def find_user_duplicates(self, user_data: Dict[str, Any],
+                                   exclude_id: Optional[int] = None) -> Dict[str, int]:
+        """Return ``{field: existing_id}`` for every unique user field already in use"""
+        checks = [
+            (field, getattr(User, field) == user_data[field], 1)
+            for field in self.USER_UNIQUE_FIELDS
+            if user_data.get(field)
+        ]
+        existing = await self._find_existing_ids(User, checks, exclude_id)
+        return {field: ids[0] for field, ids in existing.items()}
+
+    async def find_customer_application_duplicates(self, customer_data: Dict[str, Any],
+                                                   exclude_id: Optional[int] = None) -> Dict[str, List[int]]:
+        """Return conflicting application ids keyed by check.
+
+        ``id_number`` and ``phone`` are hard duplicates; ``name_dob_combination``
+        lists applications that only look similar (name + date of birth).
+        """
+        checks = []
+        if customer_data.get("id_number") and customer_data.get("id_card_type"):
+            checks.append((
+                "id_number",
+                and_(
+                    CustomerApplication.id_number == customer_data["id_number"],
+                    CustomerApplication.id_card_type == customer_data["id_card_type"]
+                ),
+                1
+            ))
+        if customer_data.get("phone"):
+            checks.append(("phone", CustomerApplication.phone == customer_data["phone"], 1))
+        if customer_data.get("full_name_latin") and customer_data.get("date_of_birth"):
+            checks.append((
+                "name_dob_combination",
+                and_(
+                    CustomerApplication.full_name_latin.ilike(f"%{customer_data['full_name_latin']}%"),
+                    CustomerApplication.date_of_birth == customer_data["date_of_birth"]
+                ),
+                self.SIMILAR_APPLICATIONS_LIMIT
+            ))
+        return await self._find_existing_ids(CustomerApplication, checks, exclude_id)
+
     async def validate_user_duplicates(self, user_data: Dict[str, Any], 
                                      exclude_id: Optional[int] = None,
                                      user_id: Optional[int] = None,
@@ -72,80 +159,25 @@ class AsyncValidationService:
         """Validate user data for duplicates"""
         
         try:
-            # Check username uniqueness
-            if "username" in user_data and user_data["username"]:
-                query = select(User).where(User.username == user_data["username"])
-                if exclude_id:
-                    query = query.where(User.id != exclude_id)
-                
-                result = await self.db.execute(query)
-                existing_user = result.scalar_one_or_none()
-                if existing_user:
-                    await self.log_duplicate_attempt(
-                        "User", "username", user_data["username"], 
-                        user_id=user_id,
-                        additional_info={"existing_id": existing_user.id},
-                        ip_address=ip_address,
-                        user_agent=user_agent
-                    )
-                    raise DuplicateFieldError(
-                        field="username",
-                        value=user_data["username"],
-                        existing_id=existing_user.id,
-                        entity_type="User",
-                        message=f"Username '{user_data['username']}' is already taken",
-                        suggestions=["Try a different username", "Add numbers or special characters"]
-                    )
-            
-            # Check email uniqueness
-            if "email" in user_data and user_data["email"]:
-                query = select(User).where(User.email == user_data["email"])
-                if exclude_id:
-                    query = query.where(User.id != exclude_id)
-                
-                result = await self.db.execute(query)
-                existing_user = result.scalar_one_or_none()
-                if existing_user:
-                    await self.log_duplicate_attempt(
-                        "User", "email", user_data["email"],
-                        user_id=user_id,
-                        additional_info={"existing_id": existing_user.id},
-                        ip_address=ip_address,
-                        user_agent=user_agent
-                    )
-                    raise DuplicateFieldError(
-                        field="email",
-                        value=user_data["email"],
-                        existing_id=existing_user.id,
-                        entity_type="User",
-                        message=f"Email '{user_data['email']}' is already registered",
-                        suggestions=["Use a different email address", "Check if you already have an account"]
-                    )
-            
-            # Check employee_id uniqueness (if provided)
-            if "employee_id" in user_data and user_data["employee_id"]:
-                query = select(User).where(User.employee_id == user_data["employee_id"])
-                if exclude_id:
-                    query = query.where(User.id != exclude_id)
-                
-                result = await self.db.execute(query)
-                existing_user = result.scalar_one_or_none()
-                if existing_user:
-                    await self.log_duplicate_attempt(
-                        "User", "employee_id", user_data["employee_id"],
-                        user_id=user_id,
-                        additional_info={"existing_id": existing_user.id},
-                        ip_address=ip_address,
-                        user_agent=user_agent
-                    )
-                    raise DuplicateFieldError(
-                        field="employee_id",
-                        value=user_data["employee_id"],
-                        existing_id=existing_user.id,
-                        entity_type="User",
-                        message=f"Employee ID '{user_data['employee_id']}' is already assigned",
-                        suggestions=["Contact HR to verify your employee ID", "Use a different employee ID"]
-                    )
+            duplicates = await self.find_user_duplicates(user_data, exclude_id)
+
+            for field, message in self.USER_UNIQUE_FIELDS.items():
+                if field not in duplicates:
+                    continue
+                await self.log_duplicate_attempt(
+                    "User", field, user_data[field],
+                    user_id=user_id,
+                    additional_info={"existing_id": duplicates[field]},
+                    ip_address=ip_address,
+                    user_agent=user_agent
+                )
+                raise DuplicateFieldError(
+                    field=field,
+                    value=user_data[field],
+                    existing_id=duplicates[field],
+                    entity_type="User",
+                    custom_message=message.format(value=user_data[field])
+                )
         except DuplicateFieldError:
             raise
         except Exception as e:
@@ -163,92 +195,59 @@ class AsyncValidationService:
         """Validate customer application data for duplicates"""
         
         try:
+            duplicates = await self.find_customer_application_duplicates(customer_data, exclude_id)
+
             # Check ID number + ID card type combination
-            if ("id_number" in customer_data and customer_data["id_number"] and 
-                "id_card_type" in customer_data and customer_data["id_card_type"]):
-                
-                query = select(CustomerApplication).where(
-                    and_(
-                        CustomerApplication.id_number == customer_data["id_number"],
-                        CustomerApplication.id_card_type == customer_data["id_card_type"]
-                    )
+            if "id_number" in duplicates:
+                existing_id = duplicates["id_number"][0]
+                await self.log_duplicate_attempt(
+                    "CustomerApplication", "id_number_type", 
+                    f"{customer_data['id_number']}_{customer_data['id_card_type']}",
+                    user_id=user_id,
+                    additional_info={"existing_id": existing_id},
+                    ip_address=ip_address,
+                    user_agent=user_agent
+                )
+                raise DuplicateFieldError(
+                    field="id_number",
+                    value=customer_data["id_number"],
+                    existing_id=existing_id,
+                    entity_type="CustomerApplication",
+                    custom_message=f"Customer with {customer_data['id_card_type']} number '{customer_data['id_number']}' already exists. Please verify your information."
                 )
-                if exclude_id:
-                    query = query.where(CustomerApplication.id != exclude_id)
-                
-                result = await self.db.execute(query)
-                existing_application = result.scalar_one_or_none()
-                if existing_application:
-                    await self.log_duplicate_attempt(
-                        "CustomerApplication", "id_number_type", 
-                        f"{customer_data['id_number']}_{customer_data['id_card_type']}",
-                        user_id=user_id,
-                        additional_info={"existing_id": existing_application.id},
-                        ip_address=ip_address,
-                        user_agent=user_agent
-                    )
-                    raise DuplicateFieldError(
-                         field="id_number",
-                         value=customer_data["id_number"],
-                         existing_id=existing_application.id,
-                         entity_type="CustomerApplication",
-                         message=f"Customer with {customer_data['id_card_type']} number '{customer_data['id_number']}' already exists. Please verify your information.",
-                         suggestions=["Verify the ID number is correct", "Check if this customer already has an application"]
-                     )
             
             # Check phone number uniqueness
-            if "phone" in customer_data and customer_data["phone"]:
-                query = select(CustomerApplication).where(CustomerApplication.phone == customer_data["phone"])
-                if exclude_id:
-                    query = query.where(CustomerApplication.id != exclude_id)
-                
-                result = await self.db.execute(query)
-                existing_application = result.scalar_one_or_none()
-                if existing_application:
-                    await self.log_duplicate_attempt(
-                        "CustomerApplication", "phone", customer_data["phone"],
-                        user_id=user_id,
-                        additional_info={"existing_id": existing_application.id},
-                        ip_address=ip_address,
-                        user_agent=user_agent
-                    )
-                    raise DuplicateFieldError(
-                         field="phone",
-                         value=customer_data["phone"],
-                         existing_id=existing_application.id,
-                         entity_type="CustomerApplication",
-                         message=f"Phone number '{customer_data['phone']}' is already registered",
-                         suggestions=["Use a different phone number", "Check if this customer already has an application"]
-                     )
+            if "phone" in duplicates:
+                existing_id = duplicates["phone"][0]
+                await self.log_duplicate_attempt(
+                    "CustomerApplication", "phone", customer_data["phone"],
+                    user_id=user_id,
+                    additional_info={"existing_id": existing_id},
+                    ip_address=ip_address,
+                    user_agent=user_agent
+                )
+                raise DuplicateFieldError(
+                    field="phone",
+                    value=customer_data["phone"],
+                    existing_id=existing_id,
+                    entity_type="CustomerApplication",
+                    custom_message=f"Phone number '{customer_data['phone']}' is already registered"
+                )
             
-            # Check for potential duplicate based on full name and other identifying info
-            if ("full_name_latin" in customer_data and customer_data["full_name_latin"] and
-                "date_of_birth" in customer_data and customer_data["date_of_birth"]):
-                
-                query = select(CustomerApplication).where(
-                    and_(
-                        CustomerApplication.full_name_latin.ilike(f"%{customer_data['full_name_latin']}%"),
-                        CustomerApplication.date_of_birth == customer_data["date_of_birth"]
-                    )
+            # Potential duplicate based on full name and date of birth
+            if "name_dob_combination" in duplicates:
+                await self.log_duplicate_attempt(
+                    "CustomerApplication", "name_dob_combination", 
+                    f"{customer_data['full_name_latin']}_{customer_data['date_of_birth']}",
+                    user_id=user_id,
+                    additional_info={
+                        "similar_applications": duplicates["name_dob_combination"],
+                        "warning_type": "potential_duplicate"
+                    },
+                    ip_address=ip_address,
+                    user_agent=user_agent
                 )
-                if exclude_id:
-                    query = query.where(CustomerApplication.id != exclude_id)
-                
-                result = await self.db.execute(query)
-                similar_applications = result.scalars().all()
-                if similar_applications:
-                    await self.log_duplicate_attempt(
-                        "CustomerApplication", "name_dob_combination", 
-                        f"{customer_data['full_name_latin']}_{customer_data['date_of_birth']}",
-                        user_id=user_id,
-                        additional_info={
-                            "similar_applications": [app.id for app in similar_applications],
-                            "warning_type": "potential_duplicate"
-                        },
-                        ip_address=ip_address,
-                        user_agent=user_agent
-                    )
-                    # This is a warning, not a hard error - let the frontend handle it
+                # This is a warning, not a hard error - let the frontend handle it
         except DuplicateFieldError:
             raise
         except Exception as e:
@@ -390,14 +389,44 @@ class AsyncValidationService:
                 details={"error": str(e), "operation": "branch_validation"}
             )
     
+    def _availability_cache_key(self, model_name: str, field: str, value: Any,
+                                exclude_id: Optional[int]) -> str:
+        """Cache key for an availability lookup; the value is hashed, never stored"""
+        value_hash = cache_service._generate_query_hash(value=str(value))
+        return f"available:{model_name}:{field}:{exclude_id or 0}:{value_hash}"
+
     async def check_field_availability(self, model_name: str, field: str, value: Any, 
                                      exclude_id: Optional[int] = None,
                                      user_id: Optional[int] = None,
                                      ip_address: Optional[str] = None,
                                      user_agent: Optional[str] = None) -> Dict[str, Any]:
-        """Check if a specific field value is available (for real-time frontend validation)"""
+        """
+        Check if a specific field value is available (for real-time frontend validation)
+        
+        The availability check is audited only when it reaches the database;
+        answers served from the negative cache write no audit row.
+        """
         
         try:
+            model_key = model_name.lower()
+            if model_key == "user":
+                if field not in self.USER_UNIQUE_FIELDS:
+                    return {"available": True, "message": "Field not validated"}
+                model, entity_type, taken_word = User, "User", "taken"
+            elif model_key == "customer_application":
+                if field == "id_number":
+                    # For ID number, we need the ID card type as well
+                    return {"available": True, "message": "ID number validation requires ID card type"}
+                if field != "phone":
+                    return {"available": True, "message": "Field not validated"}
+                model, entity_type, taken_word = CustomerApplication, "CustomerApplication", "registered"
+            else:
+                return {"available": True, "message": "Available"}
+
+            cache_key = self._availability_cache_key(model_key, field, value, exclude_id)
+            if await cache_service.get(cache_key, self.AVAILABILITY_CACHE_NAMESPACE):
+                return {"available": True, "message": "Available"}
+
             # Log field availability check
             try:
                 await self.audit_service.log_validation_event(
@@ -412,75 +441,35 @@ class AsyncValidationService:
                 )
             except Exception as audit_error:
                 logger.error(f"Failed to log field availability check: {str(audit_error)}")
-            
-            if model_name.lower() == "user":
-                if field == "username":
-                    query = select(User).where(User.username == value)
-                elif field == "email":
-                    query = select(User).where(User.email == value)
-                elif field == "employee_id":
-                    query = select(User).where(User.employee_id == value)
-                else:
-                    return {"available": True, "message": "Field not validated"}
-                
-                if exclude_id:
-                    query = query.where(User.id != exclude_id)
-                
-                result = await self.db.execute(query)
-                existing = result.scalar_one_or_none()
-                if existing:
-                    try:
-                        await self.audit_service.log_validation_event(
-                            event_type=ValidationEventType.DUPLICATE_DETECTED,
-                            entity_type="User",
-                            field_name=field,
-                            field_value=str(value),
-                            user_id=str(user_id) if user_id else None,
-                            ip_address=ip_address,
-                            user_agent=user_agent,
-                            metadata={"existing_id": existing.id, "exclude_id": exclude_id}
-                        )
-                    except Exception as audit_error:
-                        logger.error(f"Failed to log duplicate detection: {str(audit_error)}")
-                    return {
-                        "available": False,
-                        "message": f"{field.replace('_', ' ').title()} is already taken",
-                        "existing_id": existing.id
-                    }
-            
-            elif model_name.lower() == "customer_application":
-                if field == "phone":
-                    query = select(CustomerApplication).where(CustomerApplication.phone == value)
-                elif field == "id_number":
-                    # For ID number, we need the ID card type as well
-                    return {"available": True, "message": "ID number validation requires ID card type"}
-                else:
-                    return {"available": True, "message": "Field not validated"}
-                
-                if exclude_id:
-                    query = query.where(CustomerApplication.id != exclude_id)
-                
-                result = await self.db.execute(query)
-                existing = result.scalar_one_or_none()
-                if existing:
-                    try:
-                        await self.audit_service.log_validation_event(
-                            event_type=ValidationEventType.DUPLICATE_DETECTED,
-                            entity_type="CustomerApplication",
-                            field_name=field,
-                            field_value=str(value),
-                            user_id=str(user_id) if user_id else None,
-                            ip_address=ip_address,
-                            user_agent=user_agent,
-                            metadata={"existing_id": existing.id, "exclude_id": exclude_id}
-                        )
-                    except Exception as audit_error:
-                        logger.error(f"Failed to log duplicate detection: {str(audit_error)}")
-                    return {
-                        "available": False,
-                        "message": f"{field.replace('_', ' ').title()} is already registered",
-                        "existing_id": existing.id
-                    }
+
+            existing = await self._find_existing_ids(
+                model, [(field, getattr(model, field) == value, 1)], exclude_id
+            )
+            if field in existing:
+                existing_id = existing[field][0]
+                try:
+                    await self.audit_service.log_validation_event(
+                        event_type=ValidationEventType.DUPLICATE_FOUND,
+                        entity_type=entity_type,
+                        field_name=field,
+                        field_value=str(value),
+                        user_id=str(user_id) if user_id else None,
+                        ip_address=ip_address,
+                        user_agent=user_agent,
+                        metadata={"existing_id": existing_id, "exclude_id": exclude_id}
+                    )
+                except Exception as audit_error:
+                    logger.error(f"Failed to log duplicate detection: {str(audit_error)}")
+                return {
+                    "available": False,
+                    "message": f"{field.replace('_', ' ').title()} is already {taken_word}",
+                    "existing_id": existing_id
+                }
+
+            # Only negative lookups are cached; a taken value is always re-checked
+            await cache_service.set(
+                cache_key, True, self.AVAILABILITY_CACHE_TTL, self.AVAILABILITY_CACHE_NAMESPACE
+            )
             
             return {"available": True, "message": "Available"}
             
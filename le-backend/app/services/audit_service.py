@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, insert, func
 from sqlalchemy.orm import selectinload
 from fastapi import Depends
 import json
@@ -89,7 +89,45 @@ class AuditService:
             logger.error(f"Failed to log validation event: {str(e)}")
             await self.db.rollback()
             raise
-    
+
+    async def log_events_batch(
+        self,
+        event_type: AuditEventType,
+        action: str,
+        entity_type: str,
+        entries: List[Dict[str, Any]],
+        user_id: Optional[str] = None
+    ) -> int:
+        """
+        Log one audit event per entry with a single INSERT
+
+        The rows are written in the caller's transaction and committed with it,
+        so they land together with the change they describe.
+
+        Args:
+            entries: Dicts with entity_id and details
+        """
+        if not entries:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        await self.db.execute(
+            insert(AuditLog),
+            [
+                {
+                    "event_type": event_type,
+                    "action": action,
+                    "entity_type": entity_type,
+                    "entity_id": str(entry["entity_id"]),
+                    "user_id": user_id,
+                    "details": entry.get("details"),
+                    "timestamp": now
+                }
+                for entry in entries
+            ]
+        )
+        return len(entries)
+
     async def log_duplicate_attempt(
         self,
         entity_type: str,
@@ -64,6 +64,7 @@ class BackgroundJob:
         self.retry_count = 0
         self.result: Optional[JobResult] = None
         self.error_message: Optional[str] = None
+        self.progress: Optional[Dict[str, Any]] = None
 
 class BackgroundJobService:
     """Service for managing and executing background jobs"""
@@ -143,13 +144,21 @@ class BackgroundJobService:
             "started_at": job.started_at.isoformat() if job.started_at else None,
             "completed_at": job.completed_at.isoformat() if job.completed_at else None,
             "retry_count": job.retry_count,
+            "progress": job.progress,
             "result": {
                 "success": job.result.success if job.result else None,
                 "message": job.result.message if job.result else None,
+                "data": job.result.data if job.result else None,
                 "error": job.error_message
             } if job.result or job.error_message else None
         }
     
+    async def update_progress(self, job_id: str, progress: Dict[str, Any]):
+        """Record progress reported by a running job"""
+        job = self.jobs.get(job_id)
+        if job:
+            job.progress = progress
+    
     async def cancel_job(self, job_id: str) -> bool:
         """Cancel a pending or processing job"""
         job = self.jobs.get(job_id)
@@ -225,9 +234,9 @@ class BackgroundJobService:
             if not processor:
                 raise ValueError(f"No processor registered for job type: {job.job_type}")
             
-            # Execute the job with timeout
+            # Execute the job with timeout; the job id lets processors report progress
             result = await asyncio.wait_for(
-                processor(job.payload),
+                processor({**job.payload, "job_id": job.job_id}),
                 timeout=job.timeout
             )
             
@@ -329,7 +338,25 @@ async def csv_export_processor(payload: Dict[str, Any]) -> Dict[str, Any]:
         "filters_applied": filters
     }
 
+async def portfolio_officer_migration_processor(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Process portfolio officer migration jobs"""
+    from app.services.portfolio_officer_migration_service import PortfolioOfficerMigrator
+    
+    job_id = payload["job_id"]
+    performed_by = payload.get("performed_by")
+    
+    async def report_progress(progress: Dict[str, Any]):
+        await job_service.update_progress(job_id, progress)
+    
+    migrator = PortfolioOfficerMigrator(
+        performed_by=UUID(performed_by) if performed_by else None,
+        progress=report_progress
+    )
+    # Retries resume from the last committed chunk
+    return await migrator.run(resume=payload.get("resume", True))
+
 # Register job processors
 job_service.register_processor("bulk_status_update", bulk_status_update_processor)
 job_service.register_processor("csv_import", csv_import_processor)
 job_service.register_processor("csv_export", csv_export_processor)
+job_service.register_processor("portfolio_officer_migration", portfolio_officer_migration_processor)
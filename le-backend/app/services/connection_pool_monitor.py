@@ -5,6 +5,7 @@ Provides real-time monitoring and optimization of database connection pools.
 
 import asyncio
 import logging
+import math
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass
@@ -14,9 +15,21 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import engine
 from app.core.config import settings
+from app.core.pool_telemetry import DownsamplingBuffer, pool_telemetry
+from app.services.analytics_kernels import percentiles
 
 logger = logging.getLogger(__name__)
 
+# Samples per history; older samples are merged rather than dropped
+HISTORY_CAPACITY = 720
+# pg_stat_activity needs a pooled connection, so it is sampled every Nth tick only
+DATABASE_STATS_EVERY = 10
+# Checkout samples needed before pool size recommendations are made
+MIN_RECOMMENDATION_SAMPLES = 200
+# Headroom on top of the connections needed at the p95 hold time
+POOL_SIZE_HEADROOM = 1.25
+MAX_RECOMMENDED_POOL_SIZE = 100
+
 @dataclass
 class ConnectionPoolStats:
     """Connection pool statistics"""
@@ -52,15 +65,17 @@ class ConnectionPoolMonitor:
     
     def __init__(self):
         self.monitoring_active = False
-        self.stats_history: List[ConnectionPoolStats] = []
-        self.db_stats_history: List[DatabaseConnectionStats] = []
-        self.performance_history: List[PerformanceMetrics] = []
+        self.stats_history = DownsamplingBuffer(HISTORY_CAPACITY)
+        self.db_stats_history = DownsamplingBuffer(HISTORY_CAPACITY)
+        self.performance_history = DownsamplingBuffer(HISTORY_CAPACITY)
         self.monitoring_task: Optional[asyncio.Task] = None
         self.alert_thresholds = {
             "max_utilization": 0.8,  # 80% pool utilization
             "max_connection_time": 5.0,  # 5 seconds
             "max_query_time": 2.0,  # 2 seconds
-            "min_pool_efficiency": 0.7  # 70% efficiency
+            "min_pool_efficiency": 0.7,  # 70% efficiency
+            "max_checkout_wait_p95": 0.05,  # 50ms waiting for a connection
+            "idle_checkout_wait_p99": 0.001  # Below 1ms the pool is never short
         }
     
     async def start_monitoring(self, interval: int = 30):
@@ -86,46 +101,52 @@ class ConnectionPoolMonitor:
                 pass
         logger.info("Stopped connection pool monitoring")
     
+    def _get_pool_stats(self) -> ConnectionPoolStats:
+        """Read the pool's counters; does not touch the database"""
+        pool = engine.pool
+        return ConnectionPoolStats(
+            pool_size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            invalid=getattr(pool, 'invalid', lambda: 0)(),
+            pool_type=type(pool).__name__,
+            timestamp=datetime.now(timezone.utc)
+        )
+    
+    async def _get_database_stats(self) -> DatabaseConnectionStats:
+        """Connection counts from pg_stat_activity (uses a pooled connection)"""
+        async with engine.connect() as conn:
+            # Get PostgreSQL connection stats
+            db_stats_query = text("""
+                SELECT 
+                    count(*) as total_connections,
+                    count(*) FILTER (WHERE state = 'active') as active_connections,
+                    count(*) FILTER (WHERE state = 'idle') as idle_connections,
+                    count(*) FILTER (WHERE state = 'idle in transaction') as idle_in_transaction,
+                    (SELECT setting::int FROM pg_settings WHERE name = 'max_connections') as max_connections
+                FROM pg_stat_activity 
+                WHERE datname = current_database()
+            """)
+            
+            result = await conn.execute(db_stats_query)
+            row = result.fetchone()
+            
+            db_stats = DatabaseConnectionStats(
+                total_connections=row[0] if row else 0,
+                active_connections=row[1] if row else 0,
+                idle_connections=row[2] if row else 0,
+                idle_in_transaction=row[3] if row else 0,
+                max_connections=row[4] if row else 100,
+                timestamp=datetime.now(timezone.utc)
+            )
+        return db_stats
+    
     async def get_current_stats(self) -> Dict[str, Any]:
         """Get current connection pool statistics"""
         try:
-            # Get pool statistics
-            pool = engine.pool
-            pool_stats = ConnectionPoolStats(
-                pool_size=pool.size(),
-                checked_in=pool.checkedin(),
-                checked_out=pool.checkedout(),
-                overflow=pool.overflow(),
-                invalid=getattr(pool, 'invalid', lambda: 0)(),
-                pool_type=type(pool).__name__,
-                timestamp=datetime.now(timezone.utc)
-            )
-            
-            # Get database connection statistics
-            async with engine.begin() as conn:
-                # Get PostgreSQL connection stats
-                db_stats_query = text("""
-                    SELECT 
-                        count(*) as total_connections,
-                        count(*) FILTER (WHERE state = 'active') as active_connections,
-                        count(*) FILTER (WHERE state = 'idle') as idle_connections,
-                        count(*) FILTER (WHERE state = 'idle in transaction') as idle_in_transaction,
-                        (SELECT setting::int FROM pg_settings WHERE name = 'max_connections') as max_connections
-                    FROM pg_stat_activity 
-                    WHERE datname = current_database()
-                """)
-                
-                result = await conn.execute(db_stats_query)
-                row = result.fetchone()
-                
-                db_stats = DatabaseConnectionStats(
-                    total_connections=row[0] if row else 0,
-                    active_connections=row[1] if row else 0,
-                    idle_connections=row[2] if row else 0,
-                    idle_in_transaction=row[3] if row else 0,
-                    max_connections=row[4] if row else 100,
-                    timestamp=datetime.now(timezone.utc)
-                )
+            pool_stats = self._get_pool_stats()
+            db_stats = await self._get_database_stats()
             
             # Calculate performance metrics
             performance = self._calculate_performance_metrics(pool_stats, db_stats)
@@ -154,6 +175,7 @@ class ConnectionPoolMonitor:
                     "connection_utilization": performance.connection_utilization,
                     "pool_efficiency": performance.pool_efficiency
                 },
+                "pool_telemetry": self.get_pool_telemetry(),
                 "timestamp": datetime.now(timezone.utc).isoformat()
             }
             
@@ -165,53 +187,108 @@ class ConnectionPoolMonitor:
         """Get historical connection pool statistics"""
         cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
         
-        # Filter recent stats
-        recent_pool_stats = [
-            stats for stats in self.stats_history
-            if stats.timestamp >= cutoff_time
-        ]
-        recent_db_stats = [
-            stats for stats in self.db_stats_history
-            if stats.timestamp >= cutoff_time
-        ]
-        recent_performance = [
-            perf for perf in self.performance_history
-            if perf.timestamp >= cutoff_time
-        ]
+        def recent(history: DownsamplingBuffer) -> List[Dict[str, Any]]:
+            return [
+                {**sample, "timestamp": sample["timestamp"].isoformat()}
+                for sample in history
+                if sample["timestamp"] >= cutoff_time
+            ]
         
         return {
-            "pool_stats_history": [
-                {
-                    "timestamp": stats.timestamp.isoformat(),
-                    "pool_size": stats.pool_size,
-                    "checked_in": stats.checked_in,
-                    "checked_out": stats.checked_out,
-                    "overflow": stats.overflow,
-                    "utilization": stats.checked_out / stats.pool_size if stats.pool_size > 0 else 0
-                }
-                for stats in recent_pool_stats
-            ],
-            "database_stats_history": [
-                {
-                    "timestamp": stats.timestamp.isoformat(),
-                    "total_connections": stats.total_connections,
-                    "active_connections": stats.active_connections,
-                    "idle_connections": stats.idle_connections,
-                    "utilization": stats.total_connections / stats.max_connections if stats.max_connections > 0 else 0
-                }
-                for stats in recent_db_stats
-            ],
-            "performance_history": [
-                {
-                    "timestamp": perf.timestamp.isoformat(),
-                    "avg_connection_time": perf.avg_connection_time,
-                    "avg_query_time": perf.avg_query_time,
-                    "connection_utilization": perf.connection_utilization,
-                    "pool_efficiency": perf.pool_efficiency
-                }
-                for perf in recent_performance
-            ]
+            "pool_stats_history": recent(self.stats_history),
+            "database_stats_history": recent(self.db_stats_history),
+            "performance_history": recent(self.performance_history),
+            # Raw monitoring ticks averaged into each history sample
+            "samples_per_point": self.stats_history.stride
+        }
+    
+    def get_pool_telemetry(self) -> Dict[str, Any]:
+        """Checkout wait and hold time percentiles over the telemetry window"""
+        def summarize(window) -> Dict[str, Any]:
+            durations = [seconds for _, seconds in window]
+            if not durations:
+                return {"samples": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+            p50, p95, p99 = percentiles(durations, [50, 95, 99])
+            return {
+                "samples": len(durations),
+                "mean": sum(durations) / len(durations),
+                "p50": p50,
+                "p95": p95,
+                "p99": p99
+            }
+        
+        return {
+            "checkout_wait": summarize(pool_telemetry.wait_times),
+            "connection_hold": summarize(pool_telemetry.hold_times),
+            "checkouts_per_second": pool_telemetry.checkout_rate(),
+            "checked_out": pool_telemetry.checked_out,
+            "connections_opened": pool_telemetry.connections_opened
+        }
+    
+    def recommend_pool_size(self, telemetry: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Suggest a pool size from observed checkout waits
+        
+        The connections needed follow Little's law: checkouts per second times
+        the p95 hold time, plus headroom. The pool is only grown when callers
+        actually wait (p95 above max_checkout_wait_p95) and only shrunk when
+        they never do and the observed peak stays below half the pool.
+        """
+        telemetry = telemetry or self.get_pool_telemetry()
+        wait = telemetry["checkout_wait"]
+        hold = telemetry["connection_hold"]
+        if wait["samples"] < MIN_RECOMMENDATION_SAMPLES:
+            return None
+        
+        pool = engine.pool
+        pool_size = pool.size()
+        max_overflow = getattr(pool, "_max_overflow", 0)
+        peak = max(
+            [sample["peak_checked_out"] for sample in self.stats_history] + [pool_telemetry.peak_checked_out]
+        )
+        needed = math.ceil(telemetry["checkouts_per_second"] * hold["p95"] * POOL_SIZE_HEADROOM)
+        evidence = {
+            "checkout_wait_p95": wait["p95"],
+            "checkout_wait_p99": wait["p99"],
+            "connection_hold_p95": hold["p95"],
+            "checkouts_per_second": telemetry["checkouts_per_second"],
+            "peak_checked_out": peak,
+            "max_overflow": max_overflow
         }
+        
+        if wait["p95"] > self.alert_thresholds["max_checkout_wait_p95"]:
+            recommended = min(max(needed, math.ceil(peak * POOL_SIZE_HEADROOM), pool_size + 1), MAX_RECOMMENDED_POOL_SIZE)
+            return {
+                "type": "pool_size",
+                "severity": "high" if wait["p99"] > 1.0 else "medium",
+                "message": (
+                    f"Requests wait {wait['p95'] * 1000:.0f}ms (p95) for a database connection, "
+                    f"consider increasing pool_size from {pool_size} to {recommended}"
+                ),
+                "current_value": pool_size,
+                "recommended_value": recommended,
+                "threshold": self.alert_thresholds["max_checkout_wait_p95"],
+                "evidence": evidence,
+                "recommendation": "Increase pool_size, or shorten transactions holding connections"
+            }
+        
+        if wait["p99"] < self.alert_thresholds["idle_checkout_wait_p99"] and peak < pool_size / 2:
+            recommended = max(needed, peak + 1, 2)
+            if recommended < pool_size:
+                return {
+                    "type": "pool_size",
+                    "severity": "low",
+                    "message": (
+                        f"At most {peak} of {pool_size} pooled connections were in use, "
+                        f"pool_size could be reduced to {recommended}"
+                    ),
+                    "current_value": pool_size,
+                    "recommended_value": recommended,
+                    "threshold": self.alert_thresholds["idle_checkout_wait_p99"],
+                    "evidence": evidence,
+                    "recommendation": "Reduce pool_size to free database connections for other services"
+                }
+        return None
     
     async def get_optimization_recommendations(self) -> List[Dict[str, Any]]:
         """Get optimization recommendations based on current stats"""
@@ -261,6 +338,11 @@ class ConnectionPoolMonitor:
                 "recommendation": "Review connection usage patterns and consider connection pooling strategies"
             })
         
+        # Check pool size against observed checkout waits
+        pool_size_recommendation = self.recommend_pool_size(current_stats["pool_telemetry"])
+        if pool_size_recommendation:
+            recommendations.append(pool_size_recommendation)
+        
         # Check for idle connections in transaction
         idle_in_transaction = db_stats["idle_in_transaction"]
         if idle_in_transaction > 5:  # More than 5 idle in transaction
@@ -278,7 +360,7 @@ class ConnectionPoolMonitor:
     def _calculate_performance_metrics(
         self, 
         pool_stats: ConnectionPoolStats, 
-        db_stats: DatabaseConnectionStats
+        db_stats: Optional[DatabaseConnectionStats]
     ) -> PerformanceMetrics:
         """Calculate performance metrics from current stats"""
         
@@ -295,14 +377,12 @@ class ConnectionPoolMonitor:
             if (pool_stats.pool_size + pool_stats.overflow) > 0 else 0
         )
         
-        # Mock values for connection and query times
-        # In a real implementation, these would be tracked over time
-        avg_connection_time = 0.1  # 100ms
-        avg_query_time = 0.05  # 50ms
+        # Checkout wait and hold time (a session's queries) from pool telemetry
+        telemetry = self.get_pool_telemetry()
         
         return PerformanceMetrics(
-            avg_connection_time=avg_connection_time,
-            avg_query_time=avg_query_time,
+            avg_connection_time=telemetry["checkout_wait"]["mean"],
+            avg_query_time=telemetry["connection_hold"]["mean"],
             connection_utilization=connection_utilization,
             pool_efficiency=pool_efficiency,
             timestamp=datetime.now(timezone.utc)
@@ -310,89 +390,83 @@ class ConnectionPoolMonitor:
     
     async def _monitoring_loop(self, interval: int):
         """Main monitoring loop"""
+        tick = 0
         while self.monitoring_active:
             try:
-                # Get current stats
-                current_stats = await self.get_current_stats()
+                pool_stats = self._get_pool_stats()
+                now = datetime.now(timezone.utc)
+                self.stats_history.append({
+                    "timestamp": now,
+                    "pool_size": pool_stats.pool_size,
+                    "checked_in": pool_stats.checked_in,
+                    "checked_out": pool_stats.checked_out,
+                    "peak_checked_out": pool_telemetry.take_peak_checked_out(),
+                    "overflow": pool_stats.overflow,
+                    "utilization": pool_stats.checked_out / pool_stats.pool_size if pool_stats.pool_size > 0 else 0
+                })
                 
-                if "error" not in current_stats:
-                    # Store pool stats
-                    pool_stats = current_stats["pool_stats"]
-                    self.stats_history.append(ConnectionPoolStats(
-                        pool_size=pool_stats["pool_size"],
-                        checked_in=pool_stats["checked_in"],
-                        checked_out=pool_stats["checked_out"],
-                        overflow=pool_stats["overflow"],
-                        invalid=pool_stats.get("invalid", 0),
-                        pool_type=pool_stats["pool_type"],
-                        timestamp=datetime.now(timezone.utc)
-                    ))
-                    
-                    # Store database stats
-                    db_stats = current_stats["database_stats"]
-                    self.db_stats_history.append(DatabaseConnectionStats(
-                        total_connections=db_stats["total_connections"],
-                        active_connections=db_stats["active_connections"],
-                        idle_connections=db_stats["idle_connections"],
-                        idle_in_transaction=db_stats["idle_in_transaction"],
-                        max_connections=db_stats["max_connections"],
-                        timestamp=datetime.now(timezone.utc)
-                    ))
-                    
-                    # Store performance metrics
-                    performance = current_stats["performance_metrics"]
-                    self.performance_history.append(PerformanceMetrics(
-                        avg_connection_time=performance["avg_connection_time"],
-                        avg_query_time=performance["avg_query_time"],
-                        connection_utilization=performance["connection_utilization"],
-                        pool_efficiency=performance["pool_efficiency"],
-                        timestamp=datetime.now(timezone.utc)
-                    ))
-                    
-                    # Keep only last 24 hours of data
-                    cutoff_time = datetime.now(timezone.utc) - timedelta(hours=24)
-                    self.stats_history = [
-                        stats for stats in self.stats_history
-                        if stats.timestamp >= cutoff_time
-                    ]
-                    self.db_stats_history = [
-                        stats for stats in self.db_stats_history
-                        if stats.timestamp >= cutoff_time
-                    ]
-                    self.performance_history = [
-                        perf for perf in self.performance_history
-                        if perf.timestamp >= cutoff_time
-                    ]
+                if tick % DATABASE_STATS_EVERY == 0:
+                    db_stats = await self._get_database_stats()
+                    self.db_stats_history.append({
+                        "timestamp": now,
+                        "total_connections": db_stats.total_connections,
+                        "active_connections": db_stats.active_connections,
+                        "idle_connections": db_stats.idle_connections,
+                        "idle_in_transaction": db_stats.idle_in_transaction,
+                        "utilization": db_stats.total_connections / db_stats.max_connections if db_stats.max_connections > 0 else 0
+                    })
+                
+                telemetry = self.get_pool_telemetry()
+                performance = self._calculate_performance_metrics(pool_stats, None)
+                self.performance_history.append({
+                    "timestamp": now,
+                    "avg_connection_time": performance.avg_connection_time,
+                    "avg_query_time": performance.avg_query_time,
+                    "checkout_wait_p95": telemetry["checkout_wait"]["p95"],
+                    "connection_hold_p95": telemetry["connection_hold"]["p95"],
+                    "connection_utilization": performance.connection_utilization,
+                    "pool_efficiency": performance.pool_efficiency
+                })
                 
                 # Check for alerts
-                await self._check_alerts(current_stats)
+                await self._check_alerts(pool_stats, performance, telemetry)
                 
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
             
+            tick += 1
             await asyncio.sleep(interval)
     
-    async def _check_alerts(self, current_stats: Dict[str, Any]):
+    async def _check_alerts(
+        self,
+        pool_stats: ConnectionPoolStats,
+        performance: PerformanceMetrics,
+        telemetry: Dict[str, Any]
+    ):
         """Check for alert conditions and log warnings"""
-        if "error" in current_stats:
-            return
-        
-        pool_stats = current_stats["pool_stats"]
-        performance = current_stats["performance_metrics"]
+        utilization = pool_stats.checked_out / pool_stats.pool_size if pool_stats.pool_size > 0 else 0
         
         # Check pool utilization
-        if pool_stats["utilization"] > self.alert_thresholds["max_utilization"]:
+        if utilization > self.alert_thresholds["max_utilization"]:
             logger.warning(
-                f"High pool utilization: {pool_stats['utilization']:.1%} "
+                f"High pool utilization: {utilization:.1%} "
                 f"(threshold: {self.alert_thresholds['max_utilization']:.1%})"
             )
         
         # Check pool efficiency
-        if performance["pool_efficiency"] < self.alert_thresholds["min_pool_efficiency"]:
+        if performance.pool_efficiency < self.alert_thresholds["min_pool_efficiency"]:
             logger.warning(
-                f"Low pool efficiency: {performance['pool_efficiency']:.1%} "
+                f"Low pool efficiency: {performance.pool_efficiency:.1%} "
                 f"(threshold: {self.alert_thresholds['min_pool_efficiency']:.1%})"
             )
+        
+        # Check time spent waiting for a connection
+        wait_p95 = telemetry["checkout_wait"]["p95"]
+        if wait_p95 > self.alert_thresholds["max_checkout_wait_p95"]:
+            logger.warning(
+                f"Slow connection checkouts: p95 wait {wait_p95 * 1000:.0f}ms "
+                f"(threshold: {self.alert_thresholds['max_checkout_wait_p95'] * 1000:.0f}ms)"
+            )
 
 # Global monitor instance
 connection_monitor = ConnectionPoolMonitor()
@@ -22,6 +22,7 @@ from sqlalchemy.orm import selectinload
 
 from app.models import Folder, File, CustomerApplication
 from app.database import AsyncSessionLocal
+from app.services.folder_service import invalidate_application_folder_cache
 
 logger = logging.getLogger(__name__)
 
@@ -246,6 +247,7 @@ class DatabaseCleanupService:
                 
                 await db.commit()
                 
+            await invalidate_application_folder_cache(rollback_data.application_id)
             logger.info(f"Successfully rolled back cleanup for application {rollback_data.application_id}")
             
             # Clean up rollback data
@@ -340,6 +342,7 @@ class DatabaseCleanupService:
                 
                 await db.commit()
                 result.status = CleanupStatus.COMPLETED
+                await invalidate_application_folder_cache(application_id)
                 
                 logger.info(f"Successfully consolidated folders for application {application_id}")
                 logger.info(f"Removed {result.folders_removed} folders, moved {result.files_moved} files, merged {result.child_folders_merged} child folders")
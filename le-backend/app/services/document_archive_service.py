@@ -0,0 +1,304 @@
+"""
+Document Archive Service
+
+Streams an application's documents as a ZIP archive built on the fly:
+- Entries follow the application's Folder tree, optionally limited to one folder
+- Objects are read from MinIO in chunks, a few files ahead of the writer
+- Readers hand chunks over through small bounded queues, so memory use is
+  constant regardless of how many or how large the documents are
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+import zipfile
+from collections import defaultdict
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import File as FileModel, Folder
+from app.services.minio_service import minio_service
+
+logger = logging.getLogger(__name__)
+
+# Objects read ahead of the one being written
+ARCHIVE_READ_CONCURRENCY = 4
+ARCHIVE_CHUNK_SIZE = 256 * 1024
+# Chunks buffered per reader; memory ~ concurrency * queue size * chunk size
+ARCHIVE_QUEUE_CHUNKS = 4
+# Documents are mostly JPEG/PDF and barely compress; favour speed
+ARCHIVE_COMPRESS_LEVEL = 1
+# Threads reading objects for all archive downloads combined. Kept apart from
+# the default executor so large downloads cannot starve other to_thread work
+ARCHIVE_READER_THREADS = 16
+MISSING_FILES_ENTRY = "MISSING_FILES.txt"
+
+_reader_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=ARCHIVE_READER_THREADS, thread_name_prefix="archive-reader"
+)
+
+
+@dataclass
+class ArchiveEntry:
+    object_name: str
+    arcname: str
+    size: int
+    modified: Optional[datetime] = None
+
+
+class _ZipStreamSink:
+    """Write-only file object for zipfile; collected bytes are drained by the stream.
+
+    It deliberately has no seek(), so zipfile writes local headers followed
+    by data descriptors instead of seeking back to patch sizes in.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _safe_name(name: str) -> str:
+    """Strip path separators so names cannot escape their folder in the archive"""
+    cleaned = name.replace("/", "_").replace("\\", "_").strip()
+    return cleaned if cleaned not in ("", ".", "..") else "_"
+
+
+def _unique_arcname(arcname: str, used: Set[str]) -> str:
+    if arcname not in used:
+        used.add(arcname)
+        return arcname
+    base, ext = os.path.splitext(arcname)
+    counter = 2
+    while f"{base} ({counter}){ext}" in used:
+        counter += 1
+    unique = f"{base} ({counter}){ext}"
+    used.add(unique)
+    return unique
+
+
+async def collect_archive_entries(
+    db: AsyncSession,
+    application_id: UUID,
+    folder_id: Optional[UUID] = None
+) -> List[ArchiveEntry]:
+    """
+    List the files to archive with their path inside the ZIP.
+
+    Paths are built from folder names below the application's root folder, or
+    below ``folder_id`` when given, in which case only that folder and its
+    subfolders are included.
+
+    Raises:
+        ValueError: If folder_id does not belong to the application
+    """
+    folder_rows = (await db.execute(
+        select(Folder.id, Folder.name, Folder.parent_id)
+        .where(Folder.application_id == application_id)
+    )).all()
+    names = {row.id: row.name for row in folder_rows}
+    parents = {row.id: row.parent_id for row in folder_rows}
+
+    if folder_id is not None and folder_id not in names:
+        raise ValueError("Folder not found for this application")
+
+    path_cache: Dict[UUID, str] = {}
+
+    def folder_path(current: Optional[UUID]) -> str:
+        # Root folders and the requested base folder contribute no path segment
+        if current is None or current not in names or current == folder_id or parents[current] is None:
+            return ""
+        if current not in path_cache:
+            parent_path = folder_path(parents[current])
+            segment = _safe_name(names[current])
+            path_cache[current] = f"{parent_path}{segment}/"
+        return path_cache[current]
+
+    files_query = select(
+        FileModel.file_path,
+        FileModel.display_name,
+        FileModel.original_filename,
+        FileModel.file_size,
+        FileModel.folder_id,
+        FileModel.created_at
+    )
+    if folder_id is not None:
+        children = defaultdict(list)
+        for child_id, parent_id in parents.items():
+            children[parent_id].append(child_id)
+        subtree = {folder_id}
+        pending = [folder_id]
+        while pending:
+            for child_id in children[pending.pop()]:
+                if child_id not in subtree:
+                    subtree.add(child_id)
+                    pending.append(child_id)
+        files_query = files_query.where(FileModel.folder_id.in_(subtree))
+    elif names:
+        files_query = files_query.where(or_(
+            FileModel.application_id == application_id,
+            FileModel.folder_id.in_(list(names))
+        ))
+    else:
+        files_query = files_query.where(FileModel.application_id == application_id)
+
+    files_query = files_query.order_by(FileModel.created_at, FileModel.id)
+
+    entries: List[ArchiveEntry] = []
+    used: Set[str] = {MISSING_FILES_ENTRY}
+    for row in (await db.execute(files_query)).all():
+        name = _safe_name(row.display_name or row.original_filename)
+        entries.append(ArchiveEntry(
+            object_name=row.file_path,
+            arcname=_unique_arcname(folder_path(row.folder_id) + name, used),
+            size=row.file_size or 0,
+            modified=row.created_at
+        ))
+    return entries
+
+
+async def _read_object(
+    object_name: str,
+    queue: asyncio.Queue,
+    loop: asyncio.AbstractEventLoop,
+    stop: threading.Event
+) -> None:
+    """Feed an object's chunks into queue, then None (or the exception raised)"""
+
+    def pump() -> None:
+        # The download may have been abandoned while this waited for a thread
+        if stop.is_set():
+            return
+        with closing(minio_service.iter_file_content(object_name, ARCHIVE_CHUNK_SIZE)) as chunks:
+            for chunk in chunks:
+                if stop.is_set():
+                    return
+                future = asyncio.run_coroutine_threadsafe(queue.put(chunk), loop)
+                while True:
+                    try:
+                        future.result(timeout=1.0)
+                        break
+                    except concurrent.futures.TimeoutError:
+                        # The writer is gone (client disconnected); stop reading
+                        if stop.is_set():
+                            future.cancel()
+                            return
+
+    try:
+        await loop.run_in_executor(_reader_executor, pump)
+        await queue.put(None)
+    except Exception as e:
+        await queue.put(e)
+
+
+def _zip_info(entry: ArchiveEntry) -> zipfile.ZipInfo:
+    modified = entry.modified or datetime.now(timezone.utc)
+    info = zipfile.ZipInfo(entry.arcname, date_time=modified.timetuple()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    # ZipFile's compresslevel only applies to entries added by name; the
+    # attribute was renamed from _compresslevel in Python 3.13
+    if hasattr(info, "compress_level"):
+        info.compress_level = ARCHIVE_COMPRESS_LEVEL
+    else:
+        info._compresslevel = ARCHIVE_COMPRESS_LEVEL
+    # Only used by zipfile to decide whether the entry needs ZIP64 headers
+    info.file_size = entry.size
+    return info
+
+
+def shutdown() -> None:
+    """Stop the archive reader threads; pending reads are abandoned"""
+    _reader_executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def stream_zip(entries: List[ArchiveEntry]) -> AsyncIterator[bytes]:
+    """
+    Yield a ZIP archive of the given entries.
+
+    Up to ARCHIVE_READ_CONCURRENCY objects are downloaded concurrently while
+    the current one is compressed. Objects that cannot be read are skipped and
+    listed in MISSING_FILES.txt at the end of the archive.
+    """
+    loop = asyncio.get_running_loop()
+    stop = threading.Event()
+    sink = _ZipStreamSink()
+    queues: Dict[int, asyncio.Queue] = {}
+    readers: Dict[int, asyncio.Task] = {}
+    missing: List[str] = []
+    next_reader = 0
+
+    try:
+        with zipfile.ZipFile(
+            sink, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=ARCHIVE_COMPRESS_LEVEL
+        ) as archive:
+            for index, entry in enumerate(entries):
+                while next_reader < len(entries) and next_reader < index + ARCHIVE_READ_CONCURRENCY:
+                    queue = asyncio.Queue(maxsize=ARCHIVE_QUEUE_CHUNKS)
+                    queues[next_reader] = queue
+                    readers[next_reader] = asyncio.create_task(
+                        _read_object(entries[next_reader].object_name, queue, loop, stop)
+                    )
+                    next_reader += 1
+
+                queue = queues.pop(index)
+                item = await queue.get()
+                if isinstance(item, Exception):
+                    logger.error(f"Skipping {entry.object_name} in archive: {item}")
+                    missing.append(entry.arcname)
+                    await readers.pop(index)
+                    continue
+
+                with archive.open(_zip_info(entry), mode="w") as target:
+                    while item is not None:
+                        if isinstance(item, Exception):
+                            # Part of the entry is already sent; the archive can't be completed
+                            raise item
+                        target.write(item)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                        item = await queue.get()
+                await readers.pop(index)
+
+                data = sink.drain()
+                if data:
+                    yield data
+
+            if missing:
+                archive.writestr(
+                    MISSING_FILES_ENTRY,
+                    "The following documents could not be read from storage:\n" + "\n".join(missing) + "\n"
+                )
+
+        # Closing the archive writes the central directory
+        data = sink.drain()
+        if data:
+            yield data
+    finally:
+        stop.set()
+        for task in readers.values():
+            task.cancel()
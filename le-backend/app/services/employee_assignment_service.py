@@ -17,6 +17,7 @@ from app.models import (
 from app.schemas import EmployeeAssignmentCreate, EmployeeAssignmentUpdate, AssignmentRole
 from app.core.logging import get_logger
 from app.core.exceptions import ValidationError, ErrorCode
+from app.services.employee_service import invalidate_workload_cache
 from fastapi import HTTPException, status
 
 logger = get_logger(__name__)
@@ -155,6 +156,8 @@ class EmployeeAssignmentService:
         await db.refresh(assignment)
         await db.commit()
         
+        await invalidate_workload_cache()
+        
         logger.info(
             f"Assigned employee {employee_id} to application {application_id} "
             f"as {role.value} by user {assigned_by}"
@@ -279,6 +282,8 @@ class EmployeeAssignmentService:
         await db.refresh(assignment)
         await db.commit()
         
+        await invalidate_workload_cache()
+        
         logger.info(f"Updated assignment {assignment_id}")
         return assignment
     
@@ -315,6 +320,8 @@ class EmployeeAssignmentService:
         await db.flush()
         await db.commit()
         
+        await invalidate_workload_cache()
+        
         logger.info(f"Removed assignment {assignment_id} (soft delete)")
     
     @staticmethod
@@ -431,6 +438,8 @@ class EmployeeAssignmentService:
         await db.refresh(assignment)
         await db.commit()
         
+        await invalidate_workload_cache()
+        
         logger.info(
             f"Migrated portfolio_officer_name '{portfolio_name}' to employee {employee.id} "
             f"for application {application_id}"
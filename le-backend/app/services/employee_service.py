@@ -2,21 +2,66 @@
 Employee Service
 Handles business logic for employee management operations
 """
+import re
 from uuid import UUID
 from typing import Optional, List, Dict, Any, Tuple
 from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from sqlalchemy import func, or_, and_
-from app.models import Employee, ApplicationEmployeeAssignment, User, Department, Branch
+from sqlalchemy import func, or_, and_, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models import Employee, EmployeeCodeSequence, ApplicationEmployeeAssignment, User, Department, Branch
 from app.schemas import EmployeeCreate, EmployeeUpdate
 from app.core.logging import get_logger
 from app.core.exceptions import ValidationError, DuplicateFieldError, ErrorCode
+from app.services.cache_service import cache_service
 from fastapi import HTTPException, status
 
 logger = get_logger(__name__)
 
+WORKLOAD_CACHE_NAMESPACE = "workload"
+# Application status changes aren't invalidated explicitly; the TTL bounds staleness
+WORKLOAD_SUMMARY_CACHE_TTL = 300
+
+DEFAULT_CODE_START = "0001"
+# Trailing numbers longer than this don't fit a BIGINT counter and are ignored
+MAX_CODE_DIGITS = 18
+CODE_NUMBER_REGEX = re.compile(r'^(.*?)(\d+)$')
+# Transaction-level advisory lock serializing the first-use counter backfill
+CODE_SEQUENCE_INIT_LOCK_KEY = 7_260_036
+
+# One row per code family (prefix without the trailing number); the pattern
+# names match EmployeeService.classify_code_prefix
+REBUILD_CODE_SEQUENCES_SQL = text("""
+    INSERT INTO employee_code_sequences (prefix, pattern, last_value, width, code_count, updated_at)
+    SELECT prefix,
+           CASE
+               WHEN prefix = '' THEN 'sequential_numeric'
+               WHEN prefix ~ '^[A-Z]+-[0-9]{4}-$' THEN 'prefix_year_seq'
+               WHEN prefix ~ '^[A-Z]+-$' THEN 'prefix_seq'
+               ELSE 'custom'
+           END,
+           max(digits::bigint),
+           max(length(digits)),
+           count(*),
+           now()
+    FROM (
+        SELECT regexp_replace(employee_code, '[0-9]+$', '') AS prefix,
+               substring(employee_code from '[0-9]+$') AS digits
+        FROM employees
+        WHERE employee_code ~ '[0-9]+$'
+    ) AS codes
+    WHERE length(digits) <= :max_digits
+    GROUP BY prefix
+    ON CONFLICT (prefix) DO UPDATE SET
+        pattern = EXCLUDED.pattern,
+        last_value = GREATEST(employee_code_sequences.last_value, EXCLUDED.last_value),
+        width = EXCLUDED.width,
+        code_count = EXCLUDED.code_count,
+        updated_at = now()
+""")
+
 
 class NotFoundError(HTTPException):
     """Exception for resource not found"""
@@ -30,6 +75,11 @@ class ConflictError(HTTPException):
         super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
 
 
+async def invalidate_workload_cache() -> None:
+    """Drop cached workload summaries after assignments or employees change"""
+    await cache_service.delete_pattern("summary:*", WORKLOAD_CACHE_NAMESPACE)
+
+
 class EmployeeService:
     """Service for employee management operations"""
     
@@ -97,6 +147,7 @@ class EmployeeService:
         
         db.add(new_employee)
         await db.flush()
+        await EmployeeService.record_code_usage(db, new_employee.employee_code)
         await db.refresh(new_employee)
         
         # Eagerly load relationships before commit to avoid MissingGreenlet error
@@ -107,6 +158,8 @@ class EmployeeService:
         
         await db.commit()
         
+        await invalidate_workload_cache()
+        
         logger.info(f"Created employee: {new_employee.employee_code} (ID: {new_employee.id}) by user {created_by}")
         return new_employee
     
@@ -330,6 +383,8 @@ class EmployeeService:
         employee.updated_by = updated_by
         
         await db.flush()
+        if "employee_code" in update_data:
+            await EmployeeService.record_code_usage(db, employee.employee_code, new_code=False)
         await db.refresh(employee)
         
         # Eagerly load relationships before commit to avoid MissingGreenlet error
@@ -340,6 +395,8 @@ class EmployeeService:
         
         await db.commit()
         
+        await invalidate_workload_cache()
+        
         logger.info(f"Updated employee: {employee.employee_code} (ID: {employee.id}) by user {updated_by}")
         return employee
     
@@ -375,6 +432,8 @@ class EmployeeService:
         await db.refresh(employee)
         await db.commit()
         
+        await invalidate_workload_cache()
+        
         logger.info(f"Deactivated employee: {employee.employee_code} (ID: {employee.id}) by user {updated_by}")
         return employee
     
@@ -483,6 +542,60 @@ class EmployeeService:
         logger.info(f"Linked employee {employee.employee_code} to user {user_id} by user {updated_by}")
         return employee
     
+    @staticmethod
+    def _workload_counts_query(
+        status_filter: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ):
+        """
+        Active assignment counts per (employee, application status)
+        
+        Employees are outer joined so those without matching assignments
+        still appear, with a NULL status and a count of 0.
+        """
+        from app.models import CustomerApplication
+        
+        assignment_conditions = [
+            ApplicationEmployeeAssignment.employee_id == Employee.id,
+            ApplicationEmployeeAssignment.is_active == True
+        ]
+        if date_from:
+            assignment_conditions.append(ApplicationEmployeeAssignment.assigned_at >= date_from)
+        if date_to:
+            assignment_conditions.append(ApplicationEmployeeAssignment.assigned_at <= date_to)
+        
+        application_conditions = [ApplicationEmployeeAssignment.application_id == CustomerApplication.id]
+        if status_filter:
+            application_conditions.append(CustomerApplication.status == status_filter)
+        
+        # Inner join assignments to applications first, then outer join the pair
+        assignments = ApplicationEmployeeAssignment.__table__.join(
+            CustomerApplication.__table__, and_(*application_conditions)
+        )
+        
+        return select(
+            Employee.id,
+            Employee.employee_code,
+            Employee.full_name_khmer,
+            Employee.full_name_latin,
+            Employee.position,
+            Department.id.label('department_id'),
+            Department.name.label('department_name'),
+            Branch.id.label('branch_id'),
+            Branch.name.label('branch_name'),
+            CustomerApplication.status,
+            func.count(ApplicationEmployeeAssignment.id).label('count')
+        ).select_from(Employee).outerjoin(
+            assignments, and_(*assignment_conditions)
+        ).outerjoin(
+            Department, Department.id == Employee.department_id
+        ).outerjoin(
+            Branch, Branch.id == Employee.branch_id
+        ).group_by(
+            Employee.id, Department.id, Branch.id, CustomerApplication.status
+        )
+    
     @staticmethod
     async def get_employee_workload(
         db: AsyncSession,
@@ -507,51 +620,19 @@ class EmployeeService:
         Raises:
             NotFoundError: If employee not found
         """
-        # Verify employee exists
-        employee = await EmployeeService.get_employee_by_id(db, employee_id, load_relationships=False)
-        if not employee:
+        query = EmployeeService._workload_counts_query(status_filter, date_from, date_to).where(
+            Employee.id == employee_id
+        )
+        rows = (await db.execute(query)).all()
+        
+        # No rows at all means the employee doesn't exist
+        if not rows:
             logger.warning(f"Attempted to get workload for non-existent employee: {employee_id}")
             raise NotFoundError(f"Employee not found")
         
-        # Build query for assignments
-        from app.models import CustomerApplication
-        
-        query = select(
-            CustomerApplication.status,
-            func.count(ApplicationEmployeeAssignment.id).label('count')
-        ).join(
-            ApplicationEmployeeAssignment,
-            ApplicationEmployeeAssignment.application_id == CustomerApplication.id
-        ).where(
-            and_(
-                ApplicationEmployeeAssignment.employee_id == employee_id,
-                ApplicationEmployeeAssignment.is_active == True
-            )
-        ).group_by(CustomerApplication.status)
-        
-        # Apply status filter if provided
-        if status_filter:
-            query = query.where(CustomerApplication.status == status_filter)
-        
-        # Apply date filters if provided
-        if date_from:
-            query = query.where(ApplicationEmployeeAssignment.assigned_at >= date_from)
-        
-        if date_to:
-            query = query.where(ApplicationEmployeeAssignment.assigned_at <= date_to)
-        
-        result = await db.execute(query)
-        status_counts = {row.status: row.count for row in result}
-        
-        # Get total assignments
-        total_query = select(func.count(ApplicationEmployeeAssignment.id)).where(
-            and_(
-                ApplicationEmployeeAssignment.employee_id == employee_id,
-                ApplicationEmployeeAssignment.is_active == True
-            )
-        )
-        total_result = await db.execute(total_query)
-        total_assignments = total_result.scalar()
+        status_counts = {row.status: row.count for row in rows if row.status is not None}
+        total_assignments = sum(status_counts.values())
+        employee = rows[0]
         
         workload = {
             "employee_id": str(employee_id),
@@ -565,101 +646,288 @@ class EmployeeService:
         logger.debug(f"Retrieved workload for employee {employee_id}: {total_assignments} total assignments")
         return workload
     
+    @staticmethod
+    async def get_workload_summary(
+        db: AsyncSession,
+        department_id: Optional[UUID] = None,
+        branch_id: Optional[UUID] = None,
+        status_filter: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Get workload of all active employees from one grouped query
+        
+        Results are cached until an assignment or employee changes (or the
+        TTL passes, which also covers application status changes).
+        
+        Args:
+            db: Database session
+            department_id: Optional department filter
+            branch_id: Optional branch filter
+            status_filter: Optional filter by application status
+            date_from: Optional start date for filtering assignments
+            date_to: Optional end date for filtering assignments
+            
+        Returns:
+            Dictionary with the per-employee summary, the status columns and a
+            dense counts matrix (one row per employee, one column per status)
+        """
+        cache_key = "summary:" + cache_service._generate_query_hash(
+            department_id=department_id,
+            branch_id=branch_id,
+            status_filter=status_filter,
+            date_from=date_from,
+            date_to=date_to
+        )
+        cached = await cache_service.get(cache_key, WORKLOAD_CACHE_NAMESPACE)
+        if cached is not None:
+            return cached
+        
+        query = EmployeeService._workload_counts_query(status_filter, date_from, date_to).where(
+            Employee.is_active == True
+        )
+        if department_id:
+            query = query.where(Employee.department_id == department_id)
+        if branch_id:
+            query = query.where(Employee.branch_id == branch_id)
+        rows = (await db.execute(query.order_by(Employee.employee_code))).all()
+        
+        statuses = sorted({row.status for row in rows if row.status is not None})
+        column = {name: index for index, name in enumerate(statuses)}
+        
+        employees: Dict[UUID, Dict[str, Any]] = {}
+        counts: Dict[UUID, List[int]] = {}
+        for row in rows:
+            if row.id not in employees:
+                employees[row.id] = {
+                    "employee_id": str(row.id),
+                    "employee_code": row.employee_code,
+                    "full_name_khmer": row.full_name_khmer,
+                    "full_name_latin": row.full_name_latin,
+                    "position": row.position,
+                    "department": {
+                        "id": str(row.department_id),
+                        "name": row.department_name
+                    } if row.department_id else None,
+                    "branch": {
+                        "id": str(row.branch_id),
+                        "name": row.branch_name
+                    } if row.branch_id else None
+                }
+                counts[row.id] = [0] * len(statuses)
+            if row.status is not None:
+                counts[row.id][column[row.status]] = row.count
+        
+        summary = []
+        for employee_key, employee in employees.items():
+            employee_counts = counts[employee_key]
+            summary.append({
+                **employee,
+                "workload": {
+                    "employee_id": employee["employee_id"],
+                    "employee_code": employee["employee_code"],
+                    "full_name_khmer": employee["full_name_khmer"],
+                    "full_name_latin": employee["full_name_latin"],
+                    "total_assignments": sum(employee_counts),
+                    "assignments_by_status": {
+                        name: employee_counts[index]
+                        for index, name in enumerate(statuses) if employee_counts[index]
+                    }
+                }
+            })
+        
+        matrix = [counts[employee_key] for employee_key in employees]
+        result = {
+            "summary": summary,
+            "total_employees": len(summary),
+            "statuses": statuses,
+            "matrix": matrix,
+            "status_totals": [sum(column_counts) for column_counts in zip(*matrix)] if matrix else [0] * len(statuses)
+        }
+        
+        await cache_service.set(cache_key, result, WORKLOAD_SUMMARY_CACHE_TTL, WORKLOAD_CACHE_NAMESPACE)
+        logger.debug(f"Computed workload summary for {len(summary)} employees")
+        return result
+    
+    @staticmethod
+    def split_code(code: str) -> Optional[Tuple[str, str]]:
+        """
+        Split an employee code into its prefix and trailing number
+        
+        Args:
+            code: Employee code, e.g. "EMP-2025-007"
+            
+        Returns:
+            Tuple of (prefix, digits), e.g. ("EMP-2025-", "007"), or None if the
+            code has no trailing number
+        """
+        match = CODE_NUMBER_REGEX.match(code)
+        if not match or len(match.group(2)) > MAX_CODE_DIGITS:
+            return None
+        return match.group(1), match.group(2)
+    
+    @staticmethod
+    def classify_code_prefix(prefix: str) -> str:
+        """Pattern name of a code family, matching detect_code_pattern"""
+        if prefix == "":
+            return "sequential_numeric"
+        if re.match(r'^[A-Z]+-\d{4}-$', prefix):
+            return "prefix_year_seq"
+        if re.match(r'^[A-Z]+-$', prefix):
+            return "prefix_seq"
+        return "custom"
+    
+    @staticmethod
+    def format_code(prefix: str, number: int, width: int) -> str:
+        return f"{prefix}{str(number).zfill(width)}"
+    
+    @staticmethod
+    async def record_code_usage(db: AsyncSession, code: str, new_code: bool = True) -> None:
+        """
+        Advance the code family counter past a code that is being stored
+        
+        Runs in the caller's transaction, so concurrent creations in the same
+        family are serialized on the counter row until commit.
+        
+        Args:
+            db: Database session
+            code: Employee code being created or assigned
+            new_code: Whether the code adds to the family's code count
+        """
+        parts = EmployeeService.split_code(code)
+        if not parts:
+            return
+        prefix, digits = parts
+        
+        stmt = pg_insert(EmployeeCodeSequence).values(
+            prefix=prefix,
+            pattern=EmployeeService.classify_code_prefix(prefix),
+            last_value=int(digits),
+            width=len(digits),
+            code_count=1 if new_code else 0
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[EmployeeCodeSequence.prefix],
+            set_={
+                "last_value": func.greatest(EmployeeCodeSequence.last_value, stmt.excluded.last_value),
+                "width": func.greatest(EmployeeCodeSequence.width, stmt.excluded.width),
+                "code_count": EmployeeCodeSequence.code_count + stmt.excluded.code_count,
+                "updated_at": func.now()
+            }
+        )
+        await db.execute(stmt)
+    
+    @staticmethod
+    async def rebuild_code_sequences(db: AsyncSession) -> int:
+        """
+        Backfill or repair the code counters from existing employee codes
+        
+        Counters are only ever moved forward, so codes handed out by earlier
+        reservations are not issued again.
+        
+        Args:
+            db: Database session
+            
+        Returns:
+            Number of code families found
+        """
+        result = await db.execute(REBUILD_CODE_SEQUENCES_SQL, {"max_digits": MAX_CODE_DIGITS})
+        await db.commit()
+        logger.info(f"Rebuilt employee code sequences for {result.rowcount} code families")
+        return result.rowcount
+    
+    @staticmethod
+    def _natural_key(prefix: str) -> Tuple:
+        """Sort key comparing digit runs as numbers, so 'EMP-9-' sorts before 'EMP-10-'"""
+        return tuple(int(part) if part.isdigit() else part for part in re.split(r'(\d+)', prefix))
+    
+    @staticmethod
+    async def _ensure_code_sequences(db: AsyncSession) -> None:
+        """
+        Backfill the counters from existing codes if they were never initialized
+        
+        Only called from write paths. The migration normally does the backfill;
+        this covers databases created without it. The advisory lock is held
+        until the caller commits, so concurrent first writers backfill once.
+        """
+        await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CODE_SEQUENCE_INIT_LOCK_KEY})
+        if await db.scalar(select(EmployeeCodeSequence.prefix).limit(1)) is None:
+            await db.execute(REBUILD_CODE_SEQUENCES_SQL, {"max_digits": MAX_CODE_DIGITS})
+    
+    @staticmethod
+    async def _get_code_sequence(
+        db: AsyncSession,
+        pattern: Optional[str] = None,
+        prefix: Optional[str] = None
+    ) -> Optional[EmployeeCodeSequence]:
+        """
+        Pick the code family new codes are generated in (read-only)
+        
+        An explicit prefix selects that family. Without a pattern the dominant
+        pattern is used (over 80% of codes, as in detect_code_pattern). Within
+        a pattern, "EMP-{year}-" families pick the latest year; other patterns
+        pick the family with the most codes, so a stray prefix does not take
+        over the default.
+        """
+        if prefix is not None:
+            return await db.get(EmployeeCodeSequence, prefix)
+        
+        result = await db.execute(select(EmployeeCodeSequence))
+        sequences = result.scalars().all()
+        if not sequences:
+            return None
+        
+        if pattern:
+            candidates = [seq for seq in sequences if seq.pattern == pattern]
+        else:
+            total = sum(seq.code_count for seq in sequences)
+            pattern_counts: Dict[str, int] = {}
+            for seq in sequences:
+                pattern_counts[seq.pattern] = pattern_counts.get(seq.pattern, 0) + seq.code_count
+            dominant = [name for name, count in pattern_counts.items() if count > total * 0.8]
+            candidates = [seq for seq in sequences if seq.pattern in dominant] or list(sequences)
+        
+        if not candidates:
+            return None
+        if all(seq.pattern == "prefix_year_seq" for seq in candidates):
+            return max(candidates, key=lambda seq: EmployeeService._natural_key(seq.prefix))
+        return max(candidates, key=lambda seq: (seq.code_count, EmployeeService._natural_key(seq.prefix)))
+    
     @staticmethod
     async def get_next_available_code(
         db: AsyncSession,
-        pattern: Optional[str] = None
+        pattern: Optional[str] = None,
+        prefix: Optional[str] = None
     ) -> Dict[str, str]:
         """
         Get the next available employee code
         
+        Reads the family counter without reserving the code or writing
+        anything; use generate_code_batch to reserve codes.
+        
         Args:
             db: Database session
-            pattern: Optional code pattern (e.g., "EMP-{year}-{seq}")
+            pattern: Optional code pattern (e.g., "prefix_year_seq")
+            prefix: Optional code family, e.g. "EMP-2025-"; takes precedence over pattern
             
         Returns:
             Dictionary with 'code' and 'pattern' keys
         """
-        # Get all existing employee codes
-        query = select(Employee.employee_code).order_by(Employee.employee_code)
-        result = await db.execute(query)
-        existing_codes = [row[0] for row in result.fetchall()]
+        sequence = await EmployeeService._get_code_sequence(db, pattern, prefix)
         
-        # If no employees exist, return default starting code
-        if not existing_codes:
-            logger.debug("No existing employees, returning default code '0001'")
-            return {"code": "0001", "pattern": "sequential_numeric"}
+        if not sequence:
+            if prefix:
+                return {
+                    "code": EmployeeService.format_code(prefix, 1, len(DEFAULT_CODE_START)),
+                    "pattern": EmployeeService.classify_code_prefix(prefix)
+                }
+            logger.debug("No matching code sequence, returning default code '0001'")
+            return {"code": DEFAULT_CODE_START, "pattern": "sequential_numeric"}
         
-        # If pattern is provided, use it; otherwise detect pattern
-        if not pattern:
-            detected_pattern = EmployeeService.detect_code_pattern(existing_codes)
-            logger.debug(f"Detected pattern: {detected_pattern}")
-        else:
-            detected_pattern = pattern
-        
-        # Generate next code based on pattern
-        if detected_pattern == "sequential_numeric":
-            # Extract numeric codes and find max
-            numeric_codes = []
-            for code in existing_codes:
-                try:
-                    numeric_codes.append(int(code))
-                except ValueError:
-                    continue
-            
-            if numeric_codes:
-                max_code = max(numeric_codes)
-                next_code = str(max_code + 1).zfill(len(str(max_code)))
-                logger.debug(f"Next sequential numeric code: {next_code}")
-                return {"code": next_code, "pattern": "sequential_numeric"}
-            else:
-                return {"code": "0001", "pattern": "sequential_numeric"}
-        
-        elif detected_pattern.startswith("prefix_"):
-            # Handle prefix-based patterns (e.g., "EMP-2025-001")
-            # Extract prefix and find max sequence
-            import re
-            from datetime import datetime
-            
-            # Try to extract pattern components
-            prefix_match = re.match(r'^([A-Z]+-)?(\d{4}-)?(\d+)$', existing_codes[-1])
-            if prefix_match:
-                prefix = prefix_match.group(1) or ""
-                year_part = prefix_match.group(2) or ""
-                
-                # Extract all sequence numbers with same prefix
-                sequences = []
-                pattern_regex = f"^{re.escape(prefix)}{re.escape(year_part)}(\\d+)$"
-                for code in existing_codes:
-                    match = re.match(pattern_regex, code)
-                    if match:
-                        sequences.append(int(match.group(1)))
-                
-                if sequences:
-                    max_seq = max(sequences)
-                    next_seq = str(max_seq + 1).zfill(len(str(max_seq)))
-                    next_code = f"{prefix}{year_part}{next_seq}"
-                    logger.debug(f"Next prefix-based code: {next_code}")
-                    return {"code": next_code, "pattern": detected_pattern}
-        
-        # Fallback: increment last code numerically
-        last_code = existing_codes[-1]
-        try:
-            # Try to extract trailing number
-            import re
-            match = re.search(r'(\d+)$', last_code)
-            if match:
-                number = int(match.group(1))
-                prefix = last_code[:match.start()]
-                next_number = str(number + 1).zfill(len(match.group(1)))
-                next_code = f"{prefix}{next_number}"
-                logger.debug(f"Next code (fallback): {next_code}")
-                return {"code": next_code, "pattern": "custom"}
-        except Exception as e:
-            logger.warning(f"Error generating next code: {e}")
-        
-        # Ultimate fallback
-        return {"code": "0001", "pattern": "sequential_numeric"}
+        next_code = EmployeeService.format_code(sequence.prefix, sequence.last_value + 1, sequence.width)
+        logger.debug(f"Next employee code: {next_code} (pattern: {sequence.pattern})")
+        return {"code": next_code, "pattern": sequence.pattern}
     
     @staticmethod
     def detect_code_pattern(codes: List[str]) -> str:
@@ -744,15 +1012,20 @@ class EmployeeService:
     async def generate_code_batch(
         db: AsyncSession,
         count: int,
-        pattern: Optional[str] = None
+        pattern: Optional[str] = None,
+        prefix: Optional[str] = None
     ) -> List[str]:
         """
-        Generate a batch of available employee codes
+        Reserve a batch of employee codes
+        
+        The range is taken from the family counter in one atomic UPDATE, so
+        concurrent callers always receive disjoint codes.
         
         Args:
             db: Database session
             count: Number of codes to generate (max 100)
             pattern: Optional code pattern
+            prefix: Optional code family; takes precedence over pattern
             
         Returns:
             List of available employee codes
@@ -766,38 +1039,34 @@ class EmployeeService:
                 detail="Cannot generate more than 100 codes at once"
             )
         
-        generated_codes = []
+        await EmployeeService._ensure_code_sequences(db)
+        sequence = await EmployeeService._get_code_sequence(db, pattern, prefix)
+        if sequence:
+            prefix = sequence.prefix
+        else:
+            # No codes in this family yet (the plain numeric family by default)
+            prefix = prefix or ""
+            await db.execute(
+                pg_insert(EmployeeCodeSequence)
+                .values(prefix=prefix, pattern=EmployeeService.classify_code_prefix(prefix), last_value=0,
+                        width=len(DEFAULT_CODE_START), code_count=0)
+                .on_conflict_do_nothing(index_elements=[EmployeeCodeSequence.prefix])
+            )
         
-        # Get the first code
-        next_code_info = await EmployeeService.get_next_available_code(db, pattern)
-        current_code = next_code_info["code"]
-        detected_pattern = next_code_info["pattern"]
+        # Reserve the whole range with one atomic increment
+        result = await db.execute(
+            update(EmployeeCodeSequence)
+            .where(EmployeeCodeSequence.prefix == prefix)
+            .values(last_value=EmployeeCodeSequence.last_value + count, updated_at=func.now())
+            .returning(EmployeeCodeSequence.last_value, EmployeeCodeSequence.width)
+        )
+        last_value, width = result.one()
+        await db.commit()
         
-        for i in range(count):
-            # Check if code is available
-            availability = await EmployeeService.check_code_availability(db, current_code)
-            
-            if availability["available"]:
-                generated_codes.append(current_code)
-            
-            # Generate next code
-            if detected_pattern == "sequential_numeric":
-                try:
-                    next_num = int(current_code) + 1
-                    current_code = str(next_num).zfill(len(current_code))
-                except ValueError:
-                    break
-            else:
-                # For other patterns, increment the trailing number
-                import re
-                match = re.search(r'(\d+)$', current_code)
-                if match:
-                    number = int(match.group(1))
-                    prefix = current_code[:match.start()]
-                    next_number = str(number + 1).zfill(len(match.group(1)))
-                    current_code = f"{prefix}{next_number}"
-                else:
-                    break
+        generated_codes = [
+            EmployeeService.format_code(prefix, number, width)
+            for number in range(last_value - count + 1, last_value + 1)
+        ]
         
         logger.info(f"Generated {len(generated_codes)} employee codes")
         return generated_codes
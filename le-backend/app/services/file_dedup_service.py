@@ -0,0 +1,107 @@
+"""
+File Deduplication Service
+
+Content-addressed reuse of stored objects:
+- Uploads are hashed (SHA-256) and stored in File.content_hash
+- An upload whose hash already exists in the same application (or, for
+  unattached files, from the same uploader) points its File row at the
+  existing object instead of writing a new one
+- The reference count of an object is the number of File rows sharing its
+  file_path; the object is only removed when the last row is deleted
+"""
+
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import File as FileModel
+from app.services.file_preview_service import delete_file_previews
+from app.services.minio_service import minio_service
+
+logger = logging.getLogger(__name__)
+
+# Hash in a thread above this size so large uploads don't stall the event loop
+HASH_IN_THREAD_THRESHOLD = 1024 * 1024
+
+
+async def compute_content_hash(content: bytes) -> str:
+    """SHA-256 hex digest of file content"""
+    if len(content) > HASH_IN_THREAD_THRESHOLD:
+        return await asyncio.to_thread(lambda: hashlib.sha256(content).hexdigest())
+    return hashlib.sha256(content).hexdigest()
+
+
+async def find_reusable_file(
+    db: AsyncSession,
+    content_hash: str,
+    application_id: Optional[UUID],
+    uploaded_by: UUID
+) -> Optional[FileModel]:
+    """
+    Find a stored file with the same content within the same data boundary.
+
+    Reuse is limited to files of the same application; files not attached to
+    an application are only reused for the same uploader. An identical upload
+    elsewhere gets its own object, so one customer's object and preview
+    metadata are never shared with another's.
+
+    The row is locked FOR SHARE until the caller's transaction ends, so a
+    concurrent delete of that row waits and then sees the new reference
+    instead of removing the object underneath it.
+    """
+    query = select(FileModel).where(FileModel.content_hash == content_hash)
+    if application_id is not None:
+        query = query.where(FileModel.application_id == application_id)
+    else:
+        query = query.where(FileModel.application_id.is_(None), FileModel.uploaded_by == uploaded_by)
+
+    result = await db.execute(
+        query
+        .order_by(FileModel.created_at)
+        .limit(1)
+        .with_for_update(read=True)
+    )
+    return result.scalar_one_or_none()
+
+
+async def count_object_references(db: AsyncSession, object_name: str) -> int:
+    """Number of File rows pointing at a stored object"""
+    result = await db.execute(
+        select(func.count()).select_from(FileModel).where(FileModel.file_path == object_name)
+    )
+    return result.scalar_one()
+
+
+async def delete_file_record(db: AsyncSession, file: FileModel) -> bool:
+    """
+    Delete a File row and, if it held the last reference, its stored object.
+
+    The row is deleted and the remaining references are counted in the same
+    transaction; storage is only touched after the commit succeeded.
+
+    Returns:
+        True if the stored object (and its previews) were removed
+    """
+    object_name = file.file_path
+    await db.delete(file)
+    await db.flush()
+    remaining = await count_object_references(db, object_name)
+    await db.commit()
+
+    if remaining:
+        logger.info(f"Kept shared object {object_name} ({remaining} remaining references)")
+        return False
+
+    try:
+        minio_service.delete_file(object_name)
+        logger.info(f"Successfully deleted file from MinIO: {object_name}")
+    except Exception as e:
+        # Log error but don't fail the request
+        logger.error(f"Error deleting file from MinIO: {e}, file_path: {object_name}")
+    delete_file_previews(file)
+    return True
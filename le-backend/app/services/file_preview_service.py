@@ -0,0 +1,104 @@
+"""
+File Preview Service
+
+Generates WebP preview variants for uploaded images so document pages can
+load small previews instead of full-resolution scans:
+- Variants are rendered in the image worker pool (ImageOptimizationService.SIZES)
+- Stored in MinIO next to the original
+- Recorded on File.preview_variants as {size_name: object_name}
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import update
+
+from app.database import AsyncSessionLocal
+from app.models import File as FileModel
+from app.services.image_optimization_service import (
+    image_optimization_service,
+    render_image_variants,
+)
+from app.services.minio_service import minio_service
+
+logger = logging.getLogger(__name__)
+
+# Formats Pillow can decode; PDFs and office documents keep using the original
+PREVIEWABLE_MIME_TYPES = {'image/jpeg', 'image/png', 'image/gif', 'image/webp', 'image/bmp'}
+
+
+def is_previewable(mime_type: Optional[str]) -> bool:
+    return mime_type in PREVIEWABLE_MIME_TYPES
+
+
+async def generate_file_previews(file_id: UUID, object_name: str) -> None:
+    """
+    Render, store and record the preview variants of a file.
+
+    Intended to run as a background task; on failure the file simply keeps
+    no previews and clients fall back to the original.
+    """
+    try:
+        content = await asyncio.to_thread(minio_service.get_file_content, object_name)
+        variants = await image_optimization_service.run_in_pool(
+            render_image_variants, content, image_optimization_service.SIZES, 'webp'
+        )
+        del content
+
+        stored: Dict[str, str] = {}
+        for size_name, image_bytes in variants.items():
+            variant_name = image_optimization_service.variant_object_name(object_name, size_name)
+            await asyncio.to_thread(minio_service.put_object, variant_name, image_bytes, 'image/webp')
+            stored[size_name] = variant_name
+
+        async with AsyncSessionLocal() as session:
+            # Deduplicated uploads share the object, so record the previews on every row
+            await session.execute(
+                update(FileModel)
+                .where(FileModel.file_path == object_name)
+                .values(preview_variants=stored)
+            )
+            await session.commit()
+
+        logger.debug(f"Generated {len(stored)} preview variants for file {file_id}")
+    except Exception as e:
+        logger.error(f"Failed to generate previews for file {file_id}: {str(e)}")
+
+
+def delete_file_previews(file: FileModel) -> None:
+    """Remove stored preview variants of a file from MinIO"""
+    for variant_name in (file.preview_variants or {}).values():
+        try:
+            minio_service.delete_file(variant_name)
+        except Exception as e:
+            logger.error(f"Error deleting preview from MinIO: {e}, object: {variant_name}")
+
+
+def get_preview_urls(file: FileModel, expires_in: int = 3600) -> Dict[str, Any]:
+    """
+    Presigned URLs for a file's preview variants.
+
+    Returns:
+        Dictionary with preview_url (largest variant), thumbnail_url and srcset,
+        or an empty dictionary when the file has no previews
+    """
+    return get_variant_urls(file.preview_variants, expires_in)
+
+
+def get_variant_urls(preview_variants: Optional[Dict[str, str]], expires_in: int = 3600) -> Dict[str, Any]:
+    """Presigned preview_url, thumbnail_url and srcset for a {size_name: object_name} mapping"""
+    if not preview_variants:
+        return {}
+
+    urls = {
+        size_name: minio_service.get_file_url(variant_name, expires=expires_in)
+        for size_name, variant_name in preview_variants.items()
+    }
+    largest = max(urls, key=lambda size_name: image_optimization_service.SIZES.get(size_name, (0, 0))[0])
+    return {
+        "preview_url": urls.get('large') or urls[largest],
+        "thumbnail_url": urls.get('thumbnail'),
+        "srcset": image_optimization_service.generate_srcset_from_urls(urls),
+    }
@@ -1,14 +1,62 @@
-from uuid import UUID
-from typing import Dict, Optional, List, Tuple
+from uuid import UUID, uuid4
+from collections import defaultdict
+from typing import Any, Dict, Optional, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import func, text
 from app.models import Folder, File
+from app.services.cache_service import cache_service
 from app.core.logging import get_logger
 from enum import Enum
 
 logger = get_logger(__name__)
 
+# Cached folder hierarchies are invalidated on writes; the TTL is only a safety net
+FOLDER_CACHE_NAMESPACE = "folders"
+FOLDER_HIERARCHY_CACHE_TTL = 600
+
+# Folder ids per application, cached in Redis so repeat uploads skip the database.
+# Shared by all workers: explicit folder writes evict the entry through
+# invalidate_application_folder_cache, which every worker then sees.
+FOLDER_ID_CACHE_TTL = 3600
+
+# Creates the parent folder and the requested child folders, returning the ids of
+# every requested folder whether it was inserted now or already existed.
+_UPSERT_FOLDER_TREE_SQL = text("""
+    WITH parent_insert AS (
+        INSERT INTO folders (id, name, application_id, parent_id, created_at, updated_at)
+        VALUES (:parent_folder_id, :parent_name, :application_id, NULL, now(), now())
+        ON CONFLICT (application_id) WHERE parent_id IS NULL AND application_id IS NOT NULL
+        DO NOTHING
+        RETURNING id
+    ),
+    parent AS (
+        SELECT id FROM parent_insert
+        UNION ALL
+        SELECT id FROM folders
+        WHERE application_id = :application_id AND parent_id IS NULL
+        LIMIT 1
+    ),
+    requested AS (
+        SELECT * FROM unnest(CAST(:child_ids AS uuid[]), CAST(:child_names AS varchar[])) AS r(id, name)
+    ),
+    child_insert AS (
+        INSERT INTO folders (id, name, application_id, parent_id, created_at, updated_at)
+        SELECT requested.id, requested.name, :application_id, parent.id, now(), now()
+        FROM requested CROSS JOIN parent
+        ON CONFLICT (parent_id, name, application_id) WHERE parent_id IS NOT NULL
+        DO NOTHING
+        RETURNING id, name
+    )
+    SELECT 'parent_id' AS name, id FROM parent
+    UNION ALL
+    SELECT name, id FROM child_insert
+    UNION ALL
+    SELECT folders.name, folders.id
+    FROM folders JOIN parent ON folders.parent_id = parent.id
+    WHERE folders.name IN (SELECT name FROM requested)
+""")
+
 class DocumentType(Enum):
     """Document type enumeration for folder organization"""
     # Borrower documents
@@ -163,9 +211,99 @@ class EnhancedFolderService:
             logger.warning(f"No folder mapping found for document type: {document_type}")
             return None
         
-        return await EnhancedFolderService._get_or_create_folder_by_name(
-            db, application_id, folder_name
+        folder_ids = await EnhancedFolderService.ensure_application_folders(
+            db, application_id, [folder_name]
+        )
+        return folder_ids.get(folder_name)
+    
+    @staticmethod
+    async def ensure_application_folders(
+        db: AsyncSession,
+        application_id: UUID,
+        folder_names: Optional[List[str]] = None
+    ) -> Dict[str, UUID]:
+        """
+        Make sure the parent folder and the named child folders exist
+        
+        Served from the folder id cache when every requested folder is already
+        known; otherwise the missing folders are upserted in one statement.
+        
+        Args:
+            db: Database session
+            application_id: Application UUID
+            folder_names: Child folder names (defaults to the standard structure)
+            
+        Returns:
+            Dictionary mapping "parent_id" and each folder name to its UUID
+        """
+        if folder_names is None:
+            folder_names = FolderOrganizationConfig.STANDARD_FOLDERS
+        
+        cache_key = f"ids:{application_id}"
+        cached_ids = await cache_service.get(cache_key, FOLDER_CACHE_NAMESPACE)
+        cached = {name: UUID(folder_id) for name, folder_id in cached_ids.items()} if cached_ids else None
+        if cached is not None and all(name in cached for name in folder_names):
+            return cached
+        
+        missing = [name for name in folder_names if cached is None or name not in cached]
+        folder_ids = await EnhancedFolderService._upsert_folder_tree(db, application_id, missing)
+        await db.commit()
+        
+        merged = {**(cached or {}), **folder_ids}
+        await cache_service.set(
+            cache_key,
+            {name: str(folder_id) for name, folder_id in merged.items()},
+            FOLDER_ID_CACHE_TTL,
+            FOLDER_CACHE_NAMESPACE
         )
+        
+        # Folders may have been created, so the cached hierarchy is stale
+        await cache_service.delete(f"hierarchy:{application_id}", FOLDER_CACHE_NAMESPACE)
+        
+        return merged
+    
+    @staticmethod
+    async def _upsert_folder_tree(
+        db: AsyncSession,
+        application_id: UUID,
+        folder_names: List[str]
+    ) -> Dict[str, UUID]:
+        """
+        Create the parent folder and the given child folders in one round trip
+        
+        Relies on the partial unique indexes on ``folders`` so concurrent uploads
+        for the same application can never create duplicates. Rows created by a
+        concurrent transaction after this statement's snapshot are not visible to
+        it, so the statement is re-run once when a folder is missing.
+        
+        Args:
+            db: Database session
+            application_id: Application UUID
+            folder_names: Child folder names to ensure under the parent folder
+            
+        Returns:
+            Dictionary mapping "parent_id" and each folder name to its UUID
+        """
+        folder_ids: Dict[str, UUID] = {}
+        for _attempt in range(2):
+            result = await db.execute(
+                _UPSERT_FOLDER_TREE_SQL,
+                {
+                    "application_id": application_id,
+                    "parent_folder_id": uuid4(),
+                    "parent_name": f"Application {application_id} Files",
+                    "child_ids": [uuid4() for _ in folder_names],
+                    "child_names": list(folder_names),
+                }
+            )
+            folder_ids = {name: folder_id for name, folder_id in result.all()}
+            if "parent_id" in folder_ids and all(name in folder_ids for name in folder_names):
+                break
+        else:
+            raise RuntimeError(f"Could not resolve folder structure for application {application_id}")
+        
+        logger.debug(f"Folder structure resolved for application {application_id}: {list(folder_ids.keys())}")
+        return folder_ids
     
     @staticmethod
     async def _get_or_create_folder_by_name(
@@ -184,41 +322,10 @@ class EnhancedFolderService:
         Returns:
             Folder UUID
         """
-        # Ensure parent folder exists first
-        parent_folder = await EnhancedFolderService._get_or_create_parent_folder(
-            db, application_id
+        folder_ids = await EnhancedFolderService.ensure_application_folders(
+            db, application_id, [folder_name]
         )
-        
-        # Look for existing folder with this name
-        existing_folder_query = await db.execute(
-            select(Folder).where(
-                Folder.application_id == application_id,
-                Folder.parent_id == parent_folder.id,
-                Folder.name == folder_name
-            )
-        )
-        existing_folder = existing_folder_query.scalar_one_or_none()
-        
-        if existing_folder:
-            logger.debug(f"Found existing folder: {folder_name} for application {application_id}")
-            return existing_folder.id
-        
-        # Create new folder
-        new_folder = Folder(
-            name=folder_name,
-            application_id=application_id,
-            parent_id=parent_folder.id
-        )
-        db.add(new_folder)
-
-        await db.flush()
-
-        await db.refresh(new_folder)
-
-        await db.commit()
-
-        logger.info(f"Created new folder: {folder_name} for application {application_id}")
-        return new_folder.id
+        return folder_ids[folder_name]
     
     @staticmethod
     async def _get_or_create_parent_folder(
@@ -258,6 +365,7 @@ class EnhancedFolderService:
             await db.refresh(parent_folder)
 
             await db.commit()
+            await invalidate_application_folder_cache(application_id)
             logger.info(f"Created new parent folder for application {application_id}")
             return parent_folder
         
@@ -330,6 +438,7 @@ class EnhancedFolderService:
             logger.info(f"Deleted duplicate parent folder: {duplicate.name}")
         
         await db.commit()
+        await invalidate_application_folder_cache(primary_folder.application_id)
         return primary_folder
     
     @staticmethod
@@ -368,7 +477,7 @@ class EnhancedFolderService:
     async def get_application_folder_hierarchy(
         db: AsyncSession,
         application_id: UUID
-    ) -> Dict[str, any]:
+    ) -> Dict[str, Any]:
         """
         Get the complete folder hierarchy for an application
         
@@ -379,14 +488,25 @@ class EnhancedFolderService:
         Returns:
             Dictionary containing folder hierarchy with file counts
         """
-        # Get all folders for the application
+        cache_key = f"hierarchy:{application_id}"
+        cached_hierarchy = await cache_service.get(cache_key, FOLDER_CACHE_NAMESPACE)
+        if cached_hierarchy is not None:
+            return cached_hierarchy
+        
+        # Folders with their file counts; File rows themselves are never loaded
         folders_query = await db.execute(
-            select(Folder)
-            .options(selectinload(Folder.files))
+            select(
+                Folder.id,
+                Folder.name,
+                Folder.parent_id,
+                func.count(File.id).label("file_count")
+            )
+            .outerjoin(File, File.folder_id == Folder.id)
             .where(Folder.application_id == application_id)
+            .group_by(Folder.id, Folder.name, Folder.parent_id)
             .order_by(Folder.parent_id.asc(), Folder.name.asc())
         )
-        folders = folders_query.scalars().all()
+        folders = folders_query.all()
         
         # Build hierarchy
         hierarchy = {
@@ -395,34 +515,46 @@ class EnhancedFolderService:
             "total_files": 0
         }
         
-        # Find parent folders
-        parent_folders = [f for f in folders if f.parent_id is None]
-        
-        for parent in parent_folders:
-            parent_data = {
-                "id": str(parent.id),
-                "name": parent.name,
-                "file_count": len(parent.files),
-                "children": []
+        # Single pass: index children by parent while collecting top-level folders
+        parent_folders = []
+        children_by_parent: Dict[UUID, List[Dict[str, Any]]] = defaultdict(list)
+        for folder in folders:
+            folder_data = {
+                "id": str(folder.id),
+                "name": folder.name,
+                "file_count": folder.file_count
             }
-            
-            # Find child folders
-            child_folders = [f for f in folders if f.parent_id == parent.id]
-            for child in child_folders:
-                child_data = {
-                    "id": str(child.id),
-                    "name": child.name,
-                    "file_count": len(child.files)
-                }
+            if folder.parent_id is None:
+                folder_data["children"] = []
+                parent_folders.append((folder.id, folder_data))
+            else:
+                children_by_parent[folder.parent_id].append(folder_data)
+        
+        for parent_id, parent_data in parent_folders:
+            for child_data in children_by_parent.get(parent_id, []):
                 parent_data["children"].append(child_data)
                 parent_data["file_count"] += child_data["file_count"]
             
             hierarchy["folders"].append(parent_data)
             hierarchy["total_files"] += parent_data["file_count"]
         
+        await cache_service.set(cache_key, hierarchy, FOLDER_HIERARCHY_CACHE_TTL, FOLDER_CACHE_NAMESPACE)
         return hierarchy
 
 
+async def invalidate_application_folder_cache(application_id: Optional[UUID]) -> None:
+    """
+    Drop cached folder data for an application.
+    
+    Must be called after any write that adds, removes, renames or moves a folder,
+    or adds, removes or moves a file inside one of the application's folders.
+    """
+    if application_id is None:
+        return
+    await cache_service.delete(f"ids:{application_id}", FOLDER_CACHE_NAMESPACE)
+    await cache_service.delete(f"hierarchy:{application_id}", FOLDER_CACHE_NAMESPACE)
+
+
 async def get_or_create_application_folder_structure(db: AsyncSession, application_id: UUID) -> Dict[str, UUID]:
     """
     Ensures the standard folder structure exists for an application, creating it if necessary.
@@ -432,26 +564,14 @@ async def get_or_create_application_folder_structure(db: AsyncSession, applicati
     """
     logger.info(f"Creating/retrieving folder structure for application {application_id}")
     
-    # Get or create parent folder (handles duplicates automatically)
-    parent_folder = await EnhancedFolderService._get_or_create_parent_folder(db, application_id)
-    
-    # Initialize folder IDs dictionary with parent
-    folder_ids = {"parent_id": parent_folder.id}
-    
-    # Create standard folders using the new organization system
-    for folder_name in FolderOrganizationConfig.STANDARD_FOLDERS:
-        folder_id = await EnhancedFolderService._get_or_create_folder_by_name(
-            db, application_id, folder_name
-        )
-        folder_ids[folder_name] = folder_id
+    # Parent and all standard folders in a single upsert (or from the folder id cache)
+    folder_ids = dict(await EnhancedFolderService.ensure_application_folders(db, application_id))
     
     # Maintain backward compatibility with legacy folder names
     for legacy_name, modern_name in FolderOrganizationConfig.LEGACY_FOLDER_MAPPING.items():
         if modern_name in folder_ids:
             folder_ids[legacy_name] = folder_ids[modern_name]
     
-    await db.commit()
-    
     logger.info(f"Folder structure ready for application {application_id}: {list(folder_ids.keys())}")
     return folder_ids
 
@@ -481,7 +601,7 @@ async def get_folder_for_document_type(
 async def get_application_folder_hierarchy(
     db: AsyncSession,
     application_id: UUID
-) -> Dict[str, any]:
+) -> Dict[str, Any]:
     """
     Get the complete folder hierarchy for an application with file counts.
     
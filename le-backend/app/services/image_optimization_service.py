@@ -8,13 +8,168 @@ This service handles:
 - CDN-ready URL generation with longer expiry times
 """
 
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
-from typing import Optional, Tuple, Dict
+from typing import Any, Callable, Optional, Tuple, Dict
+import numpy as np
 from PIL import Image
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Encoder settings shared by the service and the worker processes
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+PNG_COMPRESSION = 6
+
+
+def _encode_image(img: Image.Image, output_format: str) -> bytes:
+    """Encode an image in the requested output format"""
+    buffer = BytesIO()
+    output_format = output_format.lower()
+
+    if output_format == 'webp':
+        img.save(
+            buffer,
+            format='WEBP',
+            quality=WEBP_QUALITY,
+            method=6  # Best compression
+        )
+    elif output_format == 'jpeg':
+        img.save(
+            buffer,
+            format='JPEG',
+            quality=JPEG_QUALITY,
+            optimize=True
+        )
+    elif output_format == 'png':
+        img.save(
+            buffer,
+            format='PNG',
+            compress_level=PNG_COMPRESSION,
+            optimize=True
+        )
+    else:
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+    return buffer.getvalue()
+
+
+def _prepare_image(img: Image.Image, output_format: str) -> Image.Image:
+    """Normalize the color mode for the output format"""
+    if output_format.lower() == 'jpeg' and img.mode in ('RGBA', 'LA', 'P'):
+        # Create white background
+        if img.mode != 'RGBA':
+            img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    if img.mode not in ('RGB', 'RGBA'):
+        return img.convert('RGB')
+    return img
+
+
+def _fit_within(size: Tuple[int, int], bounds: Tuple[int, int]) -> Tuple[int, int]:
+    """Largest size that keeps the aspect ratio and fits inside bounds"""
+    ratio = min(bounds[0] / size[0], bounds[1] / size[1])
+    return max(1, round(size[0] * ratio)), max(1, round(size[1] * ratio))
+
+
+def render_image_variants(
+    image_data: bytes,
+    sizes: Dict[str, Tuple[int, int]],
+    output_format: str = 'webp'
+) -> Dict[str, bytes]:
+    """
+    Decode an image once and encode one variant per size.
+
+    Module-level so it can run inside a worker process. JPEG sources are
+    decoded at a reduced scale with ``Image.draft`` and each variant is
+    resized from the previous (larger) one instead of from the original.
+
+    Args:
+        image_data: Raw image bytes
+        sizes: Mapping of variant name to maximum (width, height)
+        output_format: Output format ('webp', 'jpeg', 'png')
+
+    Returns:
+        Dictionary with size names as keys (in ``sizes`` order) and encoded bytes as values
+    """
+    ordered = sorted(sizes.items(), key=lambda item: item[1][0] * item[1][1], reverse=True)
+
+    source = Image.open(BytesIO(image_data))
+    if ordered and source.format == 'JPEG':
+        # Let libjpeg skip DCT coefficients we would throw away anyway
+        source.draft('RGB', ordered[0][1])
+    source.load()
+    current = _prepare_image(source, output_format)
+    # Only `current` keeps a reference from here on, so each resize below
+    # frees the previous, larger bitmap
+    del source
+
+    encoded: Dict[str, bytes] = {}
+    for size_name, dimensions in ordered:
+        if current.width > dimensions[0] or current.height > dimensions[1]:
+            current = current.resize(
+                _fit_within(current.size, dimensions),
+                Image.Resampling.LANCZOS
+            )
+        encoded[size_name] = _encode_image(current, output_format)
+
+    return {size_name: encoded[size_name] for size_name in sizes}
+
+
+# Laplacian variance at which a downscaled photo is considered fully sharp
+SHARPNESS_REFERENCE = 300.0
+
+
+def measure_image_quality(image_data: bytes, max_side: int = 512) -> Dict[str, float]:
+    """
+    Compute simple quality metrics for a photo.
+
+    The image is analysed as a grayscale copy no larger than ``max_side``:
+    brightness is the mean luminance, sharpness is the variance of the
+    Laplacian (low values mean blur) and contrast is the luminance spread.
+
+    Returns:
+        Dictionary with brightness (0-1), sharpness, contrast (0-1) and
+        quality_score (0-10, matching Selfie.image_quality_score)
+    """
+    img = Image.open(BytesIO(image_data))
+    if img.format == 'JPEG':
+        img.draft('L', (max_side, max_side))
+    gray = img.convert('L')
+    gray.thumbnail((max_side, max_side), Image.Resampling.BILINEAR)
+
+    pixels = np.asarray(gray, dtype=np.float32)
+    laplacian = (
+        pixels[:-2, 1:-1] + pixels[2:, 1:-1] + pixels[1:-1, :-2] + pixels[1:-1, 2:]
+        - 4.0 * pixels[1:-1, 1:-1]
+    )
+
+    brightness = float(pixels.mean()) / 255.0
+    sharpness = float(laplacian.var()) if laplacian.size else 0.0
+    contrast = min(1.0, float(pixels.std()) / 128.0)
+
+    sharpness_score = min(1.0, sharpness / SHARPNESS_REFERENCE)
+    exposure_score = max(0.0, 1.0 - abs(brightness - 0.5) * 2.0)
+    quality_score = 10.0 * (0.6 * sharpness_score + 0.3 * exposure_score + 0.1 * contrast)
+
+    return {
+        'brightness': round(brightness, 4),
+        'sharpness': round(sharpness, 2),
+        'contrast': round(contrast, 4),
+        'quality_score': round(quality_score, 2),
+    }
+
+
+def _default_worker_count() -> int:
+    return max(1, min(4, (os.cpu_count() or 1) - 1))
+
 class ImageOptimizationService:
     """Service for optimizing user profile photos"""
     
@@ -27,16 +182,86 @@ class ImageOptimizationService:
     }
     
     # Image quality settings
-    JPEG_QUALITY = 85
-    WEBP_QUALITY = 80
-    PNG_COMPRESSION = 6
+    JPEG_QUALITY = JPEG_QUALITY
+    WEBP_QUALITY = WEBP_QUALITY
+    PNG_COMPRESSION = PNG_COMPRESSION
     
     # CDN cache duration (7 days for profile photos)
     CDN_CACHE_DURATION = 7 * 24 * 60 * 60  # 7 days in seconds
     
-    def __init__(self):
-        """Initialize the image optimization service"""
-        pass
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize the image optimization service
+
+        Args:
+            max_workers: Worker processes for off-loop resizing. Defaults to
+                IMAGE_PROCESSING_WORKERS, or a CPU based value when that is 0.
+        """
+        self._max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the worker pool on first use"""
+        if self._executor is None:
+            max_workers = self._max_workers
+            if not max_workers:
+                from app.core.config import settings
+                max_workers = settings.IMAGE_PROCESSING_WORKERS or _default_worker_count()
+            # spawn avoids forking the event loop and open connections of the API process
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            logger.info(f"Started image processing pool with {max_workers} workers")
+        return self._executor
+    
+    def shutdown(self) -> None:
+        """Stop the worker pool, if it was started"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+    
+    def _discard_broken_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Drop a pool whose worker died so the next call starts a fresh one"""
+        if self._executor is executor:
+            logger.warning("Image processing pool is broken (a worker died), restarting it")
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    async def run_in_pool(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a module-level function in the worker pool
+
+        When a worker dies (OOM kill, crash) the whole ProcessPoolExecutor is
+        broken; it is replaced and the call retried once on the new pool.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            self._discard_broken_executor(executor)
+            executor = self._get_executor()
+            try:
+                return await loop.run_in_executor(executor, func, *args)
+            except BrokenProcessPool:
+                self._discard_broken_executor(executor)
+                raise
+    
+    async def optimize_profile_photo_async(
+        self,
+        image_data: bytes,
+        output_format: str = 'webp'
+    ) -> Dict[str, bytes]:
+        """
+        Same as optimize_profile_photo, but runs in the worker pool so the
+        event loop is not blocked while images are decoded and encoded.
+        """
+        try:
+            return await self.run_in_pool(render_image_variants, image_data, self.SIZES, output_format)
+        except Exception as e:
+            logger.error(f"Failed to optimize profile photo: {str(e)}")
+            raise Exception(f"Image optimization failed: {str(e)}")
     
     def optimize_profile_photo(
         self, 
@@ -54,86 +279,11 @@ class ImageOptimizationService:
             Dictionary with size names as keys and optimized image bytes as values
         """
         try:
-            # Open the image
-            img = Image.open(BytesIO(image_data))
-            
-            # Convert RGBA to RGB if saving as JPEG
-            if output_format.lower() == 'jpeg' and img.mode in ('RGBA', 'LA', 'P'):
-                # Create white background
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-            elif img.mode not in ('RGB', 'RGBA'):
-                img = img.convert('RGB')
-            
-            # Generate optimized versions for each size
-            optimized_images = {}
-            
-            for size_name, dimensions in self.SIZES.items():
-                optimized_images[size_name] = self._resize_and_compress(
-                    img, dimensions, output_format
-                )
-            
-            return optimized_images
-            
+            return render_image_variants(image_data, self.SIZES, output_format)
         except Exception as e:
             logger.error(f"Failed to optimize profile photo: {str(e)}")
             raise Exception(f"Image optimization failed: {str(e)}")
     
-    def _resize_and_compress(
-        self, 
-        img: Image.Image, 
-        size: Tuple[int, int], 
-        output_format: str
-    ) -> bytes:
-        """
-        Resize and compress an image
-        
-        Args:
-            img: PIL Image object
-            size: Target size (width, height)
-            output_format: Output format
-            
-        Returns:
-            Compressed image bytes
-        """
-        # Create a copy to avoid modifying the original
-        img_copy = img.copy()
-        
-        # Resize using high-quality Lanczos resampling
-        img_copy.thumbnail(size, Image.Resampling.LANCZOS)
-        
-        # Save to bytes buffer with optimization
-        buffer = BytesIO()
-        
-        if output_format.lower() == 'webp':
-            img_copy.save(
-                buffer, 
-                format='WEBP', 
-                quality=self.WEBP_QUALITY,
-                method=6  # Best compression
-            )
-        elif output_format.lower() == 'jpeg':
-            img_copy.save(
-                buffer, 
-                format='JPEG', 
-                quality=self.JPEG_QUALITY,
-                optimize=True
-            )
-        elif output_format.lower() == 'png':
-            img_copy.save(
-                buffer, 
-                format='PNG', 
-                compress_level=self.PNG_COMPRESSION,
-                optimize=True
-            )
-        else:
-            raise ValueError(f"Unsupported output format: {output_format}")
-        
-        return buffer.getvalue()
-    
     def validate_image(self, image_data: bytes) -> Tuple[bool, Optional[str]]:
         """
         Validate that the uploaded file is a valid image
@@ -194,14 +344,32 @@ class ImageOptimizationService:
         if sizes is None:
             sizes = ['thumbnail', 'medium', 'large']
         
+        return self.generate_srcset_from_urls(
+            {size_name: base_url.replace('{size}', size_name) for size_name in sizes}
+        )
+    
+    def generate_srcset_from_urls(self, urls: Dict[str, str]) -> str:
+        """
+        Generate srcset attribute from one URL per size name
+        
+        Args:
+            urls: Mapping of size name to URL (e.g. individually presigned URLs)
+            
+        Returns:
+            srcset string for HTML img tag
+        """
         srcset_parts = []
-        for size_name in sizes:
+        for size_name, url in urls.items():
             if size_name in self.SIZES:
                 width = self.SIZES[size_name][0]
-                url = base_url.replace('{size}', size_name)
                 srcset_parts.append(f"{url} {width}w")
         
         return ", ".join(srcset_parts)
+    
+    def variant_object_name(self, object_name: str, size_name: str) -> str:
+        """Object name for a size variant stored next to the original"""
+        base, _ = os.path.splitext(object_name)
+        return f"{base}_{size_name}.webp"
 
 
 # Global instance
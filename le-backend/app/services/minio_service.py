@@ -1,6 +1,6 @@
 import os
 import re
-from typing import Optional
+from typing import BinaryIO, Iterator, Optional
 from minio import Minio
 from minio.error import S3Error
 import uuid
@@ -8,8 +8,12 @@ from urllib.parse import urlparse
 from io import BytesIO
 from datetime import timedelta, datetime
 from app.core.config import settings
+from app.core.instrumentation import instrument_client
 
 class MinIOService:
+    # Part size for uploads of unknown length (minimum allowed by S3 is 5MB)
+    STREAM_PART_SIZE = 10 * 1024 * 1024
+
     def __init__(self):
         # Use S3 variables as fallback if MinIO variables are empty
         endpoint = settings.MINIO_ENDPOINT or settings.S3_ENDPOINT
@@ -43,6 +47,8 @@ class MinIOService:
                 secure=secure,
                 http_client=None  # Let MinIO use default HTTP client
             )
+            # Count MinIO calls as storage time in the request timings
+            self.client = instrument_client(self.client, "storage")
         
         self.bucket_name = settings.MINIO_BUCKET_NAME or settings.S3_BUCKET_NAME
         self._enabled = self.client is not None
@@ -73,53 +79,107 @@ class MinIOService:
         If prefix is provided, the object will be stored under that prefix (folder-like path).
         It avoids overwriting by appending a unique suffix if the file exists.
         """
+        return self.upload_stream(
+            data=BytesIO(file_content),
+            length=len(file_content),
+            original_filename=original_filename,
+            content_type=content_type,
+            prefix=prefix,
+            field_name=field_name
+        )
+
+    def upload_stream(self, data: BinaryIO, length: int, original_filename: str, content_type: str = "application/octet-stream", prefix: Optional[str] = None, field_name: Optional[str] = None) -> str:
+        """Upload a file-like object to MinIO without reading it into memory first.
+        Pass length=-1 when the size is unknown; the object is then sent as a multipart upload.
+        Returns the object name, built the same way as upload_file.
+        """
         if not self.enabled:
             raise Exception("MinIO service not configured. Please check environment variables.")
         
         try:
-            file_extension = os.path.splitext(original_filename)[1]
+            object_name = self._build_object_name(original_filename, prefix, field_name)
+            
+            # Upload to MinIO
+            self.client.put_object(
+                bucket_name=self.bucket_name,
+                object_name=object_name,
+                data=data,
+                length=length,
+                content_type=content_type,
+                part_size=self.STREAM_PART_SIZE if length < 0 else 0
+            )
             
-            # Generate filename based on field_name if provided
-            if field_name and field_name.strip():
-                # Sanitize field_name: remove invalid characters and limit length
-                sanitized_field_name = self._sanitize_field_name(field_name.strip())
-                if sanitized_field_name:
-                    # Generate structured filename: {field_name}_{timestamp}_{unique_id}.{extension}
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    unique_id = str(uuid.uuid4())[:8]  # Use shorter UUID for readability
-                    unique_filename = f"{sanitized_field_name}_{timestamp}_{unique_id}{file_extension}"
-                else:
-                    # Fallback to original naming if field_name is invalid after sanitization
-                    base_filename = os.path.splitext(original_filename)[0]
-                    unique_filename = f"{base_filename}_{uuid.uuid4()}{file_extension}"
+            return object_name
+        except S3Error as e:
+            raise Exception(f"Failed to upload file: {e}")
+        except Exception as e:
+            raise Exception(f"Failed to upload file: {e}")
+
+    def _build_object_name(self, original_filename: str, prefix: Optional[str] = None, field_name: Optional[str] = None) -> str:
+        """Build a unique object name, optionally under a prefix."""
+        file_extension = os.path.splitext(original_filename)[1]
+        
+        # Generate filename based on field_name if provided
+        if field_name and field_name.strip():
+            # Sanitize field_name: remove invalid characters and limit length
+            sanitized_field_name = self._sanitize_field_name(field_name.strip())
+            if sanitized_field_name:
+                # Generate structured filename: {field_name}_{timestamp}_{unique_id}.{extension}
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                unique_id = str(uuid.uuid4())[:8]  # Use shorter UUID for readability
+                unique_filename = f"{sanitized_field_name}_{timestamp}_{unique_id}{file_extension}"
             else:
-                # Original naming convention when no field_name provided
+                # Fallback to original naming if field_name is invalid after sanitization
                 base_filename = os.path.splitext(original_filename)[0]
                 unique_filename = f"{base_filename}_{uuid.uuid4()}{file_extension}"
+        else:
+            # Original naming convention when no field_name provided
+            base_filename = os.path.splitext(original_filename)[0]
+            unique_filename = f"{base_filename}_{uuid.uuid4()}{file_extension}"
 
-            # Build object name with optional prefix
-            object_name = unique_filename
-            if prefix:
-                cleaned = prefix.strip('/').replace('..', '')
-                object_name = f"{cleaned}/{unique_filename}"
-            
-            # Convert bytes to BytesIO for MinIO
-            file_data = BytesIO(file_content)
-            
-            # Upload to MinIO
+        # Build object name with optional prefix
+        object_name = unique_filename
+        if prefix:
+            cleaned = prefix.strip('/').replace('..', '')
+            object_name = f"{cleaned}/{unique_filename}"
+        return object_name
+
+    def put_object(self, object_name: str, file_content: bytes, content_type: str = "application/octet-stream") -> str:
+        """Store bytes under an exact object name (used for derived files such as thumbnails)."""
+        if not self.enabled:
+            raise Exception("MinIO service not configured. Please check environment variables.")
+
+        try:
             self.client.put_object(
                 bucket_name=self.bucket_name,
                 object_name=object_name,
-                data=file_data,
+                data=BytesIO(file_content),
                 length=len(file_content),
                 content_type=content_type
             )
-            
             return object_name
         except S3Error as e:
             raise Exception(f"Failed to upload file: {e}")
         except Exception as e:
             raise Exception(f"Failed to upload file: {e}")
+
+    def get_file_content(self, object_name: str) -> bytes:
+        """Download an object's content"""
+        if not self.enabled:
+            raise Exception("MinIO service not configured. Please check environment variables.")
+
+        response = None
+        try:
+            response = self.client.get_object(self.bucket_name, object_name)
+            return response.read()
+        except S3Error as e:
+            raise Exception(f"Failed to download file: {e}")
+        except Exception as e:
+            raise Exception(f"Failed to download file: {e}")
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
     
     def _sanitize_field_name(self, field_name: str) -> str:
         """Sanitize field name to ensure it's safe for use in filenames.
@@ -223,6 +283,23 @@ class MinIOService:
         except Exception as e:
             raise Exception(f"Failed to get file info: {e}")
 
+    def iter_file_content(self, object_name: str, chunk_size: int = 256 * 1024) -> Iterator[bytes]:
+        """Yield an object's content in chunks without loading it into memory"""
+        if not self.enabled:
+            raise Exception("MinIO service not configured. Please check environment variables.")
+
+        response = None
+        try:
+            response = self.client.get_object(self.bucket_name, object_name)
+            for chunk in response.stream(chunk_size):
+                yield chunk
+        except S3Error as e:
+            raise Exception(f"Failed to download file: {e}")
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+
     def get_upload_url(self, original_filename: str, expires: int = 3600) -> dict:
         """Generate a presigned PUT URL for direct client upload."""
         if not self.enabled:
@@ -8,7 +8,7 @@ in-app notifications, notification preferences, and notification history trackin
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, literal, DateTime
+from sqlalchemy import select, insert, and_, or_, func, literal, DateTime
 from sqlalchemy.orm import selectinload
 from uuid import UUID
 import logging
@@ -32,20 +32,10 @@ class NotificationService:
         self.email_service = EmailService(db)
         self.audit_service = AuditService(db)
     
-    async def get_notification_preferences(self, user_id: UUID) -> Dict[str, Any]:
-        """Get user notification preferences"""
-        
-        # Get user
-        result = await self.db.execute(
-            select(User).where(User.id == user_id)
-        )
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            raise ValueError(f"User {user_id} not found")
-        
-        # Default notification preferences
-        default_preferences = {
+    @staticmethod
+    def _default_notification_preferences() -> Dict[str, Any]:
+        """Default notification preferences"""
+        return {
             'email_notifications': {
                 NotificationType.USER_WELCOME: True,
                 NotificationType.STATUS_CHANGE: True,
@@ -77,6 +67,20 @@ class NotificationService:
                 'end_time': '08:00'
             }
         }
+    
+    async def get_notification_preferences(self, user_id: UUID) -> Dict[str, Any]:
+        """Get user notification preferences"""
+        
+        # Get user
+        result = await self.db.execute(
+            select(User).where(User.id == user_id)
+        )
+        user = result.scalar_one_or_none()
+        
+        if not user:
+            raise ValueError(f"User {user_id} not found")
+        
+        default_preferences = self._default_notification_preferences()
         
         # In a real implementation, this would be stored in a user_preferences table
         # For now, we'll return defaults
@@ -121,6 +125,12 @@ class NotificationService:
         # In a real implementation, save to database
         return await self.get_notification_preferences(user_id)
     
+    async def get_notification_preferences_batch(self, user_ids: List[UUID]) -> Dict[UUID, Dict[str, Any]]:
+        """Notification preferences of many users in one query, keyed by user id; unknown users are left out"""
+        
+        result = await self.db.execute(select(User.id).where(User.id.in_(user_ids)))
+        return {user_id: self._default_notification_preferences() for user_id in result.scalars()}
+    
     async def send_notification(
         self,
         notification_type: str,
@@ -371,6 +381,100 @@ class NotificationService:
             # Don't rollback here as it might cause greenlet issues
             return False
     
+    async def send_in_app_notifications_batch(
+        self,
+        notification_type: str,
+        notifications: List[Dict[str, Any]],
+        priority: str = NotificationPriority.NORMAL
+    ) -> Dict[str, Any]:
+        """
+        Create in-app notifications for many users with one INSERT and one commit
+
+        Args:
+            notification_type: Notification type shared by the batch
+            notifications: Dicts with user_id, title, message and optional data
+            priority: Priority shared by the batch
+        """
+
+        results = {
+            'total_users': len(notifications),
+            'in_app_sent': 0,
+            'in_app_failed': 0,
+            'in_app_skipped': 0,
+            'errors': []
+        }
+        if not notifications:
+            return results
+
+        # Honour in-app preferences, as send_notification does per user
+        preferences = await self.get_notification_preferences_batch(
+            [notification['user_id'] for notification in notifications]
+        )
+        allowed = []
+        for notification in notifications:
+            user_preferences = preferences.get(notification['user_id'])
+            if user_preferences is None:
+                results['errors'].append(f"User {notification['user_id']} not found")
+            elif user_preferences['in_app_notifications'].get(notification_type, True):
+                allowed.append(notification)
+            else:
+                results['in_app_skipped'] += 1
+        notifications = allowed
+        if not notifications:
+            return results
+
+        try:
+            result = await self.db.execute(
+                insert(Notification).returning(Notification.id, Notification.user_id),
+                [
+                    {
+                        'user_id': notification['user_id'],
+                        'type': notification_type,
+                        'title': notification['title'],
+                        'message': notification['message'],
+                        'data': notification.get('data'),
+                        'priority': priority,
+                        'is_read': False,
+                        'is_dismissed': False
+                    }
+                    for notification in notifications
+                ]
+            )
+            created = result.all()
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Failed to create {len(notifications)} {notification_type} notifications: {str(e)}")
+            results['in_app_failed'] = len(notifications)
+            results['errors'].append(str(e))
+            return results
+
+        results['in_app_sent'] = len(created)
+
+        # Real-time delivery is best effort, as in _send_in_app_notification
+        if notification_pubsub.redis:
+            by_user = {notification['user_id']: notification for notification in notifications}
+            for row in created:
+                notification = by_user[row.user_id]
+                try:
+                    await notification_pubsub.publish_notification(
+                        user_id=str(row.user_id),
+                        notification={
+                            "id": str(row.id),
+                            "type": notification_type,
+                            "title": notification['title'],
+                            "message": notification['message'],
+                            "data": notification.get('data') or {},
+                            "priority": priority
+                        },
+                        priority=priority
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to send real-time notification: {e}")
+
+        logger.info(f"In-app notification batch sent: {len(created)} {notification_type} notifications")
+        return results
+
     async def send_welcome_notification(self, user: User) -> Dict[str, Any]:
         """Send welcome notification to new user"""
         
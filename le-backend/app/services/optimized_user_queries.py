@@ -11,7 +11,10 @@ from sqlalchemy.orm import selectinload, joinedload
 from datetime import datetime, timezone, timedelta
 from uuid import UUID
 
+import numpy as np
+
 from app.models import User, Department, Branch, Position
+from app.services.analytics_kernels import bucket_counts, category_counts, encode_categories, epoch_seconds
 from app.services.query_optimization_service import QueryOptimizationService, query_monitor
 
 
@@ -357,11 +360,17 @@ class OptimizedUserQueries:
         end_date = datetime.now(timezone.utc)
         start_date = end_date - timedelta(days=days)
         
-        # Base query with filters
-        base_query = select(User).options(
-            selectinload(User.department),
-            selectinload(User.branch),
-            selectinload(User.position)
+        # Column-only query; the metrics are computed on arrays, not ORM objects
+        base_query = select(
+            User.status,
+            User.role,
+            User.last_login_at,
+            Department.name.label('department_name'),
+            Branch.name.label('branch_name')
+        ).outerjoin(
+            Department, Department.id == User.department_id
+        ).outerjoin(
+            Branch, Branch.id == User.branch_id
         )
         
         if department_id:
@@ -372,75 +381,54 @@ class OptimizedUserQueries:
         # Execute optimized analytics queries
         async with self.optimizer.timed_query("optimized_analytics_execution"):
             result = await self.db.execute(base_query)
-            all_users = result.scalars().all()
+            rows = result.all()
         
         # Process analytics in memory (faster than complex SQL)
-        metrics = self._calculate_analytics_metrics(all_users, start_date, end_date)
+        metrics = self._calculate_analytics_metrics(rows, start_date, end_date)
         
         return metrics
     
-    def _calculate_analytics_metrics(self, users: List[User], start_date: datetime, end_date: datetime) -> Dict[str, Any]:
-        """Calculate analytics metrics from user data"""
+    def _calculate_analytics_metrics(self, rows: List[Any], start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """Calculate analytics metrics from user rows (status, role, last_login_at, department_name, branch_name)"""
+        
+        statuses, status_labels = encode_categories(row.status for row in rows)
+        roles, role_labels = encode_categories(row.role for row in rows)
+        departments, department_labels = encode_categories(row.department_name for row in rows)
+        branches, branch_labels = encode_categories(row.branch_name for row in rows)
+        last_logins = epoch_seconds(row.last_login_at for row in rows)
         
-        total_users = len(users)
-        active_users = [u for u in users if u.status == 'active']
+        total_users = len(rows)
+        active_mask = statuses == (status_labels.index('active') if 'active' in status_labels else -1)
+        active_users = int(np.count_nonzero(active_mask))
         
-        # Activity levels
+        # Activity levels of active users: dormant before 90 days ago,
+        # moderately active until 30 days ago, highly active since
         now = datetime.now(timezone.utc)
         active_threshold = now - timedelta(days=30)
         dormant_threshold = now - timedelta(days=90)
         
-        highly_active = []
-        moderately_active = []
-        dormant = []
-        never_logged = []
-        
-        for user in active_users:
-            if user.last_login_at is None:
-                never_logged.append(user)
-            elif user.last_login_at >= active_threshold:
-                highly_active.append(user)
-            elif user.last_login_at >= dormant_threshold:
-                moderately_active.append(user)
-            else:
-                dormant.append(user)
-        
-        # Role distribution
-        role_distribution = {}
-        for user in users:
-            role = user.role
-            role_distribution[role] = role_distribution.get(role, 0) + 1
-        
-        # Department distribution
-        department_distribution = {}
-        for user in users:
-            if user.department:
-                dept_name = user.department.name
-                department_distribution[dept_name] = department_distribution.get(dept_name, 0) + 1
-        
-        # Branch distribution
-        branch_distribution = {}
-        for user in users:
-            if user.branch:
-                branch_name = user.branch.name
-                branch_distribution[branch_name] = branch_distribution.get(branch_name, 0) + 1
+        active_logins = last_logins[active_mask]
+        dormant, moderately_active, highly_active = bucket_counts(
+            active_logins, [dormant_threshold.timestamp(), active_threshold.timestamp()]
+        ).tolist()
+        never_logged = int(np.count_nonzero(np.isnan(active_logins)))
         
         return {
             "overview": {
                 "total_users": total_users,
-                "active_users": len(active_users),
-                "inactive_users": total_users - len(active_users),
+                "active_users": active_users,
+                "inactive_users": total_users - active_users,
                 "analysis_period_days": (end_date - start_date).days
             },
             "activity_levels": {
-                "highly_active": len(highly_active),
-                "moderately_active": len(moderately_active),
-                "dormant": len(dormant),
-                "never_logged_in": len(never_logged)
+                "highly_active": highly_active,
+                "moderately_active": moderately_active,
+                "dormant": dormant,
+                "never_logged_in": never_logged
             },
-            "role_distribution": role_distribution,
-            "department_distribution": department_distribution,
-            "branch_distribution": branch_distribution,
+            "role_distribution": category_counts(roles, role_labels),
+            "department_distribution": category_counts(departments, department_labels, skip_none=True),
+            "branch_distribution": category_counts(branches, branch_labels, skip_none=True),
             "generated_at": datetime.now(timezone.utc).isoformat()
         }
     
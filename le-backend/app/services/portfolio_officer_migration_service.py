@@ -0,0 +1,383 @@
+"""
+Portfolio Officer Migration Service
+
+Batch migration of legacy portfolio_officer_name values to employee assignments:
+- Active employees are loaded once into an in-memory name index (Khmer + Latin)
+- Names are matched exactly first, then by Levenshtein ratio (fuzzywuzzy)
+- Applications are processed in id-ordered chunks; each chunk is written with
+  bulk inserts and a single UPDATE, then committed
+- Progress goes to an optional callback (the background job queue) and a
+  checkpoint in Redis lets an interrupted run resume after the last chunk
+"""
+
+import asyncio
+import logging
+import re
+import unicodedata
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from fuzzywuzzy import fuzz
+from sqlalchemy import and_, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.models import ApplicationEmployeeAssignment, CustomerApplication, Employee, User
+from app.schemas import AssignmentRole
+from app.services.cache_service import cache_service
+from app.services.employee_service import EmployeeService, invalidate_workload_cache
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_CHUNK_SIZE = 500
+FUZZY_MATCH_THRESHOLD = 80  # Minimum fuzz.ratio score for a match
+# Assignments are recognised by this note when the migration is reverted
+MIGRATION_NOTE_PREFIX = "Migrated from portfolio_officer_name"
+
+CHECKPOINT_NAMESPACE = "migration"
+CHECKPOINT_KEY = "portfolio_officer"
+CHECKPOINT_TTL = 7 * 24 * 3600
+
+# generate_code_batch reserves at most this many codes per call
+CODE_BATCH_LIMIT = 100
+
+# Zero-width characters are common in typed Khmer names
+_INVISIBLE_CHARS = re.compile(r"[\u200b\u200c\u200d\u2060\ufeff]")
+
+# Runs from the API and the job queue must not create duplicate employees
+_migration_lock = asyncio.Lock()
+
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """
+    Canonical form of a person's name for matching.
+
+    Unicode is NFC-normalized and case-folded, punctuation becomes a space and
+    whitespace is collapsed. Combining marks are kept since Khmer vowels and
+    diacritics are combining characters.
+    """
+    text = _INVISIBLE_CHARS.sub("", unicodedata.normalize("NFC", name or ""))
+    text = "".join(" " if unicodedata.category(char).startswith("P") else char for char in text)
+    return " ".join(text.casefold().split())
+
+
+class EmployeeNameIndex:
+    """In-memory lookup of employees by normalized Khmer and Latin name"""
+
+    def __init__(self, threshold: int = FUZZY_MATCH_THRESHOLD):
+        self.threshold = threshold
+        self._exact: Dict[str, UUID] = {}
+        self._names: List[Tuple[str, UUID]] = []
+        # Officer names repeat across many applications
+        self._matches: Dict[str, Optional[Tuple[UUID, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, employee_id: UUID, *names: Optional[str]) -> None:
+        for name in names:
+            key = normalize_name(name)
+            if not key:
+                continue
+            self._exact.setdefault(key, employee_id)
+            self._names.append((key, employee_id))
+        self._matches.clear()
+
+    def match(self, name: Optional[str]) -> Optional[Tuple[UUID, int]]:
+        """
+        Best matching employee for a name.
+
+        Returns:
+            (employee_id, score) or None if no name reaches the threshold
+        """
+        key = normalize_name(name)
+        if not key:
+            return None
+        if key in self._matches:
+            return self._matches[key]
+
+        if key in self._exact:
+            result = (self._exact[key], 100)
+        else:
+            result = None
+            best_score = 0
+            length = len(key)
+            for candidate, employee_id in self._names:
+                # ratio() is at most 200 * shorter / (sum of lengths); skip names that can't reach the threshold
+                if 200 * min(length, len(candidate)) < self.threshold * (length + len(candidate)):
+                    continue
+                score = fuzz.ratio(key, candidate)
+                if score > best_score and score >= self.threshold:
+                    best_score = score
+                    result = (employee_id, score)
+
+        self._matches[key] = result
+        return result
+
+
+@dataclass
+class MigrationReport:
+    total: int = 0
+    processed: int = 0
+    matched: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: List[str] = field(default_factory=list)
+    last_application_id: Optional[str] = None
+    resumed: bool = False
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "processed": self.processed,
+            "matched": self.matched,
+            "created": self.created,
+            "failed": self.failed,
+            "percent": round(self.processed * 100 / self.total, 1) if self.total else 100.0
+        }
+
+
+async def load_checkpoint() -> Optional[Dict[str, Any]]:
+    return await cache_service.get(CHECKPOINT_KEY, CHECKPOINT_NAMESPACE)
+
+
+async def clear_checkpoint() -> None:
+    await cache_service.delete(CHECKPOINT_KEY, CHECKPOINT_NAMESPACE)
+
+
+def _pending_condition():
+    return and_(
+        CustomerApplication.portfolio_officer_name.isnot(None),
+        CustomerApplication.portfolio_officer_name != '',
+        CustomerApplication.portfolio_officer_migrated == False
+    )
+
+
+class PortfolioOfficerMigrator:
+    """Migrates pending applications chunk by chunk"""
+
+    def __init__(
+        self,
+        performed_by: Optional[UUID] = None,
+        chunk_size: int = MIGRATION_CHUNK_SIZE,
+        dry_run: bool = False,
+        progress: Optional[ProgressCallback] = None
+    ):
+        self.performed_by = performed_by
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.progress = progress
+
+    async def _get_system_user_id(self, db: AsyncSession) -> UUID:
+        """Admin user to record as creator when the run wasn't started by a user"""
+        result = await db.execute(select(User.id).where(User.role == 'admin').limit(1))
+        user_id = result.scalar_one_or_none()
+        if user_id is None:
+            result = await db.execute(select(User.id).limit(1))
+            user_id = result.scalar_one_or_none()
+        if user_id is None:
+            raise ValueError("No users found in database. Cannot perform migration.")
+        return user_id
+
+    async def _build_index(self, db: AsyncSession) -> EmployeeNameIndex:
+        index = EmployeeNameIndex()
+        result = await db.execute(
+            select(Employee.id, Employee.full_name_khmer, Employee.full_name_latin)
+            .where(Employee.is_active == True)
+            .order_by(Employee.employee_code)
+        )
+        for row in result.all():
+            index.add(row.id, row.full_name_khmer, row.full_name_latin)
+        return index
+
+    async def _reserve_codes(self, db: AsyncSession, count: int) -> List[str]:
+        codes: List[str] = []
+        while len(codes) < count:
+            codes.extend(await EmployeeService.generate_code_batch(
+                db, min(CODE_BATCH_LIMIT, count - len(codes))
+            ))
+        return codes
+
+    async def _migrate_chunk(
+        self,
+        db: AsyncSession,
+        rows: List[Any],
+        index: EmployeeNameIndex,
+        report: MigrationReport,
+        user_id: Optional[UUID]
+    ) -> None:
+        names = {row.id: row.portfolio_officer_name.strip() for row in rows}
+        matches: Dict[UUID, UUID] = {}
+        unmatched: Dict[str, List[UUID]] = {}
+
+        for application_id, name in names.items():
+            if not normalize_name(name):
+                # Nothing to match; the application is just marked as migrated
+                continue
+            found = index.match(name)
+            if found:
+                matches[application_id] = found[0]
+            else:
+                unmatched.setdefault(normalize_name(name), []).append(application_id)
+        matched = len(matches)
+
+        # One new employee per distinct unmatched name; later applications match it
+        new_employees: List[Dict[str, Any]] = []
+        if unmatched:
+            # Codes are reserved (and committed) before this chunk writes anything
+            codes = [None] * len(unmatched) if self.dry_run else await self._reserve_codes(db, len(unmatched))
+            created_at = datetime.now().isoformat()
+            for code, application_ids in zip(codes, unmatched.values()):
+                name = names[application_ids[0]]
+                employee_id = uuid4()
+                new_employees.append({
+                    "id": employee_id,
+                    "employee_code": code,
+                    "full_name_khmer": name,
+                    "full_name_latin": name,
+                    "phone_number": "N/A",  # Required field, but we don't have it
+                    "is_active": True,
+                    "notes": f"Auto-created during portfolio officer migration on {created_at}",
+                    "created_by": user_id
+                })
+                index.add(employee_id, name)
+                for application_id in application_ids:
+                    matches[application_id] = employee_id
+                matched += len(application_ids) - 1
+
+        if not self.dry_run:
+            if new_employees:
+                await db.execute(insert(Employee), new_employees)
+                for employee in new_employees:
+                    await EmployeeService.record_code_usage(db, employee["employee_code"])
+
+            if matches:
+                assignments = pg_insert(ApplicationEmployeeAssignment).values([
+                    {
+                        "id": uuid4(),
+                        "application_id": application_id,
+                        "employee_id": employee_id,
+                        "assignment_role": AssignmentRole.PRIMARY_OFFICER.value,
+                        "assigned_by": user_id,
+                        "is_active": True,
+                        "notes": f"{MIGRATION_NOTE_PREFIX}: {names[application_id]}"
+                    }
+                    for application_id, employee_id in matches.items()
+                ])
+                # Reactivate assignments left inactive by a reverted migration
+                await db.execute(assignments.on_conflict_do_update(
+                    index_elements=[
+                        ApplicationEmployeeAssignment.application_id,
+                        ApplicationEmployeeAssignment.employee_id,
+                        ApplicationEmployeeAssignment.assignment_role
+                    ],
+                    set_={"is_active": True}
+                ))
+            await db.execute(
+                update(CustomerApplication)
+                .where(CustomerApplication.id.in_(list(names)))
+                .values(portfolio_officer_migrated=True)
+            )
+            await db.commit()
+
+        report.matched += matched
+        report.created += len(new_employees)
+
+    async def run(self, resume: bool = True) -> Dict[str, Any]:
+        """
+        Migrate all pending applications.
+
+        Args:
+            resume: Continue after the last committed chunk of an interrupted run
+
+        Returns:
+            Report with total, matched, created, failed and errors
+        """
+        if _migration_lock.locked():
+            raise RuntimeError("A portfolio officer migration is already running")
+
+        async with _migration_lock:
+            report = MigrationReport()
+            checkpoint = await load_checkpoint() if resume and not self.dry_run else None
+            if checkpoint:
+                report = MigrationReport(**{**checkpoint, "errors": [], "resumed": True})
+                logger.info(f"Resuming portfolio officer migration after application {report.last_application_id}")
+
+            async with AsyncSessionLocal() as db:
+                try:
+                    user_id = self.performed_by or await self._get_system_user_id(db)
+                    index = await self._build_index(db)
+                    cursor = UUID(report.last_application_id) if report.last_application_id else None
+
+                    count_query = select(func.count()).select_from(CustomerApplication).where(_pending_condition())
+                    if cursor is not None:
+                        count_query = count_query.where(CustomerApplication.id > cursor)
+                    report.total = report.processed + (await db.execute(count_query)).scalar_one()
+                    logger.info(
+                        f"Migrating {report.total - report.processed} applications against "
+                        f"{len(index)} employee names (dry_run={self.dry_run})"
+                    )
+
+                    while True:
+                        query = select(
+                            CustomerApplication.id, CustomerApplication.portfolio_officer_name
+                        ).where(_pending_condition())
+                        if cursor is not None:
+                            query = query.where(CustomerApplication.id > cursor)
+                        rows = (await db.execute(
+                            query.order_by(CustomerApplication.id).limit(self.chunk_size)
+                        )).all()
+                        if not rows:
+                            break
+
+                        try:
+                            await self._migrate_chunk(db, rows, index, report, user_id)
+                        except Exception as e:
+                            # Skip the chunk; its applications stay pending for a later run or manual match
+                            await db.rollback()
+                            report.failed += len(rows)
+                            report.errors.append(f"Failed to migrate applications {rows[0].id}..{rows[-1].id}: {str(e)}")
+                            logger.error(report.errors[-1])
+                            # Drop employees the rolled back chunk added to the index
+                            index = await self._build_index(db)
+
+                        cursor = rows[-1].id
+                        report.processed += len(rows)
+                        report.last_application_id = str(cursor)
+                        if not self.dry_run:
+                            await cache_service.set(
+                                CHECKPOINT_KEY,
+                                {key: value for key, value in asdict(report).items() if key not in ("errors", "resumed")},
+                                CHECKPOINT_TTL,
+                                CHECKPOINT_NAMESPACE
+                            )
+                        if self.progress:
+                            await self.progress(report.progress())
+                except Exception as e:
+                    await db.rollback()
+                    report.errors.append(f"Migration failed with error: {str(e)}")
+                    logger.error(report.errors[-1])
+                    # Keep the checkpoint so the next run resumes here
+                    return self._result(report)
+
+            if not self.dry_run:
+                await clear_checkpoint()
+                if report.matched or report.created:
+                    await invalidate_workload_cache()
+
+            logger.info(
+                f"Portfolio officer migration finished: {report.processed} processed, "
+                f"{report.matched} matched, {report.created} created, {report.failed} failed"
+            )
+            return self._result(report)
+
+    @staticmethod
+    def _result(report: MigrationReport) -> Dict[str, Any]:
+        result = asdict(report)
+        result.pop("last_application_id")
+        return result
@@ -12,6 +12,7 @@ from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload, joinedload
 from sqlalchemy import text, func
 from contextlib import asynccontextmanager
+from app.core.instrumentation import observe_named_query
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +32,7 @@ class QueryOptimizationService:
             "timestamp": time.time()
         }
         self.query_stats.append(stats)
+        observe_named_query(query_name, execution_time)
         
         if execution_time > 1.0:  # Log slow queries
             logger.warning(f"Slow query detected: {query_name} took {execution_time:.2f}s")
@@ -0,0 +1,72 @@
+"""
+Selfie Post-Processing Service
+
+Runs after the upload response has been sent:
+- Thumbnail generation in the image worker pool
+- Blur/brightness quality scoring in the image worker pool
+- Storing the thumbnail next to the original and the score on the selfie
+"""
+
+import asyncio
+import logging
+import os
+from uuid import UUID
+
+from sqlalchemy import update
+
+from app.database import AsyncSessionLocal
+from app.models import Selfie
+from app.services.image_optimization_service import (
+    image_optimization_service,
+    measure_image_quality,
+    render_image_variants,
+)
+from app.services.minio_service import minio_service
+
+logger = logging.getLogger(__name__)
+
+SELFIE_THUMBNAIL_SIZES = {'thumbnail': (256, 256)}
+
+
+def selfie_thumbnail_path(object_name: str) -> str:
+    """Object name of the thumbnail stored for a selfie"""
+    base, _ = os.path.splitext(object_name)
+    return f"{base}_thumb.webp"
+
+
+async def process_selfie(selfie_id: UUID, object_name: str) -> None:
+    """
+    Create the thumbnail and quality score for an uploaded selfie.
+
+    Intended to run as a background task; failures are logged and leave the
+    selfie without a score rather than affecting the upload.
+    """
+    try:
+        content = await asyncio.to_thread(minio_service.get_file_content, object_name)
+
+        thumbnails, metrics = await asyncio.gather(
+            image_optimization_service.run_in_pool(
+                render_image_variants, content, SELFIE_THUMBNAIL_SIZES, 'webp'
+            ),
+            image_optimization_service.run_in_pool(measure_image_quality, content),
+        )
+        del content
+
+        await asyncio.to_thread(
+            minio_service.put_object,
+            selfie_thumbnail_path(object_name),
+            thumbnails['thumbnail'],
+            'image/webp'
+        )
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(Selfie)
+                .where(Selfie.id == selfie_id)
+                .values(image_quality_score=metrics['quality_score'])
+            )
+            await session.commit()
+
+        logger.debug(f"Processed selfie {selfie_id}: {metrics}")
+    except Exception as e:
+        logger.error(f"Failed to process selfie {selfie_id}: {str(e)}")
@@ -8,7 +8,7 @@ and performance tracking with advanced data aggregation and visualization suppor
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timezone, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, desc, case, text
+from sqlalchemy import select, func, and_, or_, desc, case, text, literal_column, null, tuple_, union_all
 from sqlalchemy.orm import selectinload
 from uuid import UUID
 import logging
@@ -18,9 +18,47 @@ from app.models import User, Department, Branch, Position, CustomerApplication
 from app.models.audit import AuditLog
 from app.services.audit_service import AuditService, ValidationEventType
 from app.core.config import settings
+from app.services.cache_service import cache_service
 
 logger = logging.getLogger(__name__)
 
+ANALYTICS_CACHE_NAMESPACE = "analytics"
+ACTIVITY_METRICS_CACHE_TTL = 300
+# The organizational snapshot lives with the user caches. User writes drop it
+# through UserCacheService.invalidate_user_cache() or
+# cache_service.invalidate_user_cache(); structure changes call
+# invalidate_organizational_metrics()
+USER_CACHE_NAMESPACE = "users"
+ORGANIZATIONAL_METRICS_CACHE_KEY = "user_analytics:organizational"
+ORGANIZATIONAL_METRICS_CACHE_TTL = 900
+# Users listed per activity level; the category counts are always exact
+ACTIVITY_LEVEL_USER_LIMIT = 100
+
+# One row per UTC day of the period, including days without new users
+USER_CREATION_TRENDS_SQL = text("""
+    SELECT day, count(u.id) AS users_created
+    FROM generate_series(
+        CAST(:first_day AS timestamptz), CAST(:last_day AS timestamptz), interval '1 day'
+    ) AS day
+    LEFT JOIN users u
+        ON u.created_at >= day AND u.created_at < day + interval '1 day'
+        AND (CAST(:department_id AS uuid) IS NULL OR u.department_id = CAST(:department_id AS uuid))
+        AND (CAST(:branch_id AS uuid) IS NULL OR u.branch_id = CAST(:branch_id AS uuid))
+    GROUP BY day
+    ORDER BY day
+""")
+
+
+async def invalidate_organizational_metrics():
+    """Drop the organizational metrics snapshot after a department, branch or position change"""
+    await cache_service.delete(ORGANIZATIONAL_METRICS_CACHE_KEY, USER_CACHE_NAMESPACE)
+
+
+def _whole_days(interval):
+    """Whole days in an interval, rounded down like timedelta.days"""
+    return func.floor(func.extract('epoch', interval) / 86400)
+
+
 class UserAnalyticsService:
     """Service for user activity analytics and organizational metrics"""
     
@@ -34,37 +72,37 @@ class UserAnalyticsService:
         department_id: Optional[UUID] = None,
         branch_id: Optional[UUID] = None
     ) -> Dict[str, Any]:
-        """Get comprehensive user activity metrics"""
+        """
+        Get comprehensive user activity metrics
         
-        end_date = datetime.now(timezone.utc)
-        start_date = end_date - timedelta(days=days)
+        Everything is aggregated in the database with a fixed number of grouped
+        queries; users are never loaded as a whole. Results are cached per
+        (days, department, branch).
+        """
         
-        # Base query with filters
-        base_query = select(User).options(
-            selectinload(User.department),
-            selectinload(User.branch),
-            selectinload(User.position)
+        cache_key = "user_analytics:" + cache_service._generate_query_hash(
+            days=days, department_id=department_id, branch_id=branch_id
         )
+        cached_metrics = await cache_service.get(cache_key, ANALYTICS_CACHE_NAMESPACE)
+        if cached_metrics:
+            return cached_metrics
         
-        if department_id:
-            base_query = base_query.where(User.department_id == department_id)
-        if branch_id:
-            base_query = base_query.where(User.branch_id == branch_id)
+        end_date = datetime.now(timezone.utc)
+        start_date = end_date - timedelta(days=days)
+        filters = self._user_filters(department_id, branch_id)
         
-        # Get all users
-        result = await self.db.execute(base_query)
-        all_users = result.scalars().all()
+        summary = await self._summarize_users(filters, end_date)
+        role_status_rows = await self._count_by_role_and_status(filters, end_date)
         
-        # Calculate activity metrics
         metrics = {
-            'overview': await self._calculate_activity_overview(all_users, days),
-            'login_patterns': await self._analyze_login_patterns(all_users, start_date, end_date),
-            'role_distribution': await self._analyze_role_distribution(all_users),
-            'status_distribution': await self._analyze_status_distribution(all_users),
-            'activity_levels': await self._categorize_activity_levels(all_users),
-            'onboarding_metrics': await self._analyze_onboarding_metrics(all_users),
-            'geographic_distribution': await self._analyze_geographic_distribution(all_users),
-            'productivity_metrics': await self._calculate_productivity_metrics(all_users, start_date, end_date),
+            'overview': self._calculate_activity_overview(summary),
+            'login_patterns': self._analyze_login_patterns(summary),
+            'role_distribution': self._analyze_role_distribution(role_status_rows),
+            'status_distribution': self._analyze_status_distribution(role_status_rows),
+            'activity_levels': await self._categorize_activity_levels(filters, summary, end_date),
+            'onboarding_metrics': self._analyze_onboarding_metrics(summary),
+            'geographic_distribution': await self._analyze_geographic_distribution(filters),
+            'productivity_metrics': await self._calculate_productivity_metrics(start_date, end_date),
             'trends': await self._calculate_activity_trends(days, department_id, branch_id),
             'generated_at': end_date.isoformat(),
             'period_days': days,
@@ -79,134 +117,163 @@ class UserAnalyticsService:
             event_type=ValidationEventType.VALIDATION_SUCCESS,
             entity_type="user_analytics",
             field_name="metrics_generated",
-            field_value=f"days={days}, users={len(all_users)}",
+            field_value=f"days={days}, users={summary.total_users}",
             metadata={
                 'metrics_type': 'activity_metrics',
-                'user_count': len(all_users),
+                'user_count': summary.total_users,
                 'period_days': days,
                 'department_filter': str(department_id) if department_id else None,
                 'branch_filter': str(branch_id) if branch_id else None
             }
         )
         
+        await cache_service.set(cache_key, metrics, ACTIVITY_METRICS_CACHE_TTL, ANALYTICS_CACHE_NAMESPACE)
         return metrics
     
-    async def _calculate_activity_overview(self, users: List[User], days: int) -> Dict[str, Any]:
+    @staticmethod
+    def _user_filters(department_id: Optional[UUID], branch_id: Optional[UUID]) -> List[Any]:
+        filters = []
+        if department_id:
+            filters.append(User.department_id == department_id)
+        if branch_id:
+            filters.append(User.branch_id == branch_id)
+        return filters
+    
+    async def _summarize_users(self, filters: List[Any], now: datetime):
+        """
+        Single-row aggregate behind the overview, login, activity level and onboarding metrics
+        
+        "Within N days" follows timedelta.days (whole days since the login), so
+        it compares against now minus N + 1 days.
+        """
+        
+        def since(days: int) -> datetime:
+            return now - timedelta(days=days)
+        
+        account_age_days = _whole_days(now - User.created_at)
+        has_logins = and_(User.last_login_at.isnot(None), User.login_count > 0)
+        rated = and_(has_logins, account_age_days > 0)
+        
+        query = select(
+            func.count().label('total_users'),
+            func.count().filter(User.last_login_at.is_(None)).label('never_logged_in'),
+            func.count().filter(User.last_login_at > since(8)).label('active_last_7_days'),
+            func.count().filter(User.last_login_at > since(31)).label('active_last_30_days'),
+            func.count().filter(User.last_login_at <= since(90)).label('dormant_users'),
+            func.count().filter(
+                and_(User.last_login_at <= since(8), User.last_login_at > since(31))
+            ).label('moderately_active'),
+            func.count().filter(
+                and_(User.last_login_at <= since(31), User.last_login_at > since(91))
+            ).label('low_activity'),
+            func.count().filter(User.last_login_at <= since(91)).label('dormant'),
+            func.count().filter(has_logins).label('users_with_logins'),
+            func.coalesce(func.sum(User.login_count).filter(has_logins), 0).label('total_logins'),
+            # Average logins per day of account age: >= 1, ~1 per week, ~1 per month, less
+            func.count().filter(
+                and_(rated, User.login_count >= account_age_days)
+            ).label('daily_active'),
+            func.count().filter(
+                and_(rated, User.login_count < account_age_days, User.login_count >= account_age_days * 0.14)
+            ).label('weekly_active'),
+            func.count().filter(
+                and_(rated, User.login_count < account_age_days * 0.14, User.login_count >= account_age_days * 0.03)
+            ).label('monthly_active'),
+            func.count().filter(
+                and_(rated, User.login_count < account_age_days * 0.03)
+            ).label('infrequent'),
+            func.count().filter(User.onboarding_completed.is_(True)).label('completed_onboarding'),
+            func.avg(_whole_days(User.onboarding_completed_at - User.created_at)).filter(
+                and_(User.onboarding_completed.is_(True), User.onboarding_completed_at.isnot(None))
+            ).label('average_onboarding_days')
+        ).where(*filters)
+        
+        result = await self.db.execute(query)
+        return result.one()
+    
+    def _calculate_activity_overview(self, summary) -> Dict[str, Any]:
         """Calculate high-level activity overview"""
         
-        now = datetime.now(timezone.utc)
-        total_users = len(users)
-        
-        # Activity categories
-        active_last_7_days = 0
-        active_last_30_days = 0
-        dormant_users = 0
-        never_logged_in = 0
-        
-        for user in users:
-            if user.last_login_at is None:
-                never_logged_in += 1
-            else:
-                days_since_login = (now - user.last_login_at).days
-                if days_since_login <= 7:
-                    active_last_7_days += 1
-                if days_since_login <= 30:
-                    active_last_30_days += 1
-                if days_since_login >= 90:
-                    dormant_users += 1
-        
-        # Calculate percentages
-        active_7_day_rate = (active_last_7_days / total_users * 100) if total_users > 0 else 0
-        active_30_day_rate = (active_last_30_days / total_users * 100) if total_users > 0 else 0
-        dormancy_rate = (dormant_users / total_users * 100) if total_users > 0 else 0
+        total_users = summary.total_users
+        
+        def rate(count: int) -> float:
+            return round((count / total_users * 100) if total_users > 0 else 0, 2)
         
         return {
             'total_users': total_users,
-            'active_last_7_days': active_last_7_days,
-            'active_last_30_days': active_last_30_days,
-            'dormant_users': dormant_users,
-            'never_logged_in': never_logged_in,
+            'active_last_7_days': summary.active_last_7_days,
+            'active_last_30_days': summary.active_last_30_days,
+            'dormant_users': summary.dormant_users,
+            'never_logged_in': summary.never_logged_in,
             'activity_rates': {
-                'active_7_day_rate': round(active_7_day_rate, 2),
-                'active_30_day_rate': round(active_30_day_rate, 2),
-                'dormancy_rate': round(dormancy_rate, 2),
-                'never_logged_rate': round((never_logged_in / total_users * 100) if total_users > 0 else 0, 2)
+                'active_7_day_rate': rate(summary.active_last_7_days),
+                'active_30_day_rate': rate(summary.active_last_30_days),
+                'dormancy_rate': rate(summary.dormant_users),
+                'never_logged_rate': rate(summary.never_logged_in)
             }
         }
     
-    async def _analyze_login_patterns(self, users: List[User], start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    def _analyze_login_patterns(self, summary) -> Dict[str, Any]:
         """Analyze login patterns and frequency"""
         
-        # Login frequency analysis
-        login_frequency = {
-            'daily_active': 0,
-            'weekly_active': 0,
-            'monthly_active': 0,
-            'infrequent': 0
-        }
-        
-        total_logins = 0
-        users_with_logins = 0
-        
-        for user in users:
-            if user.last_login_at and user.login_count:
-                users_with_logins += 1
-                total_logins += user.login_count
-                
-                # Estimate login frequency based on account age and login count
-                account_age_days = (datetime.now(timezone.utc) - user.created_at).days
-                if account_age_days > 0:
-                    avg_logins_per_day = user.login_count / account_age_days
-                    
-                    if avg_logins_per_day >= 1:
-                        login_frequency['daily_active'] += 1
-                    elif avg_logins_per_day >= 0.14:  # ~1 per week
-                        login_frequency['weekly_active'] += 1
-                    elif avg_logins_per_day >= 0.03:  # ~1 per month
-                        login_frequency['monthly_active'] += 1
-                    else:
-                        login_frequency['infrequent'] += 1
-        
+        users_with_logins = summary.users_with_logins
+        total_logins = int(summary.total_logins)
         avg_logins_per_user = (total_logins / users_with_logins) if users_with_logins > 0 else 0
         
         return {
-            'login_frequency_distribution': login_frequency,
+            'login_frequency_distribution': {
+                'daily_active': summary.daily_active,
+                'weekly_active': summary.weekly_active,
+                'monthly_active': summary.monthly_active,
+                'infrequent': summary.infrequent
+            },
             'total_logins': total_logins,
             'users_with_logins': users_with_logins,
             'average_logins_per_user': round(avg_logins_per_user, 2),
-            'login_engagement_rate': round((users_with_logins / len(users) * 100) if len(users) > 0 else 0, 2)
+            'login_engagement_rate': round(
+                (users_with_logins / summary.total_users * 100) if summary.total_users > 0 else 0, 2
+            )
         }
     
-    async def _analyze_role_distribution(self, users: List[User]) -> Dict[str, Any]:
+    async def _count_by_role_and_status(self, filters: List[Any], now: datetime) -> List[Any]:
+        """User counts, logins and status timing per (role, status)"""
+        
+        query = select(
+            User.role,
+            User.status,
+            func.count().label('total'),
+            func.coalesce(func.sum(User.login_count), 0).label('login_count'),
+            func.count().filter(User.status_changed_at.isnot(None)).label('status_changes'),
+            func.count().filter(User.status_changed_at > now - timedelta(days=8)).label('recent_changes'),
+            func.coalesce(func.sum(_whole_days(now - User.status_changed_at)), 0).label('days_in_status')
+        ).where(*filters).group_by(User.role, User.status)
+        
+        result = await self.db.execute(query)
+        return result.all()
+    
+    def _analyze_role_distribution(self, rows: List[Any]) -> Dict[str, Any]:
         """Analyze user role distribution"""
         
         role_counts = {}
         role_activity = {}
         
-        for user in users:
-            role = user.role
-            role_counts[role] = role_counts.get(role, 0) + 1
-            
-            # Calculate role activity
-            if role not in role_activity:
-                role_activity[role] = {
-                    'total': 0,
-                    'active': 0,
-                    'login_count': 0
-                }
-            
-            role_activity[role]['total'] += 1
-            if user.status == 'active':
-                role_activity[role]['active'] += 1
-            if user.login_count:
-                role_activity[role]['login_count'] += user.login_count
+        for row in rows:
+            role_counts[row.role] = role_counts.get(row.role, 0) + row.total
+            activity = role_activity.setdefault(row.role, {
+                'total': 0,
+                'active': 0,
+                'login_count': 0
+            })
+            activity['total'] += row.total
+            if row.status == 'active':
+                activity['active'] += row.total
+            activity['login_count'] += int(row.login_count)
         
         # Calculate activity rates by role
-        for role in role_activity:
-            total = role_activity[role]['total']
-            active = role_activity[role]['active']
-            role_activity[role]['activity_rate'] = round((active / total * 100) if total > 0 else 0, 2)
-            role_activity[role]['avg_logins'] = round((role_activity[role]['login_count'] / total) if total > 0 else 0, 2)
+        for activity in role_activity.values():
+            total = activity['total']
+            activity['activity_rate'] = round((activity['active'] / total * 100) if total > 0 else 0, 2)
+            activity['avg_logins'] = round((activity['login_count'] / total) if total > 0 else 0, 2)
         
         return {
             'role_counts': role_counts,
@@ -214,40 +281,29 @@ class UserAnalyticsService:
             'total_roles': len(role_counts)
         }
     
-    async def _analyze_status_distribution(self, users: List[User]) -> Dict[str, Any]:
+    def _analyze_status_distribution(self, rows: List[Any]) -> Dict[str, Any]:
         """Analyze user status distribution"""
         
         status_counts = {}
         status_trends = {}
         
-        for user in users:
-            status = user.status
-            status_counts[status] = status_counts.get(status, 0) + 1
-            
-            # Analyze status change timing
-            if user.status_changed_at:
-                days_in_status = (datetime.now(timezone.utc) - user.status_changed_at).days
-                if status not in status_trends:
-                    status_trends[status] = {
-                        'recent_changes': 0,  # Last 7 days
-                        'avg_days_in_status': 0,
-                        'total_days': 0,
-                        'count': 0
-                    }
-                
-                if days_in_status <= 7:
-                    status_trends[status]['recent_changes'] += 1
-                
-                status_trends[status]['total_days'] += days_in_status
-                status_trends[status]['count'] += 1
+        for row in rows:
+            status_counts[row.status] = status_counts.get(row.status, 0) + row.total
+            if not row.status_changes:
+                continue
+            trend = status_trends.setdefault(row.status, {
+                'recent_changes': 0,  # Last 7 days
+                'avg_days_in_status': 0,
+                'total_days': 0,
+                'count': 0
+            })
+            trend['recent_changes'] += row.recent_changes
+            trend['total_days'] += int(row.days_in_status)
+            trend['count'] += row.status_changes
         
         # Calculate averages
-        for status in status_trends:
-            count = status_trends[status]['count']
-            if count > 0:
-                status_trends[status]['avg_days_in_status'] = round(
-                    status_trends[status]['total_days'] / count, 1
-                )
+        for trend in status_trends.values():
+            trend['avg_days_in_status'] = round(trend['total_days'] / trend['count'], 1)
         
         return {
             'status_counts': status_counts,
@@ -255,130 +311,129 @@ class UserAnalyticsService:
             'total_statuses': len(status_counts)
         }
     
-    async def _categorize_activity_levels(self, users: List[User]) -> Dict[str, Any]:
-        """Categorize users by activity level"""
-        
-        now = datetime.now(timezone.utc)
+    async def _categorize_activity_levels(self, filters: List[Any], summary, now: datetime) -> Dict[str, Any]:
+        """
+        Categorize users by activity level
+        
+        Counts are exact; each category lists at most ACTIVITY_LEVEL_USER_LIMIT
+        users, most recently active first.
+        """
+        
+        category = case(
+            (User.last_login_at.is_(None), 'never_logged_in'),
+            (User.last_login_at > now - timedelta(days=8), 'highly_active'),       # Last 7 days
+            (User.last_login_at > now - timedelta(days=31), 'moderately_active'),  # 8-30 days
+            (User.last_login_at > now - timedelta(days=91), 'low_activity'),       # 31-90 days
+            else_='dormant'                                                        # 90+ days
+        )
+        ranked = select(
+            User.id,
+            User.username,
+            User.email,
+            User.first_name,
+            User.last_name,
+            User.role,
+            User.status,
+            User.last_login_at,
+            User.login_count,
+            Department.name.label('department'),
+            Branch.name.label('branch'),
+            category.label('category'),
+            func.row_number().over(
+                partition_by=category,
+                order_by=(User.last_login_at.desc().nulls_last(), User.created_at.desc())
+            ).label('position')
+        ).select_from(User).outerjoin(
+            Department, Department.id == User.department_id
+        ).outerjoin(
+            Branch, Branch.id == User.branch_id
+        ).where(*filters).subquery()
+        
+        result = await self.db.execute(
+            select(ranked).where(ranked.c.position <= ACTIVITY_LEVEL_USER_LIMIT).order_by(ranked.c.position)
+        )
         
         categories = {
-            'highly_active': [],      # Last 7 days
-            'moderately_active': [],  # 8-30 days
-            'low_activity': [],       # 31-90 days
-            'dormant': [],            # 90+ days
-            'never_logged_in': []     # Never logged in
-        }
-        
-        for user in users:
-            user_info = {
-                'id': str(user.id),
-                'username': user.username,
-                'email': user.email,
-                'name': f"{user.first_name} {user.last_name}",
-                'role': user.role,
-                'status': user.status,
-                'last_login_at': user.last_login_at.isoformat() if user.last_login_at else None,
-                'login_count': user.login_count or 0,
-                'department': user.department.name if user.department else None,
-                'branch': user.branch.name if user.branch else None
-            }
-            
-            if user.last_login_at is None:
-                categories['never_logged_in'].append(user_info)
-            else:
-                days_since_login = (now - user.last_login_at).days
-                
-                if days_since_login <= 7:
-                    categories['highly_active'].append(user_info)
-                elif days_since_login <= 30:
-                    categories['moderately_active'].append(user_info)
-                elif days_since_login <= 90:
-                    categories['low_activity'].append(user_info)
-                else:
-                    categories['dormant'].append(user_info)
-        
-        # Add counts
-        category_counts = {
-            category: len(users_list) 
-            for category, users_list in categories.items()
+            'highly_active': [],
+            'moderately_active': [],
+            'low_activity': [],
+            'dormant': [],
+            'never_logged_in': []
         }
+        for row in result.all():
+            categories[row.category].append({
+                'id': str(row.id),
+                'username': row.username,
+                'email': row.email,
+                'name': f"{row.first_name} {row.last_name}",
+                'role': row.role,
+                'status': row.status,
+                'last_login_at': row.last_login_at.isoformat() if row.last_login_at else None,
+                'login_count': row.login_count or 0,
+                'department': row.department,
+                'branch': row.branch
+            })
         
         return {
             'categories': categories,
-            'category_counts': category_counts
+            'category_counts': {
+                'highly_active': summary.active_last_7_days,
+                'moderately_active': summary.moderately_active,
+                'low_activity': summary.low_activity,
+                'dormant': summary.dormant,
+                'never_logged_in': summary.never_logged_in
+            },
+            'users_per_category_limit': ACTIVITY_LEVEL_USER_LIMIT
         }
     
-    async def _analyze_onboarding_metrics(self, users: List[User]) -> Dict[str, Any]:
+    def _analyze_onboarding_metrics(self, summary) -> Dict[str, Any]:
         """Analyze onboarding completion metrics"""
         
-        total_users = len(users)
-        completed_onboarding = 0
-        pending_onboarding = 0
-        avg_onboarding_days = 0
-        total_onboarding_days = 0
-        onboarding_completed_count = 0
-        
-        for user in users:
-            if user.onboarding_completed:
-                completed_onboarding += 1
-                if user.onboarding_completed_at:
-                    onboarding_days = (user.onboarding_completed_at - user.created_at).days
-                    total_onboarding_days += onboarding_days
-                    onboarding_completed_count += 1
-            else:
-                pending_onboarding += 1
-        
-        if onboarding_completed_count > 0:
-            avg_onboarding_days = total_onboarding_days / onboarding_completed_count
-        
+        total_users = summary.total_users
+        completed_onboarding = summary.completed_onboarding
         completion_rate = (completed_onboarding / total_users * 100) if total_users > 0 else 0
         
         return {
             'total_users': total_users,
             'completed_onboarding': completed_onboarding,
-            'pending_onboarding': pending_onboarding,
+            'pending_onboarding': total_users - completed_onboarding,
             'completion_rate': round(completion_rate, 2),
-            'average_onboarding_days': round(avg_onboarding_days, 1)
+            'average_onboarding_days': round(float(summary.average_onboarding_days or 0), 1)
         }
     
-    async def _analyze_geographic_distribution(self, users: List[User]) -> Dict[str, Any]:
+    async def _analyze_geographic_distribution(self, filters: List[Any]) -> Dict[str, Any]:
         """Analyze user distribution by department and branch"""
         
+        query = select(
+            Department.name.label('department'),
+            Branch.name.label('branch'),
+            User.role,
+            func.count().label('total'),
+            func.count().filter(User.status == 'active').label('active')
+        ).select_from(User).outerjoin(
+            Department, Department.id == User.department_id
+        ).outerjoin(
+            Branch, Branch.id == User.branch_id
+        ).where(*filters).group_by(Department.name, Branch.name, User.role)
+        
+        result = await self.db.execute(query)
+        
         department_distribution = {}
         branch_distribution = {}
         
-        for user in users:
-            # Department distribution
-            dept_name = user.department.name if user.department else 'Unassigned'
-            if dept_name not in department_distribution:
-                department_distribution[dept_name] = {
+        for row in result.all():
+            for distribution, name in (
+                (department_distribution, row.department or 'Unassigned'),
+                (branch_distribution, row.branch or 'Unassigned')
+            ):
+                entry = distribution.setdefault(name, {
                     'total_users': 0,
                     'active_users': 0,
                     'roles': {}
-                }
-            
-            department_distribution[dept_name]['total_users'] += 1
-            if user.status == 'active':
-                department_distribution[dept_name]['active_users'] += 1
-            
-            role = user.role
-            department_distribution[dept_name]['roles'][role] = \
-                department_distribution[dept_name]['roles'].get(role, 0) + 1
-            
-            # Branch distribution
-            branch_name = user.branch.name if user.branch else 'Unassigned'
-            if branch_name not in branch_distribution:
-                branch_distribution[branch_name] = {
-                    'total_users': 0,
-                    'active_users': 0,
-                    'roles': {}
-                }
-            
-            branch_distribution[branch_name]['total_users'] += 1
-            if user.status == 'active':
-                branch_distribution[branch_name]['active_users'] += 1
-            
-            branch_distribution[branch_name]['roles'][role] = \
-                branch_distribution[branch_name]['roles'].get(role, 0) + 1
+                })
+                entry['total_users'] += row.total
+                entry['active_users'] += row.active
+                entry['roles'][row.role] = entry['roles'].get(row.role, 0) + row.total
         
         return {
             'department_distribution': department_distribution,
@@ -387,43 +442,37 @@ class UserAnalyticsService:
             'total_branches': len([b for b in branch_distribution.keys() if b != 'Unassigned'])
         }
     
-    async def _calculate_productivity_metrics(self, users: List[User], start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    async def _calculate_productivity_metrics(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
         """Calculate user productivity metrics based on application activity"""
         
-        # Get applications created in the period
-        app_query = select(CustomerApplication).where(
+        # Applications created in the period, aggregated per creator
+        query = select(
+            CustomerApplication.user_id,
+            func.count().label('applications_created'),
+            func.count().filter(CustomerApplication.status == 'approved').label('applications_approved'),
+            func.count().filter(CustomerApplication.status == 'rejected').label('applications_rejected'),
+            func.coalesce(func.sum(CustomerApplication.requested_amount), 0).label('total_requested_amount')
+        ).where(
             and_(
                 CustomerApplication.created_at >= start_date,
                 CustomerApplication.created_at <= end_date
             )
-        )
+        ).group_by(CustomerApplication.user_id)
         
-        result = await self.db.execute(app_query)
-        applications = result.scalars().all()
+        result = await self.db.execute(query)
         
         user_productivity = {}
-        
-        for app in applications:
-            user_id = str(app.user_id)
-            if user_id not in user_productivity:
-                user_productivity[user_id] = {
-                    'applications_created': 0,
-                    'applications_approved': 0,
-                    'applications_rejected': 0,
-                    'total_requested_amount': 0
-                }
-            
-            user_productivity[user_id]['applications_created'] += 1
-            if app.status == 'approved':
-                user_productivity[user_id]['applications_approved'] += 1
-            elif app.status == 'rejected':
-                user_productivity[user_id]['applications_rejected'] += 1
-            
-            if app.requested_amount:
-                user_productivity[user_id]['total_requested_amount'] += float(app.requested_amount)
+        total_apps = 0
+        for row in result.all():
+            user_productivity[str(row.user_id)] = {
+                'applications_created': row.applications_created,
+                'applications_approved': row.applications_approved,
+                'applications_rejected': row.applications_rejected,
+                'total_requested_amount': float(row.total_requested_amount)
+            }
+            total_apps += row.applications_created
         
         # Calculate averages
-        total_apps = len(applications)
         active_users = len(user_productivity)
         avg_apps_per_active_user = (total_apps / active_users) if active_users > 0 else 0
         
@@ -435,40 +484,24 @@ class UserAnalyticsService:
         }
     
     async def _calculate_activity_trends(self, days: int, department_id: Optional[UUID], branch_id: Optional[UUID]) -> Dict[str, Any]:
-        """Calculate activity trends over time"""
-        
-        now = datetime.now(timezone.utc)
-        trends = []
-        
-        # Calculate daily activity for the past 'days' period
-        for i in range(days):
-            date = now - timedelta(days=i)
-            day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_start + timedelta(days=1)
-            
-            # Count users created on this day
-            user_query = select(func.count(User.id)).where(
-                and_(
-                    User.created_at >= day_start,
-                    User.created_at < day_end
-                )
-            )
-            
-            if department_id:
-                user_query = user_query.where(User.department_id == department_id)
-            if branch_id:
-                user_query = user_query.where(User.branch_id == branch_id)
-            
-            result = await self.db.execute(user_query)
-            users_created = result.scalar() or 0
-            
-            trends.append({
-                'date': day_start.date().isoformat(),
-                'users_created': users_created
-            })
+        """Calculate activity trends over time (users created per UTC day, oldest first)"""
         
-        # Reverse to have oldest first
-        trends.reverse()
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        
+        result = await self.db.execute(USER_CREATION_TRENDS_SQL, {
+            'first_day': today - timedelta(days=days - 1),
+            'last_day': today,
+            'department_id': department_id,
+            'branch_id': branch_id
+        })
+        
+        trends = [
+            {
+                'date': row.day.astimezone(timezone.utc).date().isoformat(),
+                'users_created': row.users_created
+            }
+            for row in result.all()
+        ]
         
         return {
             'daily_trends': trends,
@@ -476,83 +509,106 @@ class UserAnalyticsService:
         }
     
     async def get_organizational_metrics(self) -> Dict[str, Any]:
-        """Get comprehensive organizational metrics"""
-        
-        # Department metrics
-        dept_query = select(Department).options(selectinload(Department.users))
-        dept_result = await self.db.execute(dept_query)
-        departments = dept_result.scalars().all()
-        
-        # Branch metrics
-        branch_query = select(Branch).options(selectinload(Branch.users))
-        branch_result = await self.db.execute(branch_query)
-        branches = branch_result.scalars().all()
-        
-        # Position metrics
-        position_query = select(Position).options(selectinload(Position.users))
-        position_result = await self.db.execute(position_query)
-        positions = position_result.scalars().all()
-        
-        dept_metrics = []
-        for dept in departments:
-            active_users = len([u for u in dept.users if u.status == 'active'])
-            total_users = len(dept.users)
-            
-            dept_metrics.append({
-                'id': str(dept.id),
-                'name': dept.name,
-                'code': dept.code,
-                'total_users': total_users,
-                'active_users': active_users,
-                'activity_rate': round((active_users / total_users * 100) if total_users > 0 else 0, 2),
-                'is_active': dept.is_active,
-                'manager_id': str(dept.manager_id) if dept.manager_id else None
-            })
+        """
+        Get comprehensive organizational metrics
         
-        branch_metrics = []
-        for branch in branches:
-            active_users = len([u for u in branch.users if u.status == 'active'])
-            total_users = len(branch.users)
-            
-            branch_metrics.append({
-                'id': str(branch.id),
-                'name': branch.name,
-                'code': branch.code,
-                'total_users': total_users,
-                'active_users': active_users,
-                'activity_rate': round((active_users / total_users * 100) if total_users > 0 else 0, 2),
-                'is_active': branch.is_active,
-                'manager_id': str(branch.manager_id) if branch.manager_id else None
-            })
+        Served from a cached snapshot; see refresh_organizational_metrics.
+        """
         
-        position_metrics = []
-        for position in positions:
-            active_users = len([u for u in position.users if u.status == 'active'])
-            total_users = len(position.users)
-            
-            position_metrics.append({
-                'id': str(position.id),
-                'name': position.name,
-                'total_users': total_users,
-                'active_users': active_users,
-                'activity_rate': round((active_users / total_users * 100) if total_users > 0 else 0, 2),
-                'is_active': position.is_active
-            })
+        snapshot = await cache_service.get(ORGANIZATIONAL_METRICS_CACHE_KEY, USER_CACHE_NAMESPACE)
+        if snapshot:
+            return snapshot
         
-        return {
-            'departments': dept_metrics,
-            'branches': branch_metrics,
-            'positions': position_metrics,
+        return await self.refresh_organizational_metrics()
+    
+    async def refresh_organizational_metrics(self) -> Dict[str, Any]:
+        """
+        Rebuild and cache the organizational metrics snapshot
+        
+        User counts per department, branch and position come from a single
+        GROUPING SETS aggregate, joined to the unit tables in one statement.
+        """
+        
+        unit_counts = select(
+            User.department_id,
+            User.branch_id,
+            User.position_id,
+            func.grouping(User.department_id).label('not_by_department'),
+            func.grouping(User.branch_id).label('not_by_branch'),
+            func.grouping(User.position_id).label('not_by_position'),
+            func.count().label('total_users'),
+            func.count().filter(User.status == 'active').label('active_users')
+        ).group_by(
+            func.grouping_sets(
+                tuple_(User.department_id),
+                tuple_(User.branch_id),
+                tuple_(User.position_id)
+            )
+        ).cte('unit_user_counts')
+        
+        def unit_query(unit: str, model, unit_column, not_grouped_by, code, manager_id):
+            return select(
+                literal_column(f"'{unit}'").label('unit'),
+                model.id,
+                model.name,
+                code.label('code'),
+                model.is_active,
+                manager_id.label('manager_id'),
+                func.coalesce(unit_counts.c.total_users, 0).label('total_users'),
+                func.coalesce(unit_counts.c.active_users, 0).label('active_users')
+            ).outerjoin(
+                unit_counts,
+                and_(not_grouped_by == 0, unit_column == model.id)
+            )
+        
+        query = union_all(
+            unit_query(
+                'departments', Department, unit_counts.c.department_id,
+                unit_counts.c.not_by_department, Department.code, Department.manager_id
+            ),
+            unit_query(
+                'branches', Branch, unit_counts.c.branch_id,
+                unit_counts.c.not_by_branch, Branch.code, Branch.manager_id
+            ),
+            unit_query(
+                'positions', Position, unit_counts.c.position_id,
+                unit_counts.c.not_by_position, null(), null()
+            )
+        )
+        result = await self.db.execute(query)
+        
+        units = {'departments': [], 'branches': [], 'positions': []}
+        for row in result.all():
+            metrics = {
+                'id': str(row.id),
+                'name': row.name,
+                'total_users': row.total_users,
+                'active_users': row.active_users,
+                'activity_rate': round((row.active_users / row.total_users * 100) if row.total_users > 0 else 0, 2),
+                'is_active': row.is_active
+            }
+            if row.unit != 'positions':
+                metrics['code'] = row.code
+                metrics['manager_id'] = str(row.manager_id) if row.manager_id else None
+            units[row.unit].append(metrics)
+        
+        snapshot = {
+            **units,
             'summary': {
-                'total_departments': len(departments),
-                'active_departments': len([d for d in departments if d.is_active]),
-                'total_branches': len(branches),
-                'active_branches': len([b for b in branches if b.is_active]),
-                'total_positions': len(positions),
-                'active_positions': len([p for p in positions if p.is_active])
+                'total_departments': len(units['departments']),
+                'active_departments': len([d for d in units['departments'] if d['is_active']]),
+                'total_branches': len(units['branches']),
+                'active_branches': len([b for b in units['branches'] if b['is_active']]),
+                'total_positions': len(units['positions']),
+                'active_positions': len([p for p in units['positions'] if p['is_active']])
             },
             'generated_at': datetime.now(timezone.utc).isoformat()
         }
+        
+        await cache_service.set(
+            ORGANIZATIONAL_METRICS_CACHE_KEY, snapshot, ORGANIZATIONAL_METRICS_CACHE_TTL, USER_CACHE_NAMESPACE
+        )
+        return snapshot
     
     async def get_user_performance_dashboard(self, user_id: UUID, days: int = 90) -> Dict[str, Any]:
         """Get individual user performance dashboard"""
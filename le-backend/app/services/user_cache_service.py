@@ -11,6 +11,7 @@ from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 
 from app.services.cache_service import cache_service, cache_user_list, cache_user_detail, cache_analytics
+from app.services.user_analytics_service import invalidate_organizational_metrics
 from app.models import User, Department, Branch, Position
 from app.schemas import UserResponse, PaginatedResponse
 import logging
@@ -128,6 +129,9 @@ class UserCacheService:
         deleted_count = await self.cache.delete_pattern("user_list:*", "users")
         logger.info(f"Invalidated {deleted_count} user list cache entries")
         
+        # Organizational metrics count users by department, branch, role and status
+        await invalidate_organizational_metrics()
+        
         return deleted_count + (1 if user_id else 0)
     
     async def get_cached_departments(self) -> Optional[List[Dict[str, Any]]]:
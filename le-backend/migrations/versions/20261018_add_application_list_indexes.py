@@ -0,0 +1,63 @@
+"""Add application list indexes
+
+Revision ID: 20261018_application_list_indexes
+Revises: 20261018_application_search_trgm
+Create Date: 2026-10-18 18:00:00.000000
+
+Proposed by scripts/index_advisor.py for the list_applications,
+get_customer_cards, workflow and dashboard query shapes. The list indexes
+follow application_list_order() (urgent, high, newest first) so a filtered
+page is read in order from the index instead of sorting every match.
+Reviewer and account indexes are partial since most rows have neither.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_application_list_indexes'
+down_revision = '20261018_application_search_trgm'
+branch_labels = None
+depends_on = None
+
+
+LIST_ORDER = [
+    sa.text("(priority_level = 'urgent') DESC"),
+    sa.text("(priority_level = 'high') DESC"),
+    sa.text("created_at DESC"),
+]
+
+
+def upgrade() -> None:
+    op.create_index('ix_customer_applications_list_order', 'customer_applications', LIST_ORDER)
+    op.create_index('ix_customer_applications_status_list_order', 'customer_applications', [sa.text("status")] + LIST_ORDER)
+    op.create_index('ix_customer_applications_loan_status_list_order', 'customer_applications', [sa.text("loan_status")] + LIST_ORDER)
+    op.create_index(
+        'ix_customer_applications_reviewer_list_order', 'customer_applications',
+        [sa.text("assigned_reviewer")] + LIST_ORDER,
+        postgresql_where=sa.text("assigned_reviewer IS NOT NULL")
+    )
+    op.create_index(
+        'ix_customer_applications_account_list_order', 'customer_applications',
+        [sa.text("account_id")] + LIST_ORDER,
+        postgresql_where=sa.text("account_id IS NOT NULL")
+    )
+    op.create_index(
+        'ix_customer_applications_workflow_status_created_at', 'customer_applications',
+        [sa.text("workflow_status"), sa.text("created_at DESC")]
+    )
+    op.create_index(
+        'ix_customer_applications_decided_updated_at', 'customer_applications',
+        [sa.text("updated_at"), sa.text("status")],
+        postgresql_where=sa.text("status IN ('approved', 'rejected')")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_customer_applications_decided_updated_at', table_name='customer_applications')
+    op.drop_index('ix_customer_applications_workflow_status_created_at', table_name='customer_applications')
+    op.drop_index('ix_customer_applications_account_list_order', table_name='customer_applications')
+    op.drop_index('ix_customer_applications_reviewer_list_order', table_name='customer_applications')
+    op.drop_index('ix_customer_applications_loan_status_list_order', table_name='customer_applications')
+    op.drop_index('ix_customer_applications_status_list_order', table_name='customer_applications')
+    op.drop_index('ix_customer_applications_list_order', table_name='customer_applications')
@@ -0,0 +1,51 @@
+"""Add trigram search column to customer applications
+
+Revision ID: 20261018_application_search_trgm
+Revises: 20261018_employee_code_sequences
+Create Date: 2026-10-18 17:00:00.000000
+
+Application search used five ILIKE '%term%' conditions, which always scan
+the table. The searched fields are now combined into a stored generated
+column, normalized (lower-cased, zero-width characters used in Khmer text
+removed), with a pg_trgm GIN index that serves both ILIKE and word
+similarity lookups.
+
+Adding the stored column rewrites customer_applications once.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_application_search_trgm'
+down_revision = '20261018_employee_code_sequences'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_TEXT_EXPRESSION = (
+    "lower(regexp_replace("
+    "coalesce(full_name_khmer, '') || ' ' || coalesce(full_name_latin, '') || ' ' || "
+    "coalesce(id_number, '') || ' ' || coalesce(phone, '') || ' ' || "
+    "coalesce(portfolio_officer_name, ''), "
+    "'[\\u200B-\\u200D\\u2060\\uFEFF]', '', 'g'))"
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column(
+        'customer_applications',
+        sa.Column('search_text', sa.Text(), sa.Computed(SEARCH_TEXT_EXPRESSION, persisted=True), nullable=True)
+    )
+    op.create_index(
+        'ix_customer_applications_search_text_trgm',
+        'customer_applications',
+        [sa.text('search_text gin_trgm_ops')],
+        postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_customer_applications_search_text_trgm', table_name='customer_applications')
+    op.drop_column('customer_applications', 'search_text')
@@ -0,0 +1,60 @@
+"""Add employee code sequences
+
+Revision ID: 20261018_employee_code_sequences
+Revises: 20261018_file_content_hash
+Create Date: 2026-10-18 16:00:00.000000
+
+One counter row per employee code family (the code without its trailing
+number). Codes are reserved with an atomic UPDATE ... RETURNING instead of
+scanning every existing code. The table is backfilled from current codes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_employee_code_sequences'
+down_revision = '20261018_file_content_hash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'employee_code_sequences',
+        sa.Column('prefix', sa.String(length=20), nullable=False),
+        sa.Column('pattern', sa.String(length=30), nullable=False),
+        sa.Column('last_value', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('width', sa.Integer(), nullable=False, server_default='4'),
+        sa.Column('code_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('prefix')
+    )
+
+    # Backfill from existing codes (same logic as EmployeeService.rebuild_code_sequences)
+    op.execute("""
+        INSERT INTO employee_code_sequences (prefix, pattern, last_value, width, code_count, updated_at)
+        SELECT prefix,
+               CASE
+                   WHEN prefix = '' THEN 'sequential_numeric'
+                   WHEN prefix ~ '^[A-Z]+-[0-9]{4}-$' THEN 'prefix_year_seq'
+                   WHEN prefix ~ '^[A-Z]+-$' THEN 'prefix_seq'
+                   ELSE 'custom'
+               END,
+               max(digits::bigint),
+               max(length(digits)),
+               count(*),
+               now()
+        FROM (
+            SELECT regexp_replace(employee_code, '[0-9]+$', '') AS prefix,
+                   substring(employee_code from '[0-9]+$') AS digits
+            FROM employees
+            WHERE employee_code ~ '[0-9]+$'
+        ) AS codes
+        WHERE length(digits) <= 18
+        GROUP BY prefix
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('employee_code_sequences')
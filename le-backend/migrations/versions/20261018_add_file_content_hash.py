@@ -0,0 +1,28 @@
+"""Add content hash to files for deduplicated storage
+
+Revision ID: 20261018_file_content_hash
+Revises: 20261018_file_preview_variants
+Create Date: 2026-10-18 14:00:00.000000
+
+Uploads with the same SHA-256 digest share one stored object. Existing rows
+keep a NULL hash and are simply never reused.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_file_content_hash'
+down_revision = '20261018_file_preview_variants'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_files_content_hash', 'files', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_files_content_hash', table_name='files')
+    op.drop_column('files', 'content_hash')
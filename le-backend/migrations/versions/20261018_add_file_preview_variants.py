@@ -0,0 +1,26 @@
+"""Add preview variants to files
+
+Revision ID: 20261018_file_preview_variants
+Revises: 20261018_folder_upsert_unique_indexes
+Create Date: 2026-10-18 12:00:00.000000
+
+Stores the object names of the WebP preview sizes generated for image
+uploads, keyed by size name.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_file_preview_variants'
+down_revision = '20261018_folder_upsert_unique_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('preview_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('files', 'preview_variants')
@@ -0,0 +1,72 @@
+"""Enforce unique folder structure per application for idempotent upserts
+
+Revision ID: 20261018_folder_upsert_unique_indexes
+Revises: c787a5bf01ed, 20250119_permission_audit_trail
+Create Date: 2026-10-18 09:00:00.000000
+
+Merges any remaining duplicate parent/child folders and (re)creates the
+partial unique indexes that the folder service relies on for
+INSERT ... ON CONFLICT DO NOTHING. The indexes were first introduced by
+folder_constraints_001, but that revision also added subquery CHECK
+constraints PostgreSQL rejects, so they are missing on many databases.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_folder_upsert_unique_indexes'
+down_revision = ('c787a5bf01ed', '20250119_permission_audit_trail')
+branch_labels = None
+depends_on = None
+
+
+def _merge_duplicate_folders(partition_by: str, where: str) -> None:
+    """Fold duplicate folders into the oldest one of each partition"""
+    op.execute(f"""
+        CREATE TEMP TABLE folder_merge_map AS
+        SELECT id AS duplicate_id,
+               first_value(id) OVER (
+                   PARTITION BY {partition_by} ORDER BY created_at, id
+               ) AS primary_id
+        FROM folders
+        WHERE {where}
+    """)
+    op.execute("DELETE FROM folder_merge_map WHERE duplicate_id = primary_id")
+    op.execute("""
+        UPDATE folders f SET parent_id = m.primary_id
+        FROM folder_merge_map m WHERE f.parent_id = m.duplicate_id
+    """)
+    op.execute("""
+        UPDATE files f SET folder_id = m.primary_id
+        FROM folder_merge_map m WHERE f.folder_id = m.duplicate_id
+    """)
+    op.execute("DELETE FROM folders f USING folder_merge_map m WHERE f.id = m.duplicate_id")
+    op.execute("DROP TABLE folder_merge_map")
+
+
+def upgrade():
+    # Parents first: merging parents can turn their children into duplicates
+    _merge_duplicate_folders(
+        "application_id",
+        "parent_id IS NULL AND application_id IS NOT NULL"
+    )
+    _merge_duplicate_folders(
+        "application_id, parent_id, name",
+        "parent_id IS NOT NULL"
+    )
+
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_application_parent_folder
+        ON folders (application_id)
+        WHERE parent_id IS NULL AND application_id IS NOT NULL
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_child_folder_name
+        ON folders (parent_id, name, application_id)
+        WHERE parent_id IS NOT NULL
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_unique_child_folder_name")
+    op.execute("DROP INDEX IF EXISTS idx_unique_application_parent_folder")
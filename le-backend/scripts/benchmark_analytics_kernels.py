@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the NumPy analytics kernels
+
+Generates synthetic user rows and times the previous per-row Python loops
+against app.services.analytics_kernels for the user analytics metrics, dormancy
+risk and nearest-rank percentiles. Kernel timings include building the
+columnar arrays from the rows, since the services pay that cost too. Each
+pair of results is compared before timings are printed.
+
+Usage:
+    python scripts/benchmark_analytics_kernels.py
+    python scripts/benchmark_analytics_kernels.py --sizes 10000 100000 --repeat 5
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Add the app directory to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.analytics_kernels import (
+    bucket_counts,
+    category_counts,
+    days_since,
+    dormancy_risk,
+    encode_categories,
+    epoch_seconds,
+    percentiles,
+)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+STATUSES = ['active'] * 8 + ['inactive', 'suspended']
+ROLES = ['officer'] * 6 + ['manager'] * 3 + ['admin']
+DEPARTMENTS = [None] + [f"Department {i}" for i in range(20)]
+BRANCHES = [None] + [f"Branch {i}" for i in range(60)]
+
+
+def generate_rows(count: int, now: datetime, seed: int = 42) -> List[SimpleNamespace]:
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        created_at = now - timedelta(days=rng.uniform(1, 1500))
+        last_login_at = None
+        if rng.random() > 0.1:
+            last_login_at = now - timedelta(days=rng.uniform(0, 400))
+        rows.append(SimpleNamespace(
+            status=rng.choice(STATUSES),
+            role=rng.choice(ROLES),
+            department_name=rng.choice(DEPARTMENTS),
+            branch_name=rng.choice(BRANCHES),
+            last_login_at=last_login_at,
+            created_at=created_at
+        ))
+    return rows
+
+
+# Previous implementations
+
+def legacy_analytics(rows: List[SimpleNamespace], now: datetime) -> Dict[str, Any]:
+    """OptimizedUserQueries._calculate_analytics_metrics before the kernels"""
+    active_users = [u for u in rows if u.status == 'active']
+    active_threshold = now - timedelta(days=30)
+    dormant_threshold = now - timedelta(days=90)
+
+    levels = {'highly_active': 0, 'moderately_active': 0, 'dormant': 0, 'never_logged_in': 0}
+    for user in active_users:
+        if user.last_login_at is None:
+            levels['never_logged_in'] += 1
+        elif user.last_login_at >= active_threshold:
+            levels['highly_active'] += 1
+        elif user.last_login_at >= dormant_threshold:
+            levels['moderately_active'] += 1
+        else:
+            levels['dormant'] += 1
+
+    role_distribution = {}
+    for user in rows:
+        role_distribution[user.role] = role_distribution.get(user.role, 0) + 1
+    department_distribution = {}
+    for user in rows:
+        if user.department_name:
+            department_distribution[user.department_name] = department_distribution.get(user.department_name, 0) + 1
+    branch_distribution = {}
+    for user in rows:
+        if user.branch_name:
+            branch_distribution[user.branch_name] = branch_distribution.get(user.branch_name, 0) + 1
+
+    return {
+        'active_users': len(active_users),
+        'activity_levels': levels,
+        'role_distribution': role_distribution,
+        'department_distribution': department_distribution,
+        'branch_distribution': branch_distribution
+    }
+
+
+def legacy_dormancy_risk(rows: List[SimpleNamespace], now: datetime) -> List[str]:
+    """ActivityManagementService._calculate_dormancy_risk applied per user"""
+    risks = []
+    for user in rows:
+        since = user.last_login_at or user.created_at
+        days_inactive = (now - since).days if since else None
+        if days_inactive is None:
+            risks.append("high")
+        elif days_inactive >= 180:
+            risks.append("critical")
+        elif days_inactive >= 120:
+            risks.append("high")
+        elif days_inactive >= 90:
+            risks.append("medium")
+        else:
+            risks.append("low")
+    return risks
+
+
+def legacy_percentiles(data: List[float], percents: List[int]) -> List[float]:
+    """PerformanceBenchmarkService._percentile, called once per percentile"""
+    result = []
+    for percentile in percents:
+        sorted_data = sorted(data)
+        index = int((percentile / 100) * len(sorted_data))
+        result.append(sorted_data[min(index, len(sorted_data) - 1)])
+    return result
+
+
+# Kernel implementations
+
+def kernel_analytics(rows: List[SimpleNamespace], now: datetime) -> Dict[str, Any]:
+    statuses, status_labels = encode_categories(row.status for row in rows)
+    roles, role_labels = encode_categories(row.role for row in rows)
+    departments, department_labels = encode_categories(row.department_name for row in rows)
+    branches, branch_labels = encode_categories(row.branch_name for row in rows)
+    last_logins = epoch_seconds(row.last_login_at for row in rows)
+
+    active_mask = statuses == status_labels.index('active')
+    active_logins = last_logins[active_mask]
+    dormant, moderately_active, highly_active = bucket_counts(
+        active_logins,
+        [(now - timedelta(days=90)).timestamp(), (now - timedelta(days=30)).timestamp()]
+    ).tolist()
+
+    return {
+        'active_users': int(np.count_nonzero(active_mask)),
+        'activity_levels': {
+            'highly_active': highly_active,
+            'moderately_active': moderately_active,
+            'dormant': dormant,
+            'never_logged_in': int(np.count_nonzero(np.isnan(active_logins)))
+        },
+        'role_distribution': category_counts(roles, role_labels),
+        'department_distribution': category_counts(departments, department_labels, skip_none=True),
+        'branch_distribution': category_counts(branches, branch_labels, skip_none=True)
+    }
+
+
+def kernel_dormancy_risk(rows: List[SimpleNamespace], now: datetime) -> List[str]:
+    inactive_since = epoch_seconds(row.last_login_at or row.created_at for row in rows)
+    return dormancy_risk(days_since(inactive_since, now)).tolist()
+
+
+def kernel_percentiles(data: List[float], percents: List[int]) -> List[float]:
+    return percentiles(data, percents)
+
+
+def best_of(func: Callable, repeat: int, *args) -> Tuple[float, Any]:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def compare(label: str, legacy: Callable, kernel: Callable, repeat: int, *args) -> None:
+    legacy_time, legacy_result = best_of(legacy, repeat, *args)
+    kernel_time, kernel_result = best_of(kernel, repeat, *args)
+    if legacy_result != kernel_result:
+        print(f"{label}: results differ between the loop and the kernel")
+        sys.exit(1)
+    print(
+        f"{label:<20} loop {legacy_time * 1000:10.1f} ms"
+        f"  kernel {kernel_time * 1000:10.1f} ms"
+        f"  speedup {legacy_time / kernel_time if kernel_time else 0:6.1f}x"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the NumPy analytics kernels against the previous loops")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="User counts to generate")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per measurement; the best is reported")
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    for size in args.sizes:
+        rows = generate_rows(size, now)
+        durations = [random.Random(size).lognormvariate(-3, 1) for _ in range(size)]
+        print(f"{size:,} users (best of {args.repeat})")
+        print("-" * 80)
+        compare("user analytics", legacy_analytics, kernel_analytics, args.repeat, rows, now)
+        compare("dormancy risk", legacy_dormancy_risk, kernel_dormancy_risk, args.repeat, rows, now)
+        compare("p50/p95/p99", legacy_percentiles, kernel_percentiles, args.repeat, durations, [50, 95, 99])
+        print()
+
+
+if __name__ == "__main__":
+    main()
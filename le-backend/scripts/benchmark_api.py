@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+API benchmark suite
+
+Drives the real routers through httpx.AsyncClient against the dataset seeded by
+scripts/seed_benchmark_data.py and reports p50/p95/p99 latency and database
+queries per request for each scenario. Queries are read from the Server-Timing
+header added by the instrumentation middleware, so counts stay per request
+even with concurrency. The header is on by default in development only; set
+SERVER_TIMING_ENABLED=true when benchmarking another environment. Without it
+query counts are reported as unknown and a baseline comparison fails.
+
+By default the app is called in-process through ASGITransport; --base-url
+targets a running server instead. Results can be saved as a baseline and later
+runs compared against it: a scenario regresses when its p95 grows by more than
+--tolerance (and --min-delta-ms) or it executes more queries than before. The
+exit status is 1 when anything regressed, so the suite can gate CI.
+
+Usage:
+    python scripts/seed_benchmark_data.py --dataset medium
+    python scripts/benchmark_api.py --save-baseline benchmarks/baseline.json
+    python scripts/benchmark_api.py --baseline benchmarks/baseline.json --requests 200
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+# Add the app directory to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.analytics_kernels import percentiles
+from seed_benchmark_data import BENCH_ADMIN_USERNAME, BENCH_PASSWORD
+
+DB_TIMING = re.compile(r'(?:^|,)\s*db;dur=[\d.]+;desc="(\d+) calls"')
+
+
+@dataclass
+class Scenario:
+    name: str
+    path: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+SCENARIOS = [
+    Scenario("applications_first_page", "/api/v1/applications/", {"page": 1, "size": 50}),
+    Scenario("applications_deep_page", "/api/v1/applications/", {"page": 200, "size": 50}),
+    Scenario("applications_search", "/api/v1/applications/", {"search": "sok dara", "size": 20}),
+    Scenario("applications_filtered", "/api/v1/applications/", {"status": "approved", "risk_category": "high", "size": 50}),
+    Scenario("users_list", "/api/v1/users/", {"size": 50}),
+    Scenario("users_search", "/api/v1/users/", {"search": "bench_user_00012", "size": 20}),
+    Scenario("customers_list", "/api/v1/customers/", {"size": 50}),
+    Scenario("files_list", "/api/v1/files/", {"size": 50}),
+    Scenario("current_user", "/api/v1/auth/me"),
+]
+
+
+def db_queries(response: httpx.Response) -> Optional[int]:
+    """Statements executed for the request, None when the server sent no Server-Timing header"""
+    header = response.headers.get("server-timing")
+    if header is None:
+        return None
+    match = DB_TIMING.search(header)
+    # Requests that ran no statements have no db entry in the header
+    return int(match.group(1)) if match else 0
+
+
+async def login(client: httpx.AsyncClient) -> Dict[str, str]:
+    response = await client.post(
+        "/api/v1/auth/login",
+        data={"username": BENCH_ADMIN_USERNAME, "password": BENCH_PASSWORD}
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    headers: Dict[str, str],
+    scenario: Scenario,
+    requests: int,
+    warmup: int,
+    concurrency: int
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    queries: List[Optional[int]] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(record: bool) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(scenario.path, params=scenario.params, headers=headers)
+            elapsed = time.perf_counter() - started
+        if not record:
+            return
+        if response.status_code >= 400:
+            errors += 1
+            return
+        latencies.append(elapsed * 1000)
+        queries.append(db_queries(response))
+
+    for _ in range(warmup):
+        await call(record=False)
+    await asyncio.gather(*(call(record=True) for _ in range(requests)))
+
+    if not latencies:
+        return {"requests": requests, "errors": errors}
+    p50, p95, p99 = percentiles(latencies, [50, 95, 99])
+    # Query counts are unknown (None) unless every response reported them
+    known = None not in queries
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(p50, 2),
+        "p95_ms": round(p95, 2),
+        "p99_ms": round(p99, 2),
+        "mean_queries": round(sum(queries) / len(queries), 2) if known else None,
+        "max_queries": max(queries) if known else None,
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float, min_delta_ms: float) -> List[str]:
+    """Regression messages for scenarios that got slower or run more queries than the baseline"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or "p95_ms" not in current or "p95_ms" not in previous:
+            continue
+        delta = current["p95_ms"] - previous["p95_ms"]
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance) and delta > min_delta_ms:
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.1f} ms -> {current['p95_ms']:.1f} ms")
+        if current["max_queries"] is None:
+            regressions.append(
+                f"{name}: queries per request unknown, no Server-Timing header (set SERVER_TIMING_ENABLED=true)"
+            )
+        elif previous.get("max_queries") is not None and current["max_queries"] > previous["max_queries"]:
+            regressions.append(f"{name}: queries per request {previous['max_queries']} -> {current['max_queries']}")
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{name}: errors {previous.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+def print_results(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]]) -> None:
+    print(f"{'scenario':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'errors':>8}{'p95 vs base':>13}")
+    print("-" * 86)
+    for name, result in results.items():
+        if "p95_ms" not in result:
+            print(f"{name:<26}{'failed':>10}{'':>10}{'':>10}{'':>9}{result['errors']:>8}")
+            continue
+        change = ""
+        previous = (baseline or {}).get(name)
+        if previous and previous.get("p95_ms"):
+            change = f"{(result['p95_ms'] / previous['p95_ms'] - 1) * 100:+.0f}%"
+        query_count = "unknown" if result["max_queries"] is None else result["max_queries"]
+        print(
+            f"{name:<26}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+            f"{query_count:>9}{result['errors']:>8}{change:>13}"
+        )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the API against the seeded dataset")
+    parser.add_argument('--base-url', help="Benchmark a running server instead of the in-process app")
+    parser.add_argument('--requests', type=int, default=100, help="Measured requests per scenario")
+    parser.add_argument('--warmup', type=int, default=5, help="Unmeasured requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=1, help="Requests in flight per scenario")
+    parser.add_argument('--scenario', action='append', help="Only run the named scenario(s)")
+    parser.add_argument('--baseline', type=Path, help="Baseline JSON to compare against")
+    parser.add_argument('--save-baseline', type=Path, help="Write the results as a new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative p95 growth (0.2 = 20%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help="Ignore p95 growth below this many ms")
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=60)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    async with client:
+        headers = await login(client)
+        for scenario in scenarios:
+            results[scenario.name] = await run_scenario(
+                client, headers, scenario, args.requests, args.warmup, args.concurrency
+            )
+
+    baseline = None
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["scenarios"]
+    print_results(results, baseline)
+    if any(result.get("p95_ms") is not None and result["max_queries"] is None for result in results.values()):
+        print("\n⚠️  No Server-Timing header in responses, query counts are unknown. "
+              "Set SERVER_TIMING_ENABLED=true on the benchmarked server.")
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.save_baseline.write_text(json.dumps({
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "scenarios": results,
+        }, indent=2))
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
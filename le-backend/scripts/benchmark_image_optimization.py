@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark for profile photo optimization
+
+Runs a directory of images (ideally full-resolution phone-camera JPEGs) through
+the old per-variant resize path and the current draft + progressive resize path,
+then through the process pool, and prints per-image latency and throughput.
+
+Usage:
+    python scripts/benchmark_image_optimization.py /path/to/photos
+    python scripts/benchmark_image_optimization.py /path/to/photos --workers 4 --repeat 3
+    python scripts/benchmark_image_optimization.py /path/to/photos --format jpeg
+"""
+
+import asyncio
+import argparse
+import statistics
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List
+
+from PIL import Image
+
+# Add the app directory to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.image_optimization_service import (
+    ImageOptimizationService,
+    _encode_image,
+    _prepare_image,
+    render_image_variants,
+)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+
+
+def legacy_render(image_data: bytes, sizes: Dict[str, tuple], output_format: str) -> Dict[str, bytes]:
+    """Previous implementation: full decode, every variant resized from the original"""
+    img = _prepare_image(Image.open(BytesIO(image_data)), output_format)
+    result = {}
+    for size_name, dimensions in sizes.items():
+        img_copy = img.copy()
+        img_copy.thumbnail(dimensions, Image.Resampling.LANCZOS)
+        result[size_name] = _encode_image(img_copy, output_format)
+    return result
+
+
+def load_corpus(directory: Path) -> List[bytes]:
+    files = sorted(p for p in directory.rglob('*') if p.suffix.lower() in IMAGE_EXTENSIONS)
+    return [p.read_bytes() for p in files]
+
+
+def summarize(label: str, timings: List[float], images: int) -> None:
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    total = sum(timings)
+    print(
+        f"{label:<28} mean {statistics.mean(timings) * 1000:8.1f} ms"
+        f"  p95 {p95 * 1000:8.1f} ms"
+        f"  {images / total if total else 0:7.2f} img/s"
+    )
+
+
+def run_sequential(label: str, func, corpus: List[bytes], sizes, output_format: str, repeat: int) -> None:
+    timings = []
+    for _ in range(repeat):
+        for image_data in corpus:
+            started = time.perf_counter()
+            func(image_data, sizes, output_format)
+            timings.append(time.perf_counter() - started)
+    summarize(label, timings, len(timings))
+
+
+async def run_pool(service: ImageOptimizationService, corpus: List[bytes], output_format: str, repeat: int) -> None:
+    # Warm the pool so process start-up is not part of the measurement
+    await service.optimize_profile_photo_async(corpus[0], output_format)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        service.optimize_profile_photo_async(image_data, output_format)
+        for _ in range(repeat)
+        for image_data in corpus
+    ))
+    elapsed = time.perf_counter() - started
+    images = len(corpus) * repeat
+    print(f"{'pool (concurrent)':<28} wall {elapsed:8.2f} s   {images / elapsed:7.2f} img/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark profile photo optimization")
+    parser.add_argument('corpus', type=Path, help="Directory with sample images")
+    parser.add_argument('--format', default='webp', choices=['webp', 'jpeg', 'png'])
+    parser.add_argument('--workers', type=int, default=None, help="Pool size (default: from settings)")
+    parser.add_argument('--repeat', type=int, default=1, help="Passes over the corpus")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print(f"No images found in {args.corpus}")
+        sys.exit(1)
+
+    service = ImageOptimizationService(max_workers=args.workers)
+    sizes = service.SIZES
+    megabytes = sum(len(data) for data in corpus) / (1024 * 1024)
+    print(f"Corpus: {len(corpus)} images, {megabytes:.1f} MB, format={args.format}, repeat={args.repeat}")
+    print("-" * 80)
+
+    run_sequential("legacy (resize from original)", legacy_render, corpus, sizes, args.format, args.repeat)
+    run_sequential("draft + progressive", render_image_variants, corpus, sizes, args.format, args.repeat)
+    try:
+        asyncio.run(run_pool(service, corpus, args.format, args.repeat))
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
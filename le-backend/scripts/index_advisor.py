@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Index advisor for customer application queries
+
+Replays the query shapes issued by list_applications, get_customer_cards and
+the dashboard, runs EXPLAIN (ANALYZE, BUFFERS) on each and flags sequential
+scans and explicit sorts on customer_applications. For every flagged shape the
+matching candidate indexes are proposed; with --benchmark they are built
+inside a transaction that is rolled back afterwards, so before/after timings
+are measured without changing the schema. --generate writes an Alembic
+migration for the proposed indexes.
+
+Filter values are sampled from the data (most common value per column) so the
+plans reflect the real distribution.
+
+Building indexes takes a SHARE lock on the table for the duration of the
+benchmark; run it against a copy of production data, not production itself.
+
+Usage:
+    python scripts/index_advisor.py
+    python scripts/index_advisor.py --benchmark --repeat 5
+    python scripts/index_advisor.py --generate migrations/versions/ --down-revision <revision>
+"""
+
+import asyncio
+import argparse
+import json
+import statistics
+import sys
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add the app directory to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import and_, desc, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.database import engine
+from app.models import CustomerApplication
+from app.services.application_search_service import application_list_order
+
+TABLE = "customer_applications"
+PAGE_SIZE = 10
+
+# Matches application_list_order()
+LIST_ORDER_COLUMNS = [
+    "(priority_level = 'urgent') DESC",
+    "(priority_level = 'high') DESC",
+    "created_at DESC",
+]
+
+
+@dataclass
+class IndexCandidate:
+    name: str
+    columns: List[str]
+    where: Optional[str] = None
+
+    def create_sql(self) -> str:
+        sql = f"CREATE INDEX {self.name} ON {TABLE} ({', '.join(self.columns)})"
+        if self.where:
+            sql += f" WHERE {self.where}"
+        return sql
+
+    def alembic_create(self) -> str:
+        columns = ", ".join(f'sa.text("{column}")' for column in self.columns)
+        where = f', postgresql_where=sa.text("{self.where}")' if self.where else ""
+        return f"    op.create_index('{self.name}', '{TABLE}', [{columns}]{where})"
+
+    def alembic_drop(self) -> str:
+        return f"    op.drop_index('{self.name}', table_name='{TABLE}')"
+
+
+LIST_ORDER = IndexCandidate("ix_customer_applications_list_order", LIST_ORDER_COLUMNS)
+STATUS_LIST_ORDER = IndexCandidate("ix_customer_applications_status_list_order", ["status"] + LIST_ORDER_COLUMNS)
+LOAN_STATUS_LIST_ORDER = IndexCandidate(
+    "ix_customer_applications_loan_status_list_order", ["loan_status"] + LIST_ORDER_COLUMNS
+)
+REVIEWER_LIST_ORDER = IndexCandidate(
+    "ix_customer_applications_reviewer_list_order",
+    ["assigned_reviewer"] + LIST_ORDER_COLUMNS,
+    where="assigned_reviewer IS NOT NULL"
+)
+ACCOUNT_LIST_ORDER = IndexCandidate(
+    "ix_customer_applications_account_list_order",
+    ["account_id"] + LIST_ORDER_COLUMNS,
+    where="account_id IS NOT NULL"
+)
+RISK_PRODUCT_LIST_ORDER = IndexCandidate(
+    "ix_customer_applications_risk_product_list_order",
+    ["risk_category", "product_type"] + LIST_ORDER_COLUMNS
+)
+WORKFLOW_STATUS_CREATED = IndexCandidate(
+    "ix_customer_applications_workflow_status_created_at", ["workflow_status", "created_at DESC"]
+)
+DECIDED_UPDATED_AT = IndexCandidate(
+    "ix_customer_applications_decided_updated_at",
+    ["updated_at", "status"],
+    where="status IN ('approved', 'rejected')"
+)
+
+
+@dataclass
+class QueryShape:
+    name: str
+    build: Callable[[Dict[str, Any]], Any]
+    candidates: List[IndexCandidate] = field(default_factory=list)
+
+
+def _page(query):
+    return query.order_by(*application_list_order()).limit(PAGE_SIZE)
+
+
+QUERY_SHAPES = [
+    QueryShape(
+        "list: default page",
+        lambda v: _page(select(CustomerApplication)),
+        [LIST_ORDER]
+    ),
+    QueryShape(
+        "list: status filter",
+        lambda v: _page(select(CustomerApplication).where(CustomerApplication.status == v["status"])),
+        [STATUS_LIST_ORDER]
+    ),
+    QueryShape(
+        "list: status count",
+        lambda v: select(func.count(CustomerApplication.id)).where(CustomerApplication.status == v["status"]),
+    ),
+    QueryShape(
+        "list: risk + product filter",
+        lambda v: _page(select(CustomerApplication).where(
+            CustomerApplication.risk_category == v["risk_category"],
+            CustomerApplication.product_type == v["product_type"]
+        )),
+        [RISK_PRODUCT_LIST_ORDER]
+    ),
+    QueryShape(
+        "list: account filter",
+        lambda v: _page(select(CustomerApplication).where(CustomerApplication.account_id == v["account_id"])),
+        [ACCOUNT_LIST_ORDER]
+    ),
+    QueryShape(
+        "list: reviewer filter",
+        lambda v: _page(select(CustomerApplication).where(
+            CustomerApplication.assigned_reviewer == v["assigned_reviewer"]
+        )),
+        [REVIEWER_LIST_ORDER]
+    ),
+    QueryShape(
+        "list: date range",
+        lambda v: _page(select(CustomerApplication).where(
+            CustomerApplication.created_at >= v["month_ago"],
+            CustomerApplication.created_at <= v["now"]
+        )),
+        [LIST_ORDER]
+    ),
+    QueryShape(
+        "cards: status + loan status",
+        lambda v: _page(select(CustomerApplication).where(
+            CustomerApplication.status == v["status"],
+            CustomerApplication.loan_status == v["loan_status"]
+        )),
+        [STATUS_LIST_ORDER, LOAN_STATUS_LIST_ORDER]
+    ),
+    QueryShape(
+        "workflow: queue by workflow status",
+        lambda v: select(CustomerApplication).where(
+            CustomerApplication.workflow_status == v["workflow_status"]
+        ).order_by(desc(CustomerApplication.created_at)).limit(PAGE_SIZE),
+        [WORKFLOW_STATUS_CREATED]
+    ),
+    QueryShape(
+        "dashboard: recent applications",
+        lambda v: select(CustomerApplication).where(
+            CustomerApplication.created_at >= v["today"]
+        ).order_by(desc(CustomerApplication.created_at)).limit(PAGE_SIZE),
+    ),
+    QueryShape(
+        "dashboard: decided this month",
+        lambda v: select(func.count(CustomerApplication.id)).where(and_(
+            CustomerApplication.updated_at >= v["month_ago"],
+            CustomerApplication.status.in_(['approved', 'rejected'])
+        )),
+        [DECIDED_UPDATED_AT]
+    ),
+]
+
+SAMPLED_COLUMNS = [
+    "status", "loan_status", "risk_category", "product_type",
+    "account_id", "assigned_reviewer", "workflow_status",
+]
+
+SAMPLE_FALLBACKS = {
+    "status": "submitted",
+    "loan_status": "active",
+    "risk_category": "medium",
+    "product_type": "micro_loan",
+    "account_id": "0",
+    "assigned_reviewer": uuid.UUID(int=0),
+    "workflow_status": "teller_processing",
+}
+
+
+async def sample_values(conn: AsyncConnection) -> Dict[str, Any]:
+    """Most common non-null value of each filtered column"""
+    values: Dict[str, Any] = {}
+    for column in SAMPLED_COLUMNS:
+        result = await conn.execute(text(
+            f"SELECT {column} FROM {TABLE} WHERE {column} IS NOT NULL "
+            f"GROUP BY {column} ORDER BY count(*) DESC LIMIT 1"
+        ))
+        value = result.scalar_one_or_none()
+        values[column] = value if value is not None else SAMPLE_FALLBACKS[column]
+    now = datetime.now(timezone.utc)
+    values["now"] = now
+    values["today"] = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    values["month_ago"] = now - timedelta(days=30)
+    return values
+
+
+def compile_sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def _walk(plan: Dict[str, Any]):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+async def explain(conn: AsyncConnection, sql: str) -> Dict[str, Any]:
+    result = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"))
+    document = result.scalar_one()
+    if isinstance(document, str):
+        document = json.loads(document)
+    return document[0]
+
+
+def findings(plan: Dict[str, Any]) -> List[str]:
+    """Plan nodes an index could remove"""
+    issues = []
+    for node in _walk(plan["Plan"]):
+        node_type = node["Node Type"]
+        if node_type == "Seq Scan" and node.get("Relation Name") == TABLE:
+            issues.append(f"seq scan ({node.get('Actual Rows', 0)} rows)")
+        elif node_type in ("Sort", "Incremental Sort"):
+            issues.append(f"{node_type.lower()} ({node.get('Sort Method', 'unknown')})")
+    return issues
+
+
+def plan_summary(plan: Dict[str, Any]) -> str:
+    nodes = []
+    for node in _walk(plan["Plan"]):
+        label = node["Node Type"]
+        if node.get("Index Name"):
+            label += f" using {node['Index Name']}"
+        nodes.append(label)
+    return " > ".join(nodes)
+
+
+async def time_query(conn: AsyncConnection, sql: str, repeat: int) -> Dict[str, Any]:
+    plans = [await explain(conn, sql) for _ in range(repeat)]
+    return {
+        "median_ms": statistics.median(plan["Execution Time"] for plan in plans),
+        "plan": plans[-1],
+    }
+
+
+async def existing_indexes(conn: AsyncConnection) -> set:
+    result = await conn.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = :table"), {"table": TABLE})
+    return {row[0] for row in result}
+
+
+async def run(args) -> List[IndexCandidate]:
+    proposed: Dict[str, IndexCandidate] = {}
+
+    async with engine.connect() as conn:
+        values = await sample_values(conn)
+        installed = await existing_indexes(conn)
+        row_count = (await conn.execute(text(f"SELECT count(*) FROM {TABLE}"))).scalar_one()
+        print(f"{TABLE}: {row_count} rows, {len(installed)} indexes")
+        print("-" * 100)
+
+        shapes = [(shape, compile_sql(shape.build(values))) for shape in QUERY_SHAPES]
+        baseline: Dict[str, Dict[str, Any]] = {}
+        for shape, sql in shapes:
+            baseline[shape.name] = await time_query(conn, sql, args.repeat)
+            issues = findings(baseline[shape.name]["plan"])
+            missing = [candidate for candidate in shape.candidates if candidate.name not in installed]
+            if issues:
+                for candidate in missing:
+                    proposed[candidate.name] = candidate
+            print(
+                f"{shape.name:<36} {baseline[shape.name]['median_ms']:9.2f} ms  "
+                f"{', '.join(issues) or 'ok'}"
+                + (f"  -> {', '.join(c.name for c in missing)}" if issues and missing else "")
+            )
+            if args.verbose:
+                print(f"    {plan_summary(baseline[shape.name]['plan'])}")
+
+        if args.benchmark and proposed:
+            print("-" * 100)
+            print(f"Building {len(proposed)} candidate indexes in a transaction that will be rolled back")
+            # End the read transaction so the DDL below runs in its own
+            await conn.commit()
+            try:
+                for candidate in proposed.values():
+                    await conn.execute(text(candidate.create_sql()))
+                await conn.execute(text(f"ANALYZE {TABLE}"))
+                for shape, sql in shapes:
+                    after = await time_query(conn, sql, args.repeat)
+                    before_ms = baseline[shape.name]["median_ms"]
+                    speedup = before_ms / after["median_ms"] if after["median_ms"] else float("inf")
+                    print(
+                        f"{shape.name:<36} {before_ms:9.2f} ms -> {after['median_ms']:9.2f} ms  "
+                        f"({speedup:5.1f}x)  {plan_summary(after['plan'])}"
+                    )
+            finally:
+                await conn.rollback()
+
+    return list(proposed.values())
+
+
+def write_migration(directory: Path, candidates: List[IndexCandidate], down_revision: str) -> Path:
+    now = datetime.now()
+    revision = f"{now:%Y%m%d%H%M}_application_indexes"
+    path = directory / f"{now:%Y%m%d%H%M}_add_application_indexes.py"
+    path.write_text(
+        f'''"""Add application indexes
+
+Revision ID: {revision}
+Revises: {down_revision}
+Create Date: {now:%Y-%m-%d %H:%M:%S}.000000
+
+Generated by scripts/index_advisor.py.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '{revision}'
+down_revision = '{down_revision}'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+{chr(10).join(candidate.alembic_create() for candidate in candidates)}
+
+
+def downgrade() -> None:
+{chr(10).join(candidate.alembic_drop() for candidate in reversed(candidates))}
+'''
+    )
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Propose indexes for customer application queries")
+    parser.add_argument('--benchmark', action='store_true', help="Measure proposed indexes (built and rolled back)")
+    parser.add_argument('--repeat', type=int, default=3, help="EXPLAIN ANALYZE runs per query (median is reported)")
+    parser.add_argument('--verbose', action='store_true', help="Print plan node summaries")
+    parser.add_argument('--generate', type=Path, metavar='DIR', help="Write a migration for the proposed indexes")
+    parser.add_argument('--down-revision', help="down_revision for the generated migration")
+    args = parser.parse_args()
+
+    if args.generate and not args.down_revision:
+        parser.error("--generate requires --down-revision")
+
+    proposed = asyncio.run(run(args))
+
+    print("-" * 100)
+    if not proposed:
+        print("No indexes to propose")
+        return
+    for candidate in proposed:
+        print(candidate.create_sql() + ";")
+    if args.generate:
+        path = write_migration(args.generate, proposed, args.down_revision)
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
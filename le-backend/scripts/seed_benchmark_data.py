@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+Benchmark Dataset Seeding Script for LC Workflow System
+
+Generates reproducible synthetic data for benchmarking and capacity planning:
+users, employees (Khmer/Latin names), customer applications (loan fields,
+JSON loan purposes and collaterals), employee assignments, folders and files.
+
+Rows are streamed straight into Postgres with COPY through asyncpg's
+copy_records_to_table, one table at a time, so millions of rows load in
+minutes without building ORM objects. The same --seed always produces the
+same rows, with timestamps relative to the time of the run.
+
+All seeded users have usernames starting with "bench_", employees have
+BENCH- codes and both belong to the BENCH branch and department, so the
+dataset can be removed again with --clear without touching real data.
+
+Datasets:
+    small   10,000 users / applications / files
+    medium  100,000
+    large   1,000,000
+
+Usage:
+    python scripts/seed_benchmark_data.py --dataset small
+    python scripts/seed_benchmark_data.py --users 5000 --applications 2000000 --files 4000000
+    python scripts/seed_benchmark_data.py --clear
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from passlib.context import CryptContext
+from sqlalchemy import delete, func, select, text
+
+# Add the app directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import AsyncSessionLocal, engine
+from app.models import (
+    ApplicationEmployeeAssignment,
+    Branch,
+    CustomerApplication,
+    Department,
+    Employee,
+    File,
+    Folder,
+    User,
+)
+
+logger = logging.getLogger(__name__)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+DATASETS: Dict[str, Dict[str, int]] = {
+    "small": {"users": 10_000, "employees": 1_000, "applications": 10_000, "folders": 10_000, "files": 10_000},
+    "medium": {"users": 100_000, "employees": 5_000, "applications": 100_000, "folders": 100_000, "files": 100_000},
+    "large": {"users": 1_000_000, "employees": 20_000, "applications": 1_000_000, "folders": 1_000_000, "files": 1_000_000},
+}
+
+BENCH_PREFIX = "bench_"
+BENCH_ADMIN_USERNAME = "bench_admin"
+BENCH_PASSWORD = "Bench@123"
+BENCH_CODE = "BENCH"
+EMPLOYEE_CODE_PREFIX = "BENCH-"
+# Rows buffered per COPY round trip
+COPY_BATCH_SIZE = 10_000
+
+USER_ROLES = ["officer"] * 7 + ["manager"] * 2 + ["user"]
+USER_STATUSES = ["active"] * 8 + ["inactive", "suspended"]
+# Values allowed by ck_customer_applications_status_valid
+APPLICATION_STATUSES = ["draft", "submitted", "approved", "rejected", "disbursed"]
+WORKFLOW_STATUSES = ["po_created", "user_completed", "teller_processing", "manager_review", "approved", "rejected"]
+PRODUCT_TYPES = ["micro_loan", "sme_loan", "housing_loan", "vehicle_loan", "personal_loan"]
+LOAN_PURPOSES = ["agriculture", "business", "education", "housing", "vehicle", "medical", "debt_refinancing"]
+COLLATERAL_TYPES = ["land_title", "house", "vehicle", "gold", "deposit"]
+RISK_CATEGORIES = ["low", "medium", "high"]
+PRIORITY_LEVELS = ["low", "normal", "normal", "high", "urgent"]
+ASSIGNMENT_ROLES = ["primary_officer", "secondary_officer"]
+EMPLOYEE_POSITIONS = ["Credit Officer", "Portfolio Officer", "Teller", "Branch Manager"]
+INCOME_SOURCES = ["salary", "business", "agriculture", "remittance"]
+PROVINCES = ["Phnom Penh", "Siem Reap", "Battambang", "Kampong Cham", "Kandal", "Takeo", "Kampot"]
+MIME_TYPES = [("image/jpeg", "jpg"), ("image/png", "png"), ("application/pdf", "pdf")]
+# (Latin, Khmer) name parts
+FAMILY_NAMES = [("Sok", "សុខ"), ("Chan", "ចាន់"), ("Kim", "គឹម"), ("Heng", "ហេង"), ("Lim", "លឹម"), ("Meas", "មាស"), ("Keo", "កែវ"), ("Chea", "ជា")]
+GIVEN_NAMES = [("Sophea", "សុភា"), ("Vanna", "វណ្ណា"), ("Dara", "ដារា"), ("Chantha", "ចន្ថា"), ("Samnang", "សំណាង"), ("Rathana", "រតនា"), ("Bopha", "បុប្ផា"), ("Visal", "វិសាល")]
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def random_uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def random_name(rng: random.Random) -> Tuple[str, str]:
+    """Matching (Latin, Khmer) full names."""
+    family_latin, family_khmer = rng.choice(FAMILY_NAMES)
+    given_latin, given_khmer = rng.choice(GIVEN_NAMES)
+    return f"{family_latin} {given_latin}", f"{family_khmer} {given_khmer}"
+
+
+def generate_users(
+    count: int,
+    rng: random.Random,
+    now: datetime,
+    password_hash: str,
+    branch_id: uuid.UUID,
+    department_id: uuid.UUID
+) -> Iterator[Dict[str, Any]]:
+    """Synthetic users; the first one is the admin the benchmarks log in as."""
+    for index in range(count):
+        created_at = now - timedelta(days=rng.uniform(1, 1500))
+        last_login_at = now - timedelta(days=rng.uniform(0, 400)) if rng.random() > 0.1 else None
+        username = BENCH_ADMIN_USERNAME if index == 0 else f"{BENCH_PREFIX}user_{index:07d}"
+        first_name, last_name = random_name(rng)[0].split(" ", 1)
+        yield {
+            "id": random_uuid(rng),
+            "username": username,
+            "email": f"{username}@bench.example.com",
+            "password_hash": password_hash,
+            "first_name": first_name,
+            "last_name": last_name,
+            "role": "admin" if index == 0 else rng.choice(USER_ROLES),
+            "status": "active" if index == 0 else rng.choice(USER_STATUSES),
+            "branch_id": branch_id,
+            "department_id": department_id,
+            "login_count": rng.randint(0, 500),
+            "failed_login_attempts": 0,
+            "onboarding_completed": True,
+            "is_deleted": False,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "last_login_at": last_login_at,
+        }
+
+
+def generate_employees(
+    count: int,
+    rng: random.Random,
+    now: datetime,
+    user_ids: Sequence[uuid.UUID],
+    branch_id: uuid.UUID,
+    department_id: uuid.UUID
+) -> Iterator[Dict[str, Any]]:
+    """Synthetic employees; the first ones are linked to seeded users (one each)."""
+    for index in range(count):
+        latin, khmer = random_name(rng)
+        created_at = now - timedelta(days=rng.uniform(1, 1500))
+        yield {
+            "id": random_uuid(rng),
+            "employee_code": f"{EMPLOYEE_CODE_PREFIX}{index:06d}",
+            "full_name_khmer": khmer,
+            "full_name_latin": latin,
+            "phone_number": f"0{rng.randrange(10 ** 8):08d}",
+            "email": f"employee_{index}@bench.example.com",
+            "position": rng.choice(EMPLOYEE_POSITIONS),
+            "branch_id": branch_id,
+            "department_id": department_id,
+            "user_id": user_ids[index + 1] if index + 1 < len(user_ids) else None,
+            "is_active": rng.random() > 0.05,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def generate_applications(
+    count: int,
+    rng: random.Random,
+    now: datetime,
+    user_ids: Sequence[uuid.UUID]
+) -> Iterator[Dict[str, Any]]:
+    """Synthetic customer applications owned by the seeded users."""
+    for index in range(count):
+        created_at = now - timedelta(days=rng.uniform(0, 1000))
+        latin, khmer = random_name(rng)
+        requested_amount = rng.randrange(500, 50_000)
+        collaterals = [
+            {
+                "type": rng.choice(COLLATERAL_TYPES),
+                "description": f"Collateral {n + 1}",
+                "estimated_value": round(requested_amount * rng.uniform(0.5, 2.0), 2),
+            }
+            for n in range(rng.randint(0, 3))
+        ]
+        yield {
+            "id": random_uuid(rng),
+            "user_id": rng.choice(user_ids),
+            "status": rng.choice(APPLICATION_STATUSES),
+            "workflow_status": rng.choice(WORKFLOW_STATUSES),
+            "account_id": f"ACC{index:09d}",
+            "id_card_type": "national_id",
+            # Unique per row: uq_customer_identification is (id_card_type, id_number)
+            "id_number": f"{index:09d}",
+            "full_name_khmer": khmer,
+            "full_name_latin": latin,
+            "phone": f"0{rng.randrange(10 ** 8):08d}",
+            "date_of_birth": date(1950, 1, 1) + timedelta(days=rng.randrange(18_000)),
+            "sex": rng.choice(["male", "female"]),
+            "province": rng.choice(PROVINCES),
+            "occupation": rng.choice(["farmer", "vendor", "teacher", "driver", "tailor"]),
+            "monthly_income": Decimal(rng.randrange(200, 5_000)),
+            "income_source": rng.choice(INCOME_SOURCES),
+            "product_type": rng.choice(PRODUCT_TYPES),
+            "requested_amount": Decimal(requested_amount),
+            "desired_loan_term": rng.choice([6, 12, 18, 24, 36]),
+            "interest_rate": Decimal(rng.randrange(800, 1800)) / 100,
+            "loan_purposes": json.dumps(rng.sample(LOAN_PURPOSES, rng.randint(1, 3))),
+            "collaterals": json.dumps(collaterals),
+            "credit_score": rng.randint(300, 850),
+            "risk_category": rng.choice(RISK_CATEGORIES),
+            "priority_level": rng.choice(PRIORITY_LEVELS),
+            "portfolio_officer_migrated": False,
+            "account_id_validated": False,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def generate_assignments(
+    application_ids: Sequence[uuid.UUID],
+    rng: random.Random,
+    now: datetime,
+    employee_ids: Sequence[uuid.UUID]
+) -> Iterator[Dict[str, Any]]:
+    """One primary officer per application, plus a secondary officer for some."""
+    for application_id in application_ids:
+        officers = rng.sample(employee_ids, min(len(employee_ids), 2 if rng.random() < 0.2 else 1))
+        for role, employee_id in zip(ASSIGNMENT_ROLES, officers):
+            yield {
+                "id": random_uuid(rng),
+                "application_id": application_id,
+                "employee_id": employee_id,
+                "assignment_role": role,
+                "assigned_at": now - timedelta(days=rng.uniform(0, 1000)),
+                "is_active": True,
+            }
+
+
+def generate_folders(
+    application_ids: Sequence[uuid.UUID],
+    rng: random.Random,
+    now: datetime
+) -> Iterator[Dict[str, Any]]:
+    """The parent folder of each application."""
+    for application_id in application_ids:
+        created_at = now - timedelta(days=rng.uniform(0, 1000))
+        yield {
+            "id": random_uuid(rng),
+            "name": f"Application {str(application_id)[:8]}",
+            "application_id": application_id,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def generate_files(
+    count: int,
+    rng: random.Random,
+    now: datetime,
+    user_ids: Sequence[uuid.UUID],
+    application_ids: Sequence[uuid.UUID],
+    folder_ids: Sequence[uuid.UUID]
+) -> Iterator[Dict[str, Any]]:
+    """
+    Synthetic file records (no objects in storage)
+
+    folder_ids[i] is the folder of application_ids[i]; files of applications
+    without a folder have no folder_id.
+    """
+    for index in range(count):
+        mime_type, extension = rng.choice(MIME_TYPES)
+        filename = f"{random_uuid(rng)}.{extension}"
+        application_index = rng.randrange(len(application_ids)) if application_ids else None
+        yield {
+            "id": random_uuid(rng),
+            "filename": filename,
+            "original_filename": f"document_{index}.{extension}",
+            "file_path": f"{BENCH_PREFIX}files/{filename}",
+            "file_size": rng.randint(20_000, 5_000_000),
+            "mime_type": mime_type,
+            "uploaded_by": rng.choice(user_ids),
+            "application_id": application_ids[application_index] if application_index is not None else None,
+            "folder_id": (
+                folder_ids[application_index]
+                if application_index is not None and application_index < len(folder_ids) else None
+            ),
+            "created_at": now - timedelta(days=rng.uniform(0, 1000)),
+        }
+
+
+async def copy_rows(model, rows: Iterable[Dict[str, Any]], batch_size: int = COPY_BATCH_SIZE) -> List[uuid.UUID]:
+    """
+    Stream rows into the model's table with COPY; returns the inserted ids
+
+    The columns are taken from the first row. Every batch is a separate COPY
+    inside one transaction, so a failure leaves the table unchanged.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return []
+    columns = list(first)
+    ids: List[uuid.UUID] = []
+    started = time.perf_counter()
+
+    async with engine.begin() as conn:
+        raw_connection = await conn.get_raw_connection()
+        connection = raw_connection.driver_connection
+        for batch in batched(itertools.chain([first], rows), batch_size):
+            ids.extend(row["id"] for row in batch)
+            await connection.copy_records_to_table(
+                model.__tablename__,
+                records=[tuple(row[column] for column in columns) for row in batch],
+                columns=columns
+            )
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Copied {len(ids):,} {model.__tablename__} in {elapsed:.1f}s ({len(ids) / elapsed if elapsed else 0:,.0f} rows/s)")
+    return ids
+
+
+def batched(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def get_or_create_bench_unit(db, model, **fields):
+    result = await db.execute(select(model).where(model.code == BENCH_CODE))
+    unit = result.scalar_one_or_none()
+    if not unit:
+        unit = model(code=BENCH_CODE, is_active=True, **fields)
+        db.add(unit)
+        await db.flush()
+    return unit
+
+
+async def count_bench_users() -> int:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(func.count(User.id)).where(User.username.like(f"{BENCH_PREFIX}%"))
+        )
+        return result.scalar() or 0
+
+
+async def seed(
+    users: int,
+    employees: int,
+    applications: int,
+    folders: int,
+    files: int,
+    seed_value: int = 42,
+    batch_size: int = COPY_BATCH_SIZE
+) -> Dict[str, int]:
+    """Seed the benchmark dataset; the same seed always produces the same rows."""
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc)
+
+    async with AsyncSessionLocal() as db:
+        branch = await get_or_create_bench_unit(db, Branch, name="Benchmark Branch", address="Benchmark")
+        department = await get_or_create_bench_unit(db, Department, name="Benchmark Department")
+        branch_id, department_id = branch.id, department.id
+        await db.commit()
+
+    password_hash = pwd_context.hash(BENCH_PASSWORD)
+    user_ids = await copy_rows(
+        User, generate_users(max(users, 1), rng, now, password_hash, branch_id, department_id), batch_size
+    )
+    employee_ids = await copy_rows(
+        Employee, generate_employees(employees, rng, now, user_ids, branch_id, department_id), batch_size
+    )
+    application_ids = await copy_rows(
+        CustomerApplication, generate_applications(applications, rng, now, user_ids), batch_size
+    )
+    assignment_ids = []
+    if employee_ids:
+        assignment_ids = await copy_rows(
+            ApplicationEmployeeAssignment, generate_assignments(application_ids, rng, now, employee_ids), batch_size
+        )
+    folder_ids = await copy_rows(
+        Folder, generate_folders(application_ids[:folders], rng, now), batch_size
+    )
+    file_ids = await copy_rows(
+        File, generate_files(files, rng, now, user_ids, application_ids, folder_ids), batch_size
+    )
+
+    # Refresh planner statistics now instead of waiting for autovacuum, so the
+    # first benchmark run does not plan against the pre-seed row counts
+    async with engine.begin() as conn:
+        for model in (User, Employee, CustomerApplication, ApplicationEmployeeAssignment, Folder, File):
+            await conn.execute(text(f"ANALYZE {model.__tablename__}"))
+
+    return {
+        "users": len(user_ids),
+        "employees": len(employee_ids),
+        "applications": len(application_ids),
+        "assignments": len(assignment_ids),
+        "folders": len(folder_ids),
+        "files": len(file_ids),
+    }
+
+
+async def clear() -> None:
+    """Delete all seeded benchmark rows."""
+    bench_users = select(User.id).where(User.username.like(f"{BENCH_PREFIX}%")).scalar_subquery()
+    bench_applications = (
+        select(CustomerApplication.id).where(CustomerApplication.user_id.in_(bench_users)).scalar_subquery()
+    )
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(File).where(File.uploaded_by.in_(bench_users)))
+        await db.execute(delete(File).where(File.application_id.in_(bench_applications)))
+        await db.execute(delete(Folder).where(Folder.application_id.in_(bench_applications)))
+        await db.execute(
+            delete(ApplicationEmployeeAssignment).where(
+                ApplicationEmployeeAssignment.application_id.in_(bench_applications)
+            )
+        )
+        await db.execute(delete(CustomerApplication).where(CustomerApplication.user_id.in_(bench_users)))
+        await db.execute(delete(Employee).where(Employee.employee_code.like(f"{EMPLOYEE_CODE_PREFIX}%")))
+        await db.execute(delete(User).where(User.username.like(f"{BENCH_PREFIX}%")))
+        await db.commit()
+    logger.info("Cleared benchmark dataset")
+
+
+async def main() -> bool:
+    parser = argparse.ArgumentParser(description="Seed the benchmark dataset with COPY")
+    parser.add_argument('--dataset', choices=sorted(DATASETS), default="small", help="Preset volumes")
+    parser.add_argument('--users', type=int, help="Override the number of users")
+    parser.add_argument('--employees', type=int, help="Override the number of employees")
+    parser.add_argument('--applications', type=int, help="Override the number of applications")
+    parser.add_argument('--folders', type=int, help="Override the number of application folders (at most one per application)")
+    parser.add_argument('--files', type=int, help="Override the number of files")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    parser.add_argument('--batch-size', type=int, default=COPY_BATCH_SIZE, help="Rows per COPY batch")
+    parser.add_argument('--clear', action='store_true', help="Delete the benchmark dataset and exit")
+    parser.add_argument('--force', action='store_true', help="Clear an existing dataset before seeding")
+    args = parser.parse_args()
+
+    try:
+        if args.clear:
+            await clear()
+            return True
+
+        if await count_bench_users():
+            if not args.force:
+                print("Benchmark dataset already present, use --force to reseed or --clear to remove it")
+                return True
+            await clear()
+
+        volumes = dict(DATASETS[args.dataset])
+        for key in volumes:
+            override: Optional[int] = getattr(args, key)
+            if override is not None:
+                volumes[key] = override
+
+        counts = await seed(**volumes, seed_value=args.seed, batch_size=args.batch_size)
+        print("\n✅ Seeded " + ", ".join(f"{count:,} {name}" for name, count in counts.items()))
+        print(f"   Admin login: {BENCH_ADMIN_USERNAME} / {BENCH_PASSWORD}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Fatal error in main: {e}")
+        print(f"\n❌ SEEDING FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
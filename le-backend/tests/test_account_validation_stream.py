@@ -0,0 +1,37 @@
+"""
+Tests for the streaming bulk account ID validation endpoint.
+"""
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app.routers import account_validation
+
+DUPLICATE_NOTE = "Account ID appears more than once in this batch"
+
+
+@pytest.mark.integration
+async def test_stream_reports_duplicates_across_chunks(
+    client: AsyncClient,
+    auth_headers: dict,
+    monkeypatch,
+):
+    monkeypatch.setattr(account_validation, "STREAM_CHUNK_SIZE", 2)
+    # The second copy of 12345678 lands in the second chunk
+    body = "\n".join(json.dumps(account_id) for account_id in ["12345678", "23456789", "12345678"])
+
+    response = await client.post(
+        "/api/v1/account-validation/validate-bulk/stream",
+        content=body.encode("utf-8"),
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    results, summary = lines[:-1], lines[-1]
+    assert [result["original"] for result in results] == ["12345678", "23456789", "12345678"]
+    assert DUPLICATE_NOTE not in results[0]["validation_notes"]
+    assert DUPLICATE_NOTE not in results[1]["validation_notes"]
+    assert DUPLICATE_NOTE in results[2]["validation_notes"]
+    assert "summary" in summary
@@ -0,0 +1,52 @@
+"""
+Tests that content deduplication stays within an application or uploader.
+"""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CustomerApplication, File as FileModel, User
+from app.services.file_dedup_service import find_reusable_file
+
+CONTENT_HASH = "a" * 64
+
+
+def stored_file(user: User, application_id=None) -> FileModel:
+    return FileModel(
+        filename="scan.pdf",
+        original_filename="scan.pdf",
+        file_path=f"applications/{application_id}/scan.pdf",
+        file_size=3,
+        mime_type="application/pdf",
+        uploaded_by=user.id,
+        application_id=application_id,
+        content_hash=CONTENT_HASH,
+    )
+
+
+@pytest.mark.integration
+async def test_reuse_is_scoped_to_application(db_session: AsyncSession, admin_user: User):
+    first = CustomerApplication(user_id=admin_user.id, status="draft", full_name_latin="First Customer")
+    second = CustomerApplication(user_id=admin_user.id, status="draft", full_name_latin="Second Customer")
+    db_session.add_all([first, second])
+    await db_session.flush()
+    existing = stored_file(admin_user, first.id)
+    db_session.add(existing)
+    await db_session.commit()
+
+    assert await find_reusable_file(db_session, CONTENT_HASH, first.id, admin_user.id) is existing
+    assert await find_reusable_file(db_session, CONTENT_HASH, second.id, admin_user.id) is None
+    assert await find_reusable_file(db_session, CONTENT_HASH, None, admin_user.id) is None
+
+
+@pytest.mark.integration
+async def test_unattached_reuse_is_scoped_to_uploader(
+    db_session: AsyncSession,
+    test_user: User,
+    admin_user: User,
+):
+    existing = stored_file(test_user)
+    db_session.add(existing)
+    await db_session.commit()
+
+    assert await find_reusable_file(db_session, CONTENT_HASH, None, test_user.id) is existing
+    assert await find_reusable_file(db_session, CONTENT_HASH, None, admin_user.id) is None
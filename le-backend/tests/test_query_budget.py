@@ -0,0 +1,117 @@
+"""
+Tests for statement normalization, QueryCounter and the route query budgets.
+"""
+from collections import Counter
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.query_budget import QUERY_BUDGETS, QueryCounter, repeated_shapes, statement_shape
+from app.models import CustomerApplication, User
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("statement, expected", [
+    ("SELECT * FROM users WHERE id = $1", "SELECT * FROM users WHERE id = ?"),
+    ("SELECT * FROM users WHERE id = %(id_1)s", "SELECT * FROM users WHERE id = ?"),
+    ("SELECT * FROM users WHERE username = :username", "SELECT * FROM users WHERE username = ?"),
+    ("SELECT * FROM users WHERE id IN ($1, $2, $3)", "SELECT * FROM users WHERE id IN (?)"),
+    ("SELECT * FROM users WHERE id IN (%(id_1)s, %(id_2)s)", "SELECT * FROM users WHERE id IN (?)"),
+    ("SELECT *\n  FROM users\n WHERE id = ?", "SELECT * FROM users WHERE id = ?"),
+])
+def test_statement_shape_collapses_parameters(statement, expected):
+    assert statement_shape(statement) == expected
+
+
+@pytest.mark.unit
+def test_statement_shape_keeps_casts():
+    assert statement_shape("SELECT * FROM users WHERE id = $1::UUID") == "SELECT * FROM users WHERE id = ?::UUID"
+    assert statement_shape("SELECT * FROM users WHERE id = ANY($1::UUID[])") == "SELECT * FROM users WHERE id = ANY(?::UUID[])"
+    assert statement_shape("SELECT created_at::date FROM users") == "SELECT created_at::date FROM users"
+
+
+@pytest.mark.unit
+def test_statement_shape_ignores_in_list_length():
+    one = statement_shape("SELECT * FROM branches WHERE id IN ($1::UUID)")
+    many = statement_shape("SELECT * FROM branches WHERE id IN ($1::UUID, $2::UUID, $3::UUID)")
+    assert one == many == "SELECT * FROM branches WHERE id IN (?::UUID)"
+
+
+@pytest.mark.unit
+def test_repeated_shapes_applies_threshold():
+    shapes = Counter({"SELECT a": 6, "SELECT b": 5, "SELECT c": 1})
+    assert repeated_shapes(shapes, threshold=5) == [("SELECT a", 6), ("SELECT b", 5)]
+
+
+@pytest.mark.unit
+def test_query_counter_counts_statements_inside_block():
+    engine = create_engine("sqlite://")
+    with QueryCounter(engine) as queries:
+        with engine.connect() as conn:
+            for value in range(3):
+                conn.execute(text("SELECT :value"), {"value": value})
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    assert queries.count == 3
+    assert queries.shapes() == Counter({"SELECT ?": 3})
+    queries.assert_at_most(3)
+    with pytest.raises(AssertionError, match="executed 3 statements, budget is 2"):
+        queries.assert_at_most(2)
+    queries.assert_no_repeats(threshold=4)
+    with pytest.raises(AssertionError, match="possible N\\+1"):
+        queries.assert_no_repeats(threshold=3)
+
+
+@pytest.mark.unit
+def test_assert_within_budget(monkeypatch):
+    monkeypatch.setitem(QUERY_BUDGETS, ("GET", "/api/v1/example/"), 1)
+    engine = create_engine("sqlite://")
+    with QueryCounter(engine) as queries:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    queries.assert_within_budget("get", "/api/v1/example/")
+
+    with QueryCounter(engine) as queries:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+
+    with pytest.raises(AssertionError, match="GET /api/v1/example/ executed 2 statements"):
+        queries.assert_within_budget("GET", "/api/v1/example/")
+    with pytest.raises(AssertionError, match="No query budget defined"):
+        queries.assert_within_budget("GET", "/api/v1/unknown/")
+
+
+@pytest.mark.integration
+async def test_list_applications_query_count_does_not_grow_with_page_size(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    admin_user: User,
+    admin_headers: dict,
+    query_counter: QueryCounter,
+):
+    db_session.add_all([
+        CustomerApplication(user_id=admin_user.id, status="draft", full_name_latin=f"Customer {index}")
+        for index in range(20)
+    ])
+    await db_session.commit()
+
+    counts = {}
+    for size in (2, 20):
+        # Start from an empty identity map so both requests load the same objects
+        db_session.expunge_all()
+        with query_counter as queries:
+            response = await client.get("/api/v1/applications/", params={"size": size}, headers=admin_headers)
+
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == size
+        queries.assert_within_budget("GET", "/api/v1/applications/")
+        queries.assert_no_repeats()
+        counts[size] = queries.count
+
+    assert counts[2] == counts[20]
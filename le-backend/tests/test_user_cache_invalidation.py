@@ -0,0 +1,76 @@
+"""
+Tests that user writes drop the cached organizational metrics snapshot.
+"""
+import fnmatch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User
+from app.routers.users.services.user_service import UserService
+from app.services.cache_service import cache_service
+from app.services.user_analytics_service import (
+    ORGANIZATIONAL_METRICS_CACHE_KEY,
+    ORGANIZATIONAL_METRICS_CACHE_TTL,
+    USER_CACHE_NAMESPACE,
+)
+from app.services.user_cache_service import UserCacheService
+
+
+class InMemoryRedis:
+    """The subset of the redis client used by CacheService"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def setex(self, key, ttl, value):
+        self.values[key] = value
+
+    def delete(self, *keys):
+        return sum(1 for key in keys if self.values.pop(key, None) is not None)
+
+    def keys(self, pattern):
+        return [key for key in self.values if fnmatch.fnmatchcase(key, pattern)]
+
+
+@pytest.fixture
+def memory_cache(monkeypatch) -> InMemoryRedis:
+    redis = InMemoryRedis()
+    monkeypatch.setattr(cache_service, "redis", redis)
+    return redis
+
+
+async def cache_snapshot():
+    await cache_service.set(
+        ORGANIZATIONAL_METRICS_CACHE_KEY,
+        {"total_users": 1},
+        ORGANIZATIONAL_METRICS_CACHE_TTL,
+        USER_CACHE_NAMESPACE
+    )
+    assert await cache_service.get(ORGANIZATIONAL_METRICS_CACHE_KEY, USER_CACHE_NAMESPACE) is not None
+
+
+@pytest.mark.unit
+async def test_user_cache_invalidation_drops_organizational_metrics(memory_cache):
+    await cache_snapshot()
+
+    await UserCacheService(None).invalidate_user_cache()
+
+    assert await cache_service.get(ORGANIZATIONAL_METRICS_CACHE_KEY, USER_CACHE_NAMESPACE) is None
+
+
+@pytest.mark.integration
+async def test_user_update_drops_organizational_metrics(
+    memory_cache,
+    db_session: AsyncSession,
+    test_user: User,
+    admin_user: User,
+):
+    await cache_snapshot()
+
+    await UserService(db_session).update_user(test_user.id, {"first_name": "Renamed"}, admin_user.id)
+
+    assert await cache_service.get(ORGANIZATIONAL_METRICS_CACHE_KEY, USER_CACHE_NAMESPACE) is None